@@ -0,0 +1,194 @@
+import os
+import math
+import time
+import asyncio
+import contextvars
+from collections import deque
+
+from . import metrics
+
+# Discussions (/ws-chat messages, /chat-stream and /chat requests) running at once (override via environment)
+MAX_DISCUSSIONS = int(os.getenv("HIVE_MAX_DISCUSSIONS", "200"))
+MAX_DISCUSSIONS_PER_CLIENT = int(os.getenv("HIVE_MAX_DISCUSSIONS_PER_CLIENT", "4"))
+
+# LLM calls started per rolling minute; 0 disables the limit
+LLM_CALLS_PER_MINUTE = int(os.getenv("HIVE_LLM_CALLS_PER_MINUTE", "0"))
+LLM_CALLS_PER_MINUTE_PER_CLIENT = int(os.getenv("HIVE_LLM_CALLS_PER_MINUTE_PER_CLIENT", "120"))
+
+# How long a new discussion may wait for a free slot before it is rejected
+QUEUE_SECONDS = float(os.getenv("HIVE_ADMISSION_QUEUE_SECONDS", "5"))
+
+# Header naming the client when running behind a proxy (e.g. X-Forwarded-For); peer address otherwise
+CLIENT_ID_HEADER = os.getenv("HIVE_CLIENT_ID_HEADER", "")
+
+# Client whose discussion is running; detached tasks inherit it from the code that started them
+current_client = contextvars.ContextVar("hive_client", default=None)
+
+WINDOW_SECONDS = 60.0
+
+class Overloaded(Exception):
+    """Raised when a discussion is not admitted; `retry_after` is a hint in whole seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+def client_key(headers, client) -> str:
+    """Identity that per-client limits apply to, from a request or WebSocket"""
+    if CLIENT_ID_HEADER:
+        value = headers.get(CLIENT_ID_HEADER)
+        if value:
+            return value.split(",")[0].strip()
+    return client.host if client is not None else "unknown"
+
+class CallWindow:
+    """Start times of the LLM calls in the last minute"""
+    __slots__ = ("limit", "started")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.started = deque()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until another call fits in the window (0 if it fits now)"""
+        if self.limit <= 0:
+            return 0.0
+        while self.started and self.started[0] <= now - WINDOW_SECONDS:
+            self.started.popleft()
+        if len(self.started) < self.limit:
+            return 0.0
+        return self.started[-self.limit] + WINDOW_SECONDS - now
+
+    def add(self, now: float):
+        if self.limit > 0:
+            self.started.append(now)
+
+class Admission:
+    """
+    Gate in front of discussions and the LLM calls they make. A new
+    discussion needs a free global and per-client slot, waiting at most
+    `queue_seconds` for one, and is turned away while its client (or the
+    server) has used up its per-minute call budget. Calls inside an admitted
+    discussion wait for room in the per-minute windows instead of failing.
+    """
+
+    def __init__(self, max_discussions: int = MAX_DISCUSSIONS,
+                 max_per_client: int = MAX_DISCUSSIONS_PER_CLIENT,
+                 calls_per_minute: int = LLM_CALLS_PER_MINUTE,
+                 client_calls_per_minute: int = LLM_CALLS_PER_MINUTE_PER_CLIENT,
+                 queue_seconds: float = QUEUE_SECONDS):
+        self.max_discussions = max_discussions
+        self.max_per_client = max_per_client
+        self.queue_seconds = queue_seconds
+        self.client_calls_per_minute = client_calls_per_minute
+        self.running = 0
+        self.per_client = {}  # client -> discussions running
+        self.waiting = 0
+        self.calls = CallWindow(calls_per_minute)
+        self.client_calls = {}  # client -> CallWindow
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {"concurrency": 0, "rate": 0}
+        self.throttled_calls = 0
+        self.throttle_seconds = 0.0
+        self._changed = asyncio.Event()
+
+    def _has_room(self, client: str) -> bool:
+        return (self.running < self.max_discussions
+                and self.per_client.get(client, 0) < self.max_per_client)
+
+    def _client_window(self, client: str) -> CallWindow:
+        window = self.client_calls.get(client)
+        if window is None:
+            window = self.client_calls[client] = CallWindow(self.client_calls_per_minute)
+        return window
+
+    def _call_wait(self, client: str, now: float) -> float:
+        wait = self.calls.wait_time(now)
+        window = self.client_calls.get(client)
+        if window is not None:
+            wait = max(wait, window.wait_time(now))
+            if not window.started:
+                del self.client_calls[client]  # nothing left to remember about this client
+        return wait
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected[reason] += 1
+        metrics.admission_rejections.inc(reason)
+        raise Overloaded(reason, max(1, math.ceil(retry_after)))
+
+    async def admit(self, client: str):
+        """Take a discussion slot for `client` or raise Overloaded; pair with release()"""
+        call_wait = self._call_wait(client, time.monotonic())
+        if call_wait > 0:
+            self._reject("rate", call_wait)
+        if not self._has_room(client):
+            if self.queue_seconds <= 0:
+                self._reject("concurrency", 1)
+            self.queued += 1
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_seconds
+            try:
+                while not self._has_room(client):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject("concurrency", self.queue_seconds)
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self.waiting -= 1
+        self.running += 1
+        self.per_client[client] = self.per_client.get(client, 0) + 1
+        self.admitted += 1
+
+    def release(self, client: str):
+        self.running -= 1
+        remaining = self.per_client.get(client, 1) - 1
+        if remaining > 0:
+            self.per_client[client] = remaining
+        else:
+            self.per_client.pop(client, None)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def throttle_call(self):
+        """Wait until the current client and the server may start another LLM call, then count it"""
+        client = current_client.get()
+        waited = 0.0
+        while True:
+            wait = self._call_wait(client, time.monotonic())
+            if wait <= 0:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+        if waited:
+            self.throttled_calls += 1
+            self.throttle_seconds += waited
+        now = time.monotonic()
+        self.calls.add(now)
+        if client is not None:
+            self._client_window(client).add(now)
+
+    def stats(self) -> dict:
+        self.calls.wait_time(time.monotonic())  # drop expired call times before counting
+        return {
+            "limits": {
+                "max_discussions": self.max_discussions,
+                "max_discussions_per_client": self.max_per_client,
+                "llm_calls_per_minute": self.calls.limit,
+                "llm_calls_per_minute_per_client": self.client_calls_per_minute,
+                "queue_seconds": self.queue_seconds
+            },
+            "running": self.running,
+            "waiting": self.waiting,
+            "clients": len(self.per_client),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "llm_calls_last_minute": len(self.calls.started) if self.calls.limit > 0 else None,
+            "throttled_calls": self.throttled_calls,
+            "throttle_seconds": round(self.throttle_seconds, 3)
+        }
@@ -0,0 +1,280 @@
+import os
+import random
+import asyncio
+import hashlib
+import json
+
+# Backend selection: "anthropic" (default) or "fake" for offline runs and load tests
+LLM_BACKEND = os.getenv("HIVE_LLM_BACKEND", "anthropic")
+
+# Fake backend behaviour (override via environment)
+FAKE_LATENCY_MS = float(os.getenv("HIVE_FAKE_LATENCY_MS", "300"))
+FAKE_JITTER_MS = float(os.getenv("HIVE_FAKE_JITTER_MS", "100"))
+FAKE_TOKENS_PER_SECOND = float(os.getenv("HIVE_FAKE_TOKENS_PER_SECOND", "50"))
+FAKE_ERROR_RATE = float(os.getenv("HIVE_FAKE_ERROR_RATE", "0"))
+FAKE_SEED = os.getenv("HIVE_FAKE_SEED", "0")
+
+# Message Batches mode (bulk runs): how long to wait for more calls before submitting, and how often to poll
+BATCH_LINGER_SECONDS = float(os.getenv("HIVE_BATCH_LINGER_SECONDS", "0.5"))
+BATCH_POLL_SECONDS = float(os.getenv("HIVE_BATCH_POLL_SECONDS", "15"))
+
+class Completion:
+    """
+    Backend-neutral result of one LLM call
+    """
+    __slots__ = ("text", "input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens",
+                 "queue_wait", "stop_reason")
+
+    def __init__(self, text: str, input_tokens: int = 0, output_tokens: int = 0,
+                 cache_read_input_tokens: int = 0, cache_creation_input_tokens: int = 0, queue_wait: float = 0.0,
+                 stop_reason: str = None):
+        self.text = text
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_read_input_tokens = cache_read_input_tokens
+        self.cache_creation_input_tokens = cache_creation_input_tokens
+        self.queue_wait = queue_wait  # seconds spent waiting for a connection slot
+        self.stop_reason = stop_reason  # end_turn, max_tokens, stop_sequence, or "stopped" when on_text ended it
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for text whose usage the API never reported (a stream we closed early)"""
+    return max(1, len(text) // 4) if text else 0
+
+class AnthropicBackend:
+    """
+    Real Claude calls through the shared pooled transport (see app/transport.py).
+    stream() awaits on_text for every text delta; a truthy return closes the
+    stream there, so generation (and billing) stops early.
+    """
+    name = "anthropic"
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.client = transport.client
+
+    async def create(self, request: dict) -> Completion:
+        async def attempt():
+            return await self.client.messages.create(**request)
+        timing = {"queue_wait": 0.0}
+        response = await self.transport.call(attempt, timing=timing)
+        completion = self._completion(response.content[0].text, getattr(response, "usage", None))
+        completion.queue_wait = timing["queue_wait"]
+        completion.stop_reason = getattr(response, "stop_reason", None)
+        return completion
+
+    async def stream(self, request: dict, on_text) -> Completion:
+        chunks = []
+
+        async def attempt():
+            async with self.client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    if await on_text(text):
+                        # Leaving the block closes the response; usage so far is all we get
+                        return stream.current_message_snapshot, True
+                return await stream.get_final_message(), False
+
+        # Once text has reached the client a retry would repeat it, so only retry before the first token
+        timing = {"queue_wait": 0.0}
+        message, stopped = await self.transport.call(attempt, can_retry=lambda: not chunks, timing=timing)
+        text = "".join(chunks)
+        completion = self._completion(text, message.usage)
+        completion.queue_wait = timing["queue_wait"]
+        if stopped:
+            completion.stop_reason = "stopped"
+            completion.output_tokens = max(completion.output_tokens, estimate_tokens(text))
+        else:
+            completion.stop_reason = message.stop_reason
+        return completion
+
+    @staticmethod
+    def _completion(text: str, usage) -> Completion:
+        if usage is None:
+            return Completion(text)
+        return Completion(
+            text,
+            input_tokens=usage.input_tokens or 0,
+            output_tokens=usage.output_tokens or 0,
+            cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0
+        )
+
+class BatchRequestError(Exception):
+    """A request in a Message Batch came back errored, canceled or expired"""
+
+class MessageBatchBackend:
+    """
+    Collects concurrent calls and submits them together through the Message
+    Batches API, which costs less but answers in minutes rather than seconds.
+    A batch goes out once `expected` callers are waiting on it, or when no
+    new call has arrived for `linger` seconds. Meant for offline bulk runs
+    (app/bulk.py) where every running discussion advances one turn per batch.
+    Calls can't stream: stream() hands on_text the finished reply in one go.
+    """
+    name = "anthropic-batch"
+
+    def __init__(self, transport, linger: float = BATCH_LINGER_SECONDS, poll_seconds: float = BATCH_POLL_SECONDS):
+        self.transport = transport
+        self.client = transport.client
+        self.linger = linger
+        self.poll_seconds = poll_seconds
+        self.expected = 0  # callers that will each add one call before the next batch is worth sending
+        self.pending = []  # (custom_id, params, future) not yet submitted
+        self.batches = 0
+        self.requests = 0
+        self._next_id = 0
+        self._added = asyncio.Event()
+        self._task = None
+
+    async def create(self, request: dict) -> Completion:
+        if self._task is None:
+            self._task = asyncio.create_task(self._collect())
+        # The batch API takes the same params as messages.create, minus per-request client options
+        params = {key: value for key, value in request.items() if key != "timeout"}
+        future = asyncio.get_running_loop().create_future()
+        self._next_id += 1
+        self.pending.append((f"call-{self._next_id}", params, future))
+        self.kick()
+        message = await future
+        completion = AnthropicBackend._completion(message.content[0].text if message.content else "",
+                                                  message.usage)
+        completion.stop_reason = message.stop_reason
+        return completion
+
+    async def stream(self, request: dict, on_text) -> Completion:
+        completion = await self.create(request)
+        await on_text(completion.text)
+        return completion
+
+    def kick(self):
+        """Wake the collector: a call was added or `expected` went down"""
+        self._added.set()
+
+    async def _collect(self):
+        while True:
+            while not self.pending:
+                self._added.clear()
+                await self._added.wait()
+            # Wait for the rest of this step's calls, but not forever
+            while len(self.pending) < self.expected:
+                self._added.clear()
+                try:
+                    await asyncio.wait_for(self._added.wait(), self.linger)
+                except asyncio.TimeoutError:
+                    break
+            batch, self.pending = self.pending, []
+            try:
+                await self._run_batch(batch)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _run_batch(self, batch: list):
+        requests = [{"custom_id": custom_id, "params": params} for custom_id, params, _ in batch]
+        created = await self.transport.call(lambda: self.client.messages.batches.create(requests=requests))
+        self.batches += 1
+        self.requests += len(batch)
+        print(f"📦 Submitted batch {created.id} with {len(batch)} requests")
+        status = created
+        while status.processing_status != "ended":
+            await asyncio.sleep(self.poll_seconds)
+            status = await self.transport.call(lambda: self.client.messages.batches.retrieve(created.id))
+        futures = {custom_id: future for custom_id, _, future in batch}
+        async for entry in await self.client.messages.batches.results(created.id):
+            future = futures.pop(entry.custom_id, None)
+            if future is None or future.done():
+                continue
+            if entry.result.type == "succeeded":
+                future.set_result(entry.result.message)
+            else:
+                error = getattr(entry.result, "error", None)
+                future.set_exception(BatchRequestError(f"{entry.result.type}: {error}"))
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(BatchRequestError("missing from batch results"))
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+
+class FakeBackendError(Exception):
+    """Injected failure from FakeBackend (see HIVE_FAKE_ERROR_RATE)"""
+
+FAKE_SENTENCES = [
+    "Let's run a two-week pilot and measure adoption before scaling.",
+    "The hidden cost here is maintenance, so budget for it up front.",
+    "What if we flipped the problem and started from the user's worst day?",
+    "A phased rollout balances ambition with the risk of a public failure.",
+    "We need one metric everyone agrees on before we debate tactics.",
+    "Bold move: partner with a competitor instead of racing them.",
+    "The data so far says retention, not acquisition, is the bottleneck.",
+    "Could we combine both ideas into a single experiment this month?",
+]
+
+class FakeBackend:
+    """
+    Deterministic in-process stand-in for the API. The reply, its latency and
+    whether it fails are all derived from a hash of the request, so the same
+    request always behaves the same way for a given seed.
+    """
+    name = "fake"
+
+    def __init__(self, latency_ms: float = FAKE_LATENCY_MS, jitter_ms: float = FAKE_JITTER_MS,
+                 tokens_per_second: float = FAKE_TOKENS_PER_SECOND, error_rate: float = FAKE_ERROR_RATE,
+                 seed: str = FAKE_SEED):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def _plan(self, request: dict):
+        payload = json.dumps([self.seed, request.get("system"), request["messages"], request.get("temperature")],
+                             sort_keys=True, ensure_ascii=False)
+        rng = random.Random(hashlib.sha256(payload.encode("utf-8")).digest())
+        text = " ".join(rng.sample(FAKE_SENTENCES, rng.randint(1, 3)))
+        stop_reason = "end_turn"
+        for stop in request.get("stop_sequences", []):
+            if stop in text:
+                text, stop_reason = text[:text.index(stop)], "stop_sequence"
+        words = text.split(" ")
+        if len(words) > request.get("max_tokens", 1024):
+            words, stop_reason = words[:request["max_tokens"]], "max_tokens"
+        delay = max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        fails = rng.random() < self.error_rate
+        input_tokens = len(payload) // 4
+        return words, stop_reason, delay, fails, input_tokens
+
+    def _token_interval(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    async def create(self, request: dict) -> Completion:
+        words, stop_reason, delay, fails, input_tokens = self._plan(request)
+        await asyncio.sleep(delay + len(words) * self._token_interval())
+        if fails:
+            raise FakeBackendError("Injected fake backend failure")
+        return Completion(" ".join(words), input_tokens=input_tokens, output_tokens=len(words),
+                          stop_reason=stop_reason)
+
+    async def stream(self, request: dict, on_text) -> Completion:
+        words, stop_reason, delay, fails, input_tokens = self._plan(request)
+        await asyncio.sleep(delay)
+        if fails:
+            raise FakeBackendError("Injected fake backend failure")
+        interval = self._token_interval()
+        for i, word in enumerate(words):
+            await asyncio.sleep(interval)
+            if await on_text(word if i == 0 else f" {word}"):
+                words, stop_reason = words[:i + 1], "stopped"
+                break
+        return Completion(" ".join(words), input_tokens=input_tokens, output_tokens=len(words),
+                          stop_reason=stop_reason)
+
+def create_backend(transport, name: str = LLM_BACKEND):
+    if name == "fake":
+        print("🧪 Using fake LLM backend")
+        return FakeBackend()
+    if name != "anthropic":
+        raise ValueError(f"Unknown LLM backend: {name}")
+    return AnthropicBackend(transport)
@@ -0,0 +1,176 @@
+"""
+Offline bulk runner: every line of a JSONL file becomes one isolated
+discussion through the same orchestration as /ws-chat (initial round,
+autonomous rounds, hand-back), and each finished transcript is appended to
+an output JSONL file as soon as it is done.
+
+    python -m app.bulk prompts.jsonl transcripts.jsonl --concurrency 16
+
+Input lines look like {"id": "q1", "message": "...", "temperature": 0.7,
+"autonomous_rounds": 4}; only the message ("prompt" also works) is
+required, ids default to the line number, and "tier" and "cache" are
+honoured as in the API. The output file is the checkpoint: rerunning the
+same command skips ids already written there (a torn last line from a crash
+is dropped), so an interrupted run picks up where it stopped. Failed
+discussions, including any whose agent calls failed (the API would have
+used a fallback reply), are reported and left out, so the next run retries
+them.
+
+--batch submits the LLM calls through the Message Batches API instead: all
+running discussions advance in lockstep, one batch per turn, at batch
+pricing and batch latency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from . import orchestrator
+from .backends import MessageBatchBackend
+from .main import run_discussion, strict_replies
+from .routing import current_tier
+from .sessions import Session
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_CONCURRENCY = 500  # discussions per lockstep batch
+
+def load_items(path: str) -> list:
+    items = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}") from None
+            if not isinstance(item, dict):
+                raise ValueError(f"Expected a JSON object on line {line_number} of {path}")
+            item.setdefault("id", line_number)
+            if "message" not in item:
+                if "prompt" not in item:
+                    raise ValueError(f"No \"message\" (or \"prompt\") on line {line_number} of {path}")
+                item["message"] = item.pop("prompt")
+            if item["id"] in seen:
+                raise ValueError(f"Duplicate id {item['id']!r} on line {line_number} of {path}")
+            seen.add(item["id"])
+            items.append(item)
+    return items
+
+def load_checkpoint(path: str) -> set:
+    """Ids already written to the output file; a partial last line left by a crash is cut off"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good_until = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                break
+            good_until += len(line)
+    if good_until < os.path.getsize(path):
+        print(f"✂️ Dropping a partial record at the end of {path}")
+        with open(path, "r+b") as f:
+            f.truncate(good_until)
+    return done
+
+async def run_item(item: dict) -> dict:
+    """One discussion on its own session, returned as an output record"""
+    current_tier.set(orchestrator.router.tier(item.get("tier"), trusted=True))  # the operator picks tiers
+    strict_replies.set(True)  # a failed agent call fails the item instead of saving a fallback reply
+    session = Session(f"bulk-{item['id']}")
+    rounds = max(2, min(8, item.get("autonomous_rounds", 4)))
+    temperature = item.get("temperature", 0.7)
+
+    async def emit(event: dict):
+        pass  # the transcript is read from the session once the discussion is over
+
+    started = time.perf_counter()
+    await run_discussion(emit, session, item["message"], temperature, rounds, stream=False,
+                         parallel_initial=False, use_cache=item.get("cache", True), pacing="none")
+    return {
+        "id": item["id"],
+        "message": item["message"],
+        "temperature": temperature,
+        "autonomous_rounds": rounds,
+        "transcript": session.to_dicts(),
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
+
+async def run_bulk(items: list, output_path: str, concurrency: int, batch_backend: MessageBatchBackend = None):
+    """Run `items` with at most `concurrency` discussions at once, appending each result to output_path"""
+    queue = iter(items)
+    finished = failed = 0
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        async def worker():
+            nonlocal finished, failed
+            for item in queue:
+                if batch_backend is not None:
+                    batch_backend.expected += 1
+                try:
+                    record = await run_item(item)
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ {item['id']}: {type(e).__name__}: {e}")
+                    continue
+                finally:
+                    if batch_backend is not None:
+                        batch_backend.expected -= 1
+                        batch_backend.kick()
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                finished += 1
+                print(f"✅ [{finished + failed}/{len(items)}] {item['id']} in {record['elapsed_seconds']:.1f}s")
+
+        await asyncio.gather(*[worker() for _ in range(min(concurrency, len(items)))])
+
+    duration = time.perf_counter() - started
+    print(f"🏁 {finished} discussions written, {failed} failed in {duration:.1f}s")
+    return failed
+
+async def main(args) -> int:
+    try:
+        items = load_items(args.input)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    done = load_checkpoint(args.output)
+    todo = [item for item in items if item["id"] not in done]
+    print(f"📚 {len(items)} discussions in {args.input}, {len(done)} already in {args.output}, {len(todo)} to run")
+
+    batch_backend = None
+    if args.batch:
+        batch_backend = MessageBatchBackend(orchestrator.transport)
+        orchestrator.backend = batch_backend
+    concurrency = args.concurrency or (DEFAULT_BATCH_CONCURRENCY if args.batch else DEFAULT_CONCURRENCY)
+    try:
+        failed = await run_bulk(todo, args.output, concurrency, batch_backend) if todo else 0
+    finally:
+        if batch_backend is not None:
+            await batch_backend.aclose()
+        await orchestrator.session_state.aclose()
+        await orchestrator.transport.aclose()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSONL file of seed questions as isolated Hive discussions")
+    parser.add_argument("input", help="JSONL with one {\"message\": ...} per line")
+    parser.add_argument("output", help="JSONL transcripts are appended to (and resumed from)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"discussions at once (default {DEFAULT_CONCURRENCY}, "
+                             f"{DEFAULT_BATCH_CONCURRENCY} with --batch)")
+    parser.add_argument("--batch", action="store_true", help="submit calls through the Message Batches API")
+    parser.add_argument("--restart", action="store_true", help="discard the output file instead of resuming")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+
+# Response cache settings (override via environment); size 0 disables the cache
+RESPONSE_CACHE_SIZE = int(os.getenv("HIVE_RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("HIVE_RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_PATH = os.getenv("HIVE_RESPONSE_CACHE_PATH")  # optional SQLite file that survives restarts
+
+class ResponseCache:
+    """
+    LRU + TTL cache of LLM replies keyed by the full request. Entries live in
+    memory; with a path they are also written to SQLite and read back on a
+    memory miss, both off the event loop, so the cache survives restarts.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+                 path: str = RESPONSE_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (created_at, text), least recently used first
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        self._writer = None  # written from worker threads; WAL lets reads go on meanwhile
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        if path and max_entries > 0:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created_at REAL, text TEXT)")
+            self._db.commit()
+            self._writer = sqlite3.connect(path, check_same_thread=False)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def key(agent: str, model: str, system, messages, temperature: float, max_tokens: int,
+            stop_sequences: list = (), max_sentences: int = 0) -> str:
+        """Digest of everything that shapes a reply, length policy included"""
+        payload = json.dumps([agent, model, system, messages, temperature, max_tokens, list(stop_sequences),
+                              max_sentences], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str):
+        """Return the cached reply for `key`, or None on a miss or expired entry"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._read, key)
+            if row is not None and now - row[0] <= self.ttl_seconds:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return row[1]
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, text: str):
+        created_at = time.time()
+        self._remember(key, created_at, text)
+        if self._db is not None:
+            await asyncio.to_thread(self._write, key, created_at, text)
+
+    def _read(self, key: str):
+        with self._read_lock:
+            return self._db.execute("SELECT created_at, text FROM responses WHERE key = ?", (key,)).fetchone()
+
+    def _write(self, key: str, created_at: float, text: str):
+        with self._write_lock:
+            self._writer.execute("INSERT OR REPLACE INTO responses (key, created_at, text) VALUES (?, ?, ?)",
+                                 (key, created_at, text))
+            self._writer.commit()
+
+    def _remember(self, key: str, created_at: float, text: str):
+        self._entries[key] = (created_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None
+        }
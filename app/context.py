@@ -0,0 +1,112 @@
+import os
+from collections import deque
+from itertools import islice
+
+# Rough token estimate; good enough for budgeting without a tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+# A single oversized message is truncated in prompts so it can't eat the whole budget
+MAX_MESSAGE_TOKENS = int(os.getenv("HIVE_MAX_MESSAGE_TOKENS", "600"))
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def render_line(role: str, content: str) -> str:
+    limit = MAX_MESSAGE_TOKENS * CHARS_PER_TOKEN
+    if len(content) > limit:
+        content = content[:limit] + "…"
+    # Don't include agent names in history to prevent self-labeling/mimicking
+    if role == "user":
+        return f"User: {content}\n"
+    return f"Previous response: {content}\n"
+
+class ContextRenderer:
+    """
+    Pre-rendered history lines for one session, with a token estimate per
+    line. Each message is rendered once when it is appended; prompt history
+    blocks are then a single join over a slice of cached lines, memoised by
+    their absolute (start, end) range so agents that share a window in the
+    same turn reuse the same string. Assembled prompt contents are memoised
+    the same way, keyed by whatever they were built from.
+    """
+    __slots__ = ("lines", "tokens", "total", "_blocks", "_windows", "_contents")
+
+    MAX_CACHED_BLOCKS = 8
+
+    def __init__(self, max_lines: int):
+        self.lines = deque(maxlen=max_lines)
+        self.tokens = deque(maxlen=max_lines)
+        self.total = 0  # lines ever appended, including ones the deque dropped
+        self._blocks = {}
+        self._windows = {}
+        self._contents = {}
+
+    def append(self, role: str, content: str):
+        line = render_line(role, content)
+        self.lines.append(line)
+        self.tokens.append(estimate_tokens(line))
+        self.total += 1
+
+    def window(self, budget: int, chunk: int) -> tuple:
+        """
+        Absolute (start, split) indexes of the context window: the newest
+        chunk, messages from `split` on (1 to `chunk` of them), is always
+        included, and the older [start, split) part is as much history as
+        fits in `budget` tokens. Both boundaries move in steps of `chunk`
+        messages.
+        """
+        first = self.total - len(self.lines)
+        # Start of the chunk holding the newest message, so the window is never empty
+        split = max(first, (self.total - 1) // chunk * chunk)
+        # Lines before `split` never change, so a window stays valid until split
+        # moves or the oldest retained line passes where its walk stopped
+        key = (split, budget, chunk)
+        cached = self._windows.get(key)
+        if cached is not None and cached[1] >= first:
+            bounds = cached[0]
+        else:
+            start = split
+            used = 0
+            for cost in islice(reversed(self.tokens), self.total - split, None):
+                if used + cost > budget or start <= first:
+                    break
+                used += cost
+                start -= 1
+            reached = start
+            start = min(split, -(-start // chunk) * chunk)  # round up so the window stays within budget
+            if len(self._windows) >= self.MAX_CACHED_BLOCKS:
+                self._windows.clear()
+            bounds = (start, split)
+            self._windows[key] = (bounds, reached)
+        return bounds
+
+    def block(self, start: int, end: int) -> str:
+        """Rendered history for absolute message indexes [start, end)"""
+        key = (start, end)
+        text = self._blocks.get(key)
+        if text is None:
+            text = "".join(self._slice(start, end))
+            if len(self._blocks) >= self.MAX_CACHED_BLOCKS:
+                self._blocks.clear()
+            self._blocks[key] = text
+        return text
+
+    def content(self, key: tuple):
+        """Prompt content memoised under `key` by keep_content(), or None"""
+        return self._contents.get(key)
+
+    def keep_content(self, key: tuple, content):
+        if len(self._contents) >= self.MAX_CACHED_BLOCKS:
+            self._contents.clear()
+        self._contents[key] = content
+
+    def _slice(self, start: int, end: int) -> list:
+        # Windows sit at the newest end of the deque, so walk it from the right
+        # instead of skipping over every older line
+        first = self.total - len(self.lines)
+        start = max(start, first)
+        if start >= end:
+            return []
+        newest = list(islice(reversed(self.lines), self.total - start))
+        newest.reverse()
+        return newest[:end - start]
@@ -0,0 +1,97 @@
+import os
+import re
+
+# A reply counts as repeating the discussion when at least this share of its
+# word shingles already appeared in the last HIVE_CONVERGENCE_WINDOW replies;
+# 0 disables early endings (override via environment)
+THRESHOLD = float(os.getenv("HIVE_CONVERGENCE_THRESHOLD", "0.5"))
+
+# Repeating replies in a row before the discussion is wrapped up
+PATIENCE = int(os.getenv("HIVE_CONVERGENCE_PATIENCE", "2"))
+
+# Recent replies a new one is compared against, and words per shingle
+WINDOW = int(os.getenv("HIVE_CONVERGENCE_WINDOW", "6"))
+SHINGLE_WORDS = int(os.getenv("HIVE_CONVERGENCE_SHINGLE_WORDS", "2"))
+
+# Autonomous rounds that always run in full before an early ending is considered
+MIN_ROUNDS = int(os.getenv("HIVE_CONVERGENCE_MIN_ROUNDS", "1"))
+
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Words too common to say anything about what a reply is about
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from has have i if in into is it it's its just let's
+more most not of on or our so than that that's the their them then there these they this to too up us
+was we we're what when which while who why will with would you your
+""".split())
+
+# How discussions ended: ran every round, converged, or handed back because an agent asked the user
+convergence_stats = {"discussions": 0, "converged": 0, "user_input": 0, "calls_planned": 0, "calls_made": 0}
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    """Word n-grams of `text`, lower-cased with stopwords dropped (the words themselves if fewer)"""
+    words = [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+class ConvergenceDetector:
+    """
+    Watches the replies of one autonomous discussion for repetition. Each
+    reply is scored by the share of its shingles already used in the last
+    `window` replies; after `patience` replies in a row score at least
+    `threshold`, the agents have converged (or stalled) and the discussion
+    should go to its final round.
+    """
+    __slots__ = ("threshold", "patience", "window", "shingle_words", "recent", "streak", "last_score")
+
+    def __init__(self, threshold: float = THRESHOLD, patience: int = PATIENCE, window: int = WINDOW,
+                 shingle_words: int = SHINGLE_WORDS):
+        self.threshold = threshold
+        self.patience = max(1, patience)
+        self.window = max(1, window)
+        self.shingle_words = max(1, shingle_words)
+        self.recent = []  # shingle sets of the latest replies, oldest first
+        self.streak = 0
+        self.last_score = 0.0
+
+    @property
+    def converged(self) -> bool:
+        return self.threshold > 0 and self.streak >= self.patience
+
+    def seen(self, text: str):
+        """Remember a reply (e.g. from the initial round) without scoring it"""
+        self.recent.append(shingles(text, self.shingle_words))
+        del self.recent[:-self.window]
+
+    def add(self, text: str) -> float:
+        """Score a new reply against the recent ones and remember it; returns the score"""
+        current = shingles(text, self.shingle_words)
+        score = 0.0
+        if current and self.recent:
+            used = set().union(*self.recent)
+            score = len(current & used) / len(current)
+        self.streak = self.streak + 1 if self.threshold > 0 and score >= self.threshold else 0
+        self.last_score = score
+        self.recent.append(current)
+        del self.recent[:-self.window]
+        return score
+
+def record_discussion(planned: int, made: int, ended_by: str = None):
+    """Count one finished autonomous discussion; `ended_by` is "converged", "user_input" or None"""
+    convergence_stats["discussions"] += 1
+    convergence_stats["calls_planned"] += planned
+    convergence_stats["calls_made"] += made
+    if ended_by is not None:
+        convergence_stats[ended_by] += 1
+
+def convergence_summary() -> dict:
+    calls_saved = convergence_stats["calls_planned"] - convergence_stats["calls_made"]
+    discussions = convergence_stats["discussions"]
+    return {
+        "settings": {"threshold": THRESHOLD, "patience": PATIENCE, "window": WINDOW,
+                     "shingle_words": SHINGLE_WORDS, "min_rounds": MIN_ROUNDS},
+        **convergence_stats,
+        "calls_saved": calls_saved,
+        "avg_calls_saved": round(calls_saved / discussions, 2) if discussions else None
+    }
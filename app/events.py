@@ -0,0 +1,226 @@
+import os
+import asyncio
+from collections import deque
+
+from .profiling import current_trace
+
+# Events kept per session for replay to reattaching clients (override via environment)
+EVENT_LOG_SIZE = int(os.getenv("HIVE_EVENT_LOG_SIZE", "2000"))
+
+# Seconds a discussion keeps running after its last follower dropped before it
+# is cancelled; a client reconnecting within the window picks it up. A client
+# that closes cleanly cancels it right away. Negative keeps unwatched
+# discussions running to completion.
+DETACH_GRACE_SECONDS = float(os.getenv("HIVE_DETACH_GRACE_SECONDS", "3"))
+
+# Keep references to running discussions so they aren't garbage collected mid-run
+running_discussions = set()
+
+# How discussions ended: interrupted by a newer user message, abandoned by
+# every client past the grace period, or failed
+discussion_stats = {"started": 0, "completed": 0, "failed": 0, "interrupted": 0, "abandoned": 0}
+
+def discussion_summary() -> dict:
+    return {"running": len(running_discussions), **discussion_stats}
+
+class EventLog:
+    """
+    Sequence-numbered events of one session. Discussions run as server tasks
+    that publish here instead of writing to a connection, so they keep going
+    when the client drops; any number of clients can follow the log, replaying
+    from the last sequence number they saw and then tailing new events.
+    """
+    __slots__ = ("events", "last_seq", "task", "trace", "followers", "grace", "_cancel_reason", "_abandon_timer",
+                 "_changed")
+
+    def __init__(self, max_events: int = EVENT_LOG_SIZE, grace: float = DETACH_GRACE_SECONDS):
+        self.events = deque(maxlen=max_events)  # event dicts, each with its "seq"
+        self.last_seq = 0
+        self.task = None  # the discussion currently publishing, if any
+        self.trace = None  # its phase trace while discussions are being traced
+        self.followers = 0  # clients currently tailing the log
+        self.grace = grace
+        self._cancel_reason = None
+        self._abandon_timer = None
+        self._changed = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None
+
+    def publish(self, event: dict) -> int:
+        self.last_seq += 1
+        event["seq"] = self.last_seq
+        if event.get("status") == "done":
+            self._drop_deltas(event.get("agent"))
+        elif "event" in event:  # complete, cancelled or error: no reply is streaming any more
+            self._drop_deltas()
+        self.events.append(event)
+        self._notify()
+        return self.last_seq
+
+    async def emit(self, event: dict):
+        """Awaitable publish, usable as a Pacer or emit target"""
+        self.publish(event)
+
+    def since(self, last_seq: int) -> list:
+        """Retained events newer than `last_seq`, oldest first"""
+        if last_seq > self.last_seq:
+            last_seq = 0  # the client saw an older log (e.g. before a restart); replay what we have
+        newer = []
+        for event in reversed(self.events):
+            if event["seq"] <= last_seq:
+                break
+            newer.append(event)
+        newer.reverse()
+        return newer
+
+    async def follow(self, last_seq: int, until_idle: bool = False):
+        """
+        Yield every event after `last_seq`, then new ones as they are
+        published. With until_idle=True, stop once caught up while no
+        discussion is running.
+        """
+        self._attach()
+        try:
+            while True:
+                changed = self._changed
+                for event in self.since(last_seq):
+                    last_seq = event["seq"]
+                    yield event
+                if until_idle and not self.running and last_seq >= self.last_seq:
+                    return
+                await changed.wait()
+        finally:
+            self._detach()
+
+    async def follow_batches(self, last_seq: int, window: float):
+        """
+        Like follow(), but yields lists: once an event is available, wait
+        `window` seconds and take everything published by then
+        """
+        self._attach()
+        try:
+            while True:
+                changed = self._changed
+                batch = self.since(last_seq)
+                if not batch:
+                    await changed.wait()
+                    continue
+                if window > 0:
+                    await asyncio.sleep(window)
+                    batch = self.since(last_seq)
+                last_seq = batch[-1]["seq"]
+                yield batch
+        finally:
+            self._detach()
+
+    def start(self, produce) -> asyncio.Task:
+        """
+        Run produce(emit) as a detached server task publishing to this log.
+        A discussion started while another is running waits for it to finish;
+        interrupt() first to replace it instead.
+        """
+        task = asyncio.create_task(self._run(produce, self.task))
+        self.task = task
+        running_discussions.add(task)
+        task.add_done_callback(running_discussions.discard)
+        return task
+
+    async def interrupt(self):
+        """
+        Cancel the running discussion (in-flight LLM call included) and any
+        queued behind it, and wait until they have unwound
+        """
+        task = self.task
+        if task is not None:
+            self.cancel("interrupted")
+            await asyncio.wait({task})
+
+    def cancel(self, reason: str):
+        """Cancel the running discussion and any queued behind it"""
+        if self.task is not None:
+            self._cancel_reason = reason
+            self.task.cancel()
+
+    async def _run(self, produce, previous):
+        started = False
+        try:
+            if previous is not None:
+                await asyncio.wait({previous})
+            self._cancel_reason = None
+            self.trace = current_trace.get()
+            started = True
+            discussion_stats["started"] += 1
+            await produce(self.emit)
+            discussion_stats["completed"] += 1
+        except asyncio.CancelledError:
+            if not started and previous is not None:
+                # Cancelled while queued: the one it waits for goes too, and
+                # has unwound before whatever starts next
+                previous.cancel()
+                await asyncio.wait({previous})
+            reason = self._cancel_reason
+            if started and reason is not None:
+                discussion_stats[reason] += 1
+                print(f"🛑 Discussion {reason}")
+                self.publish({"event": "cancelled", "reason": reason})
+            raise
+        except Exception as e:
+            discussion_stats["failed"] += 1
+            print(f"❌ Discussion failed: {e}")
+            self.publish({"event": "error", "message": "The discussion stopped unexpectedly."})
+        finally:
+            if self.task is asyncio.current_task():
+                self.task = None
+                self.trace = None
+                self._cancel_reason = None
+                self._stop_abandon_timer()  # nothing left to abandon; don't hit the next discussion
+            self._notify()
+
+    def abandon(self):
+        """Cancel the running discussion now if nobody follows it (its last client left on purpose)"""
+        self._stop_abandon_timer()
+        if self.followers == 0 and self.running and self.grace >= 0:
+            self.cancel("abandoned")
+
+    def _attach(self):
+        self.followers += 1
+        self._stop_abandon_timer()
+
+    def _stop_abandon_timer(self):
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+
+    def _detach(self):
+        self.followers -= 1
+        if self.followers == 0 and self.running and self.grace >= 0:
+            loop = asyncio.get_running_loop()
+            self._abandon_timer = loop.call_later(self.grace, self._abandon)
+
+    def _abandon(self):
+        self._abandon_timer = None
+        if self.followers == 0:
+            self.cancel("abandoned")
+
+    def _drop_deltas(self, agent: str = None):
+        """
+        Forget the delta events of `agent`'s reply that just ended (of every
+        reply, without an agent). Replay sends its done event with the whole
+        text instead, so the retained log doesn't grow with streamed tokens.
+        """
+        kept = []
+        while self.events:
+            event = self.events.pop()
+            status = event.get("status")
+            if status == "delta" and (agent is None or event.get("agent") == agent):
+                continue
+            kept.append(event)
+            if agent is not None and status == "typing" and event.get("agent") == agent:
+                break  # the start of this reply; older deltas were dropped when their replies ended
+        self.events.extend(reversed(kept))
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
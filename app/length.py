@@ -0,0 +1,43 @@
+import re
+
+# A sentence ends at . ! or ? (plus any closing quotes or brackets) followed by whitespace
+SENTENCE_END = re.compile(r"[.!?][\"'”’)\]]*(?=\s)")
+
+def sentence_cut(text: str, max_sentences: int):
+    """Index just past the end of sentence number `max_sentences` in `text`, or None if it hasn't ended yet"""
+    for count, match in enumerate(SENTENCE_END.finditer(text), 1):
+        if count == max_sentences:
+            return match.end()
+    return None
+
+def trim_sentences(text: str, max_sentences: int) -> str:
+    """`text` cut after `max_sentences` sentences (unchanged when it is shorter or the limit is 0)"""
+    if max_sentences <= 0:
+        return text
+    cut = sentence_cut(text, max_sentences)
+    return text if cut is None else text[:cut]
+
+class SentenceLimit:
+    """
+    Follows a streamed reply and says when it has run to `max_sentences`
+    sentences. feed() returns the part of each delta to forward (nothing past
+    the last allowed sentence) and whether the stream should stop.
+    """
+    __slots__ = ("max_sentences", "text", "done")
+
+    def __init__(self, max_sentences: int):
+        self.max_sentences = max_sentences
+        self.text = ""
+        self.done = False
+
+    def feed(self, delta: str):
+        if self.done:
+            return "", True
+        start = len(self.text)
+        self.text += delta
+        cut = sentence_cut(self.text, self.max_sentences)
+        if cut is None:
+            return delta, False
+        self.text = self.text[:cut]
+        self.done = True
+        return self.text[start:], True
@@ -1,17 +1,55 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Header, Request, Response
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+import hmac
 import json
+import contextvars
 import time
 import asyncio
 import random
+from functools import partial
 from .orchestrator import (
-    run_orchestration, run_streaming_orchestration, conversation_history, 
-    AGENTS, build_enhanced_context, call_claude_with_personality, check_for_user_input_request
+    run_orchestration, run_streaming_orchestration, sessions,
+    AGENTS, build_enhanced_context, call_claude_with_personality, check_for_user_input_request,
+    first_token_summary, prompt_cache_summary, run_parallel_initial_round, response_cache, backend, transport,
+    session_state, admission, router
 )
+from .sessions import Session, DEFAULT_SESSION_ID, new_session_id
+from .pacing import Pacer, PACING_MODES, DEFAULT_PACING
+from .events import EventLog, discussion_summary
+from .admission import Overloaded, client_key, current_client
+from .routing import current_tier
+from .profiling import current_trace, start_trace, span
+from .convergence import ConvergenceDetector, MIN_ROUNDS, record_discussion, convergence_summary
+from .rooms import Rooms
+from . import metrics, wire, profiling
 
-app = FastAPI()
+# Shared discussions generated once and broadcast to every viewer
+rooms = Rooms(sessions)
+
+# Set by the bulk runner: a failed agent call fails the whole discussion instead
+# of being replaced by a fallback reply, so it isn't saved as a finished one
+strict_replies = contextvars.ContextVar("hive_strict_replies", default=False)
+
+# Sessions currently held in memory, read at scrape time
+metrics.registry.register(metrics.Gauge("hive_active_sessions", "Sessions held in memory",
+                                        function=lambda: len(sessions)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open keep-alive connections before the first burst (HIVE_LLM_WARM_CONNECTIONS)
+    if backend.name == "anthropic":
+        await transport.warm_up()
+    loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+    yield
+    loop_monitor.cancel()
+    await session_state.aclose()  # store state still queued for writing
+    await transport.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware for React frontend
 app.add_middleware(
@@ -25,37 +63,80 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     message: str
     temperature: float = 0.7
+    session_id: str = DEFAULT_SESSION_ID
+    stream: bool = False  # forward token-level "delta" events
+    parallel_initial: bool = False  # all agents answer the initial round at once
+    cache: bool = True  # set False to bypass the response cache
+    pacing: str = DEFAULT_PACING  # "natural" or "none" to skip presentation delays
+    tier: Optional[str] = None  # routing tier (see HIVE_ROUTES); unknown or unpermitted tiers get the default
+
+def busy_response(error: Overloaded) -> JSONResponse:
+    return JSONResponse(status_code=429, content={"error": str(error), "reason": error.reason},
+                        headers={"Retry-After": str(error.retry_after)})
+
+def start_admitted(events: EventLog, produce, client: str, tier: str, session_id: str) -> asyncio.Task:
+    """Start a discussion in `tier` that holds `client`'s admission slot until its task ends"""
+    # The task inherits these, so its LLM calls count against this client and follow the tier's
+    # routes, and its phases are timed into a trace while an admin has tracing on
+    current_client.set(client)
+    current_tier.set(tier)
+    trace = start_trace(session_id)
+    current_trace.set(trace)
+    task = events.start(produce)
+    task.add_done_callback(lambda _: admission.release(client))
+    if trace is not None:
+        task.add_done_callback(lambda _: trace.finish())
+    return task
 
 @app.post("/chat")
-def chat_endpoint(req: ChatRequest):
-    responses = run_orchestration(req.message, req.temperature)
-    return {"responses": responses, "history": conversation_history}
+async def chat_endpoint(req: ChatRequest, request: Request):
+    """
+    Run one orchestration turn. Only the messages added since the request
+    started are returned, with a cursor for /history?after=...
+    """
+    client = client_key(request.headers, request.client)
+    try:
+        await admission.admit(client)
+    except Overloaded as e:
+        return busy_response(e)
+    current_client.set(client)
+    current_tier.set(router.tier(req.tier, is_admin(request.headers.get("authorization"))))
+    trace = start_trace(req.session_id)
+    current_trace.set(trace)
+    try:
+        session = await sessions.get(req.session_id)
+        last_id = session.total - 1
+        responses = await run_orchestration(req.message, req.temperature, req.session_id, req.cache)
+        # Store the turn before answering so the next request sees it on any worker
+        await session_state.flush()
+    finally:
+        admission.release(client)
+        if trace is not None:
+            trace.finish()
+    messages, _ = await session.page(after=last_id)
+    return {
+        "session_id": req.session_id,
+        "responses": responses,
+        "messages": messages,
+        "cursor": messages[-1]["id"] if messages else last_id
+    }
 
-@app.post("/chat-stream")
-async def chat_stream_endpoint(req: ChatRequest):
+def parse_seq(value) -> Optional[int]:
+    """Event sequence number from a query parameter or Last-Event-ID header, if valid"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def event_stream_response(events: EventLog, last_seq: int) -> StreamingResponse:
     """
-    Streaming endpoint that yields agent responses one by one as they're ready
+    SSE replay of `events` after `last_seq` followed by the live tail, until
+    no discussion is running. Each event carries its seq as the SSE id so
+    a dropped client can resume with Last-Event-ID.
     """
     async def generate_stream():
-        # First, yield the user's message immediately
-        user_event = {
-            "role": "user",
-            "agent": "user", 
-            "content": req.message
-        }
-        yield f"data: {json.dumps(user_event)}\n\n"
-        
-        # Small pause before agents start responding
-        await asyncio.sleep(0.5)
-        
-        # Generate and yield each agent response progressively
-        async for agent_response in run_streaming_orchestration(req.message, req.temperature):
-            yield f"data: {json.dumps(agent_response)}\n\n"
-            # Natural pause between agent responses (1-2 seconds)
-            await asyncio.sleep(1.5)
-        
-        # Send final event to indicate completion
-        yield f"data: {json.dumps({'event': 'complete'})}\n\n"
+        async for event in events.follow(last_seq, until_idle=True):
+            yield f"id: {event['seq']}\ndata: {json.dumps(event)}\n\n"
     
     return StreamingResponse(
         generate_stream(),
@@ -67,10 +148,94 @@ async def chat_stream_endpoint(req: ChatRequest):
         }
     )
 
-async def conduct_concise_discussion(websocket: WebSocket, temperature: float, max_rounds: int = 4):
+@app.post("/chat-stream")
+async def chat_stream_endpoint(req: ChatRequest, request: Request):
+    """
+    Streaming endpoint that yields agent responses one by one as they're ready.
+    The discussion runs as a server task, so it finishes even if the client
+    drops; reconnect with GET /chat-stream to pick up where it left off.
+    """
+    pacing = req.pacing if req.pacing in PACING_MODES else DEFAULT_PACING
+    
+    async def discussion(emit):
+        # First, send the user's message immediately
+        await emit({
+            "role": "user",
+            "agent": "user", 
+            "content": req.message,
+            "session_id": req.session_id
+        })
+        
+        # Generate and send each agent response progressively, paced per req.pacing
+        async for agent_response in run_streaming_orchestration(
+            req.message, req.temperature, req.session_id, req.stream, req.parallel_initial, req.cache, pacing
+        ):
+            await emit(agent_response)
+        
+        # Store the turn so the next request sees it on any worker
+        await session_state.flush()
+        
+        # Send final event to indicate completion
+        await emit({"event": "complete"})
+    
+    client = client_key(request.headers, request.client)
+    try:
+        await admission.admit(client)
+    except Overloaded as e:
+        return busy_response(e)
+    events = (await sessions.get(req.session_id)).events
+    last_seq = events.last_seq
+    tier = router.tier(req.tier, is_admin(request.headers.get("authorization")))
+    start_admitted(events, discussion, client, tier, req.session_id)
+    return event_stream_response(events, last_seq)
+
+@app.get("/chat-stream")
+async def resume_chat_stream(session_id: str, last_event_id: Optional[str] = Header(None),
+                             after: Optional[int] = None):
     """
-    Conduct concise multi-turn autonomous discussion between agents
+    Reattach to a session's discussion: replays events after Last-Event-ID
+    (or `after`), then tails the live discussion until it completes
     """
+    session = await sessions.peek(session_id)
+    if session is None:
+        return Response(status_code=404)
+    last_seq = parse_seq(last_event_id)
+    if last_seq is None:
+        last_seq = after if after is not None else session.events.last_seq
+    return event_stream_response(session.events, last_seq)
+
+INITIAL_CONCISE_INSTRUCTION = "\n\nIMPORTANT: Keep your response to 1-2 sentences maximum. Be direct and focused."
+
+def delta_sender(pacer: Pacer, agent: str):
+    """
+    Build an on_delta callback that forwards streamed text to the client
+    """
+    async def send_delta(text: str):
+        await pacer.emit({
+            "role": "agent",
+            "agent": agent,
+            "content": text,
+            "status": "delta"
+        })
+    return send_delta
+
+async def conduct_concise_discussion(pacer: Pacer, session: Session, temperature: float, max_rounds: int = 4,
+                                     stream: bool = False, use_cache: bool = True):
+    """
+    Conduct concise multi-turn autonomous discussion between agents. Once
+    the replies start repeating each other (see ConvergenceDetector), the
+    next agent gets the final_round phase and the discussion ends there.
+    """
+    detector = ConvergenceDetector()
+    for message in list(session.messages)[-len(AGENTS):]:
+        if message.role == "agent":
+            detector.seen(message.content)  # the initial round counts as recent replies
+    planned_calls = max_rounds * len(AGENTS)
+    calls = 0
+    wrapping_up = False
+    closed = False
+    ended_by = None
+    
     for round_num in range(1, max_rounds + 1):
         print(f"🔄 Concise discussion round {round_num}/{max_rounds}")
         
@@ -84,8 +249,11 @@ async def conduct_concise_discussion(websocket: WebSocket, temperature: float, m
             is_final_agent_in_round = agent_idx == len(agents_order) - 1
             is_final_round = round_num == max_rounds
             
+            # Generate at most one turn ahead of what the client has seen
+            await pacer.wait_ahead()
+            
             # Send typing indicator
-            await websocket.send_json({
+            await pacer.emit({
                 "role": "agent",
                 "agent": agent,
                 "content": None,
@@ -94,23 +262,29 @@ async def conduct_concise_discussion(websocket: WebSocket, temperature: float, m
             
             try:
                 # Choose conversation phase based on position
-                if is_final_round and is_final_agent_in_round:
+                if (is_final_round and is_final_agent_in_round) or wrapping_up:
                     conversation_phase = "final_round"
                 else:
                     conversation_phase = "autonomous_discussion"
                 
                 # Generate concise response with enhanced context
-                prompt = build_enhanced_context(agent, conversation_phase, round_num)
                 # Add specific instruction for conciseness
-                concise_prompt = f"{prompt}\n\nIMPORTANT: Keep your response to 1-2 sentences maximum. Be direct and impactful."
+                concise_prompt = build_enhanced_context(
+                    session, agent, conversation_phase, round_num,
+                    "\n\nIMPORTANT: Keep your response to 1-2 sentences maximum. Be direct and impactful."
+                )
                 
-                reply = call_claude_with_personality(agent, concise_prompt, temperature)
+                on_delta = delta_sender(pacer, agent) if stream else None
+                calls += 1
+                reply = await call_claude_with_personality(agent, concise_prompt, temperature, on_delta=on_delta,
+                                                           use_cache=use_cache, phase=conversation_phase)
                 
                 # Add to conversation history
-                conversation_history.append({"role": "agent", "agent": agent, "content": reply})
+                session.append("agent", agent, reply)
+                score = detector.add(reply)
                 
                 # Send completed response
-                await websocket.send_json({
+                await pacer.emit({
                     "role": "agent",
                     "agent": agent,
                     "content": reply,
@@ -121,128 +295,477 @@ async def conduct_concise_discussion(websocket: WebSocket, temperature: float, m
                 if check_for_user_input_request(reply):
                     print(f"🎯 {agent} naturally requested user input")
                     round_requested_user_input = True
+                    ended_by = "user_input"
                     break
                 
+                # The agents are repeating each other: one closing turn, then hand back
+                if (detector.converged and not wrapping_up and conversation_phase != "final_round"
+                        and calls >= MIN_ROUNDS * len(AGENTS)):
+                    print(f"🧲 Discussion converged in round {round_num} (repetition {score:.2f}), wrapping up")
+                    wrapping_up = True
+                    ended_by = "converged"
+                
             except Exception as e:
+                if strict_replies.get():
+                    raise
                 # Fallback response
                 print(f"❌ Error generating response for {agent}: {e}")
                 reply = f"Technical difficulties aside, let's continue this discussion."
-                conversation_history.append({"role": "agent", "agent": agent, "content": reply})
-                await websocket.send_json({
+                session.append("agent", agent, reply)
+                await pacer.emit({
                     "role": "agent",
                     "agent": agent,
                     "content": reply,
                     "status": "done"
                 })
             
+            if wrapping_up and conversation_phase == "final_round":
+                closed = True  # the closing turn has been given
+                break
+            
             # Shorter delay for concise conversation flow
-            await asyncio.sleep(0.6)
+            pacer.pause(0.6)
         
-        # If an agent requested user input or we've reached max rounds, stop
-        if round_requested_user_input or round_num == max_rounds:
+        # If an agent requested user input, the discussion converged or we've reached max rounds, stop
+        if round_requested_user_input or closed or round_num == max_rounds:
             print(f"⏸️ Concise discussion concluded after {round_num} rounds")
             break
         
         # Brief pause between rounds
-        await asyncio.sleep(0.3)
+        pacer.pause(0.3)
+    
+    record_discussion(planned_calls, calls, ended_by)
+    metrics.discussion_calls_saved.observe(planned_calls - calls, ended_by or "none")
+    if calls < planned_calls:
+        print(f"💰 Saved {planned_calls - calls} of {planned_calls} LLM calls ({ended_by})")
+
+async def conduct_initial_round(pacer: Pacer, session: Session, temperature: float, stream: bool = False,
+                                parallel: bool = False, use_cache: bool = True):
+    """
+    Each agent responds once to the user's message. With parallel=True all
+    agents answer at the same time from the same history snapshot.
+    """
+    if parallel:
+        fallback_reply = "Technical issues aside, let me share my perspective on this."
+        await run_parallel_initial_round(
+            session, temperature, pacer.emit,
+            extra_instruction=INITIAL_CONCISE_INSTRUCTION,
+            stream=stream,
+            fallback_reply=None if strict_replies.get() else fallback_reply,
+            use_cache=use_cache
+        )
+        return
+    
+    # Randomize agent order for initial responses
+    agents_order = AGENTS.copy()
+    random.shuffle(agents_order)
+    
+    # Process each agent's initial response
+    for agent in agents_order:
+        # Generate at most one turn ahead of what the client has seen
+        await pacer.wait_ahead()
+        
+        # Send typing indicator
+        await pacer.emit({
+            "role": "agent",
+            "agent": agent,
+            "content": None,
+            "status": "typing"
+        })
+        
+        # Generate initial response
+        try:
+            from .orchestrator import build_context
+            # Add conciseness instruction
+            concise_prompt = build_context(session, agent, "initial_response", INITIAL_CONCISE_INSTRUCTION)
+            
+            on_delta = delta_sender(pacer, agent) if stream else None
+            reply = await call_claude_with_personality(agent, concise_prompt, temperature, on_delta=on_delta,
+                                                       use_cache=use_cache)
+            
+            # Add to conversation history
+            session.append("agent", agent, reply)
+            
+            # Send completed response
+            await pacer.emit({
+                "role": "agent",
+                "agent": agent,
+                "content": reply,
+                "status": "done"
+            })
+            
+        except Exception as e:
+            if strict_replies.get():
+                raise
+            # Fallback response if Claude API fails
+            reply = f"Technical issues aside, let me share my perspective on this."
+            session.append("agent", agent, reply)
+            await pacer.emit({
+                "role": "agent",
+                "agent": agent,
+                "content": reply,
+                "status": "done"
+            })
+        
+        # Wait before next agent
+        pacer.pause(1.0)
+
+async def run_discussion(emit, session: Session, user_msg: str, temperature: float, autonomous_rounds: int,
+                         stream: bool, parallel_initial: bool, use_cache: bool, pacing: str):
+    """
+    One full /ws-chat exchange: initial round, autonomous discussion, then a
+    hand-back to the user. Runs as a detached task publishing through `emit`.
+    """
+    print(f"📝 User message received, will conduct {autonomous_rounds} autonomous rounds")
+    
+    # Add user message to conversation history
+    session.append("user", "user", user_msg)
+    
+    # Generation runs ahead while the pacer releases events to the client
+    pacer = Pacer(emit, pacing)
+    try:
+        # Send user message back immediately
+        await pacer.emit({
+            "role": "user",
+            "agent": "user", 
+            "content": user_msg,
+            "session_id": session.session_id
+        })
+        
+        # === INITIAL ROUND: Each agent responds once ===
+        print("🚀 Starting concise initial responses...")
+        
+        await conduct_initial_round(pacer, session, temperature, stream=stream, parallel=parallel_initial,
+                                    use_cache=use_cache)
+        
+        # === CONCISE AUTONOMOUS DISCUSSION ===
+        print(f"🤖 Starting {autonomous_rounds} rounds of concise autonomous discussion...")
+        pacer.pause(0.8)  # Brief pause before autonomous discussion
+        
+        # Conduct concise multi-turn discussion with user-specified rounds
+        await conduct_concise_discussion(pacer, session, temperature, max_rounds=autonomous_rounds, stream=stream,
+                                         use_cache=use_cache)
+        
+        # === PAUSE FOR USER INPUT ===
+        print("⏸️ Concise discussion complete, awaiting user input...")
+        await session_state.flush()  # the user's reply may be served by another worker
+        
+        # Send awaiting user status
+        await pacer.emit({
+            "status": "awaiting_user",
+            "message": "Your turn! What's your take on this?"
+        })
+        await pacer.flush()
+    finally:
+        pacer.close()
+
+async def send_encoded(websocket: WebSocket, protocol: str, frames: list, event_count: int):
+    for is_binary, frame in frames:
+        if is_binary:
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+        metrics.ws_frames.inc(protocol)
+        metrics.ws_bytes.inc(protocol, amount=len(frame))
+    metrics.ws_events.inc(protocol, amount=event_count)
+
+async def send_frames(websocket: WebSocket, protocol: str, events: list):
+    await send_encoded(websocket, protocol, wire.encode_frames(protocol, events), len(events))
+
+def forward_events(websocket: WebSocket, events: EventLog, last_seq: int,
+                   protocol: str = wire.JSON_PROTOCOL) -> asyncio.Task:
+    """
+    Send every event after `last_seq` to the client, then keep tailing the
+    log. Compact protocols coalesce events published close together.
+    """
+    async def forward():
+        try:
+            # Encoding and sending count towards the "send" phase of a traced discussion
+            if protocol == wire.JSON_PROTOCOL:
+                async for event in events.follow(last_seq):
+                    with span(events.trace, "send"):
+                        await send_frames(websocket, protocol, [event])
+            else:
+                async for batch in events.follow_batches(last_seq, wire.COALESCE_MS / 1000):
+                    with span(events.trace, "send"):
+                        await send_frames(websocket, protocol, batch)
+        except Exception as e:
+            # The client went away; the receive loop sees the disconnect and cleans up
+            print(f"👋 Stopped forwarding events: {type(e).__name__}")
+    return asyncio.create_task(forward())
 
 @app.websocket("/ws-chat")
 async def websocket_chat(websocket: WebSocket):
-    await websocket.accept()
+    # Clients opt into a compact wire protocol via subprotocol or ?protocol=; plain JSON otherwise
+    protocol, subprotocol = wire.negotiate(websocket.scope.get("subprotocols", []),
+                                           websocket.query_params.get("protocol"))
+    await websocket.accept(subprotocol=subprotocol)
+    metrics.active_websockets.inc()
+    if protocol != wire.JSON_PROTOCOL:
+        await websocket.send_text(wire.encode_json(wire.hello_frame()))
+    # Each connection gets its own session unless the client names one to rejoin
+    client = client_key(websocket.headers, websocket.client)
+    session_id = websocket.query_params.get("session_id") or new_session_id()
+    connection_pacing = websocket.query_params.get("pacing", DEFAULT_PACING)
+    connection_tier = websocket.query_params.get("tier")
+    trusted = is_admin(websocket.headers.get("authorization"))  # may pick any tier
+    session = await sessions.get(session_id)
+    # A reattaching client passes the last seq it saw and gets the missed events replayed first
+    last_seq = parse_seq(websocket.query_params.get("last_seq"))
+    followed = session.events  # the log this connection forwards
+    closed_cleanly = False
+    forwarder = forward_events(websocket, followed, last_seq if last_seq is not None else followed.last_seq, protocol)
     try:
         while True:
             # Receive the user's message with optional autonomous_rounds parameter
             data = await websocket.receive_json()
+            session_id = data.get("session_id", session_id)
+            session = await sessions.get(session_id)
+            if session.events is not followed:
+                # Switched sessions, or this one was evicted and rebuilt: follow its current log from now on
+                forwarder.cancel()
+                followed = session.events
+                forwarder = forward_events(websocket, followed, followed.last_seq, protocol)
             user_msg = data["message"]
             temperature = data.get("temperature", 0.7)
             autonomous_rounds = data.get("autonomous_rounds", 4)  # Default to 4 rounds
+            stream = data.get("stream", False)  # Opt-in token-level "delta" events
+            parallel_initial = data.get("parallel_initial", False)  # Opt-in concurrent initial round
+            use_cache = data.get("cache", True)  # False bypasses the response cache
+            pacing = data.get("pacing", connection_pacing)  # "none" skips presentation delays
+            if pacing not in PACING_MODES:
+                pacing = DEFAULT_PACING
+            tier = router.tier(data.get("tier", connection_tier), trusted)  # routing tier, see HIVE_ROUTES
             
             # Validate autonomous_rounds range
             autonomous_rounds = max(2, min(8, autonomous_rounds))
             
-            print(f"📝 User message received, will conduct {autonomous_rounds} autonomous rounds")
-            
-            # Add user message to conversation history
-            conversation_history.append({"role": "user", "agent": "user", "content": user_msg})
-            
-            # Send user message back immediately
-            await websocket.send_json({
-                "role": "user",
-                "agent": "user", 
-                "content": user_msg
-            })
-            
-            # === INITIAL ROUND: Each agent responds once ===
-            print("🚀 Starting concise initial responses...")
-            
-            # Randomize agent order for initial responses
-            agents_order = AGENTS.copy()
-            random.shuffle(agents_order)
-            
-            # Process each agent's initial response
-            for agent in agents_order:
-                # Send typing indicator
-                await websocket.send_json({
-                    "role": "agent",
-                    "agent": agent,
-                    "content": None,
-                    "status": "typing"
-                })
-                
-                # Generate initial response
-                try:
-                    from .orchestrator import build_context
-                    prompt = build_context(agent, "initial_response")
-                    # Add conciseness instruction
-                    concise_prompt = f"{prompt}\n\nIMPORTANT: Keep your response to 1-2 sentences maximum. Be direct and focused."
-                    
-                    reply = call_claude_with_personality(agent, concise_prompt, temperature)
-                    
-                    # Add to conversation history
-                    conversation_history.append({"role": "agent", "agent": agent, "content": reply})
-                    
-                    # Send completed response
-                    await websocket.send_json({
-                        "role": "agent",
-                        "agent": agent,
-                        "content": reply,
-                        "status": "done"
-                    })
-                    
-                except Exception as e:
-                    # Fallback response if Claude API fails
-                    reply = f"Technical issues aside, let me share my perspective on this."
-                    conversation_history.append({"role": "agent", "agent": agent, "content": reply})
-                    await websocket.send_json({
-                        "role": "agent",
-                        "agent": agent,
-                        "content": reply,
-                        "status": "done"
-                    })
-                
-                # Wait before next agent
-                await asyncio.sleep(1.0)
-            
-            # === CONCISE AUTONOMOUS DISCUSSION ===
-            print(f"🤖 Starting {autonomous_rounds} rounds of concise autonomous discussion...")
-            await asyncio.sleep(0.8)  # Brief pause before autonomous discussion
-            
-            # Conduct concise multi-turn discussion with user-specified rounds
-            await conduct_concise_discussion(websocket, temperature, max_rounds=autonomous_rounds)
-            
-            # === PAUSE FOR USER INPUT ===
-            print("⏸️ Concise discussion complete, awaiting user input...")
-            
-            # Send awaiting user status
-            await websocket.send_json({
-                "status": "awaiting_user",
-                "message": "Your turn! What's your take on this?"
-            })
+            # The discussion runs detached from this connection, so this loop keeps
+            # receiving: a message sent mid-discussion cancels the rest of it
+            # (in-flight LLM call included) and starts right away
+            await session.events.interrupt()
+            try:
+                await admission.admit(client)
+            except Overloaded as e:
+                # 1013 Try Again Later; the reason carries the retry-after hint
+                await websocket.close(code=1013, reason=str(e))
+                break
+            start_admitted(session.events, partial(
+                run_discussion, session=session, user_msg=user_msg, temperature=temperature,
+                autonomous_rounds=autonomous_rounds, stream=stream, parallel_initial=parallel_initial,
+                use_cache=use_cache, pacing=pacing
+            ), client, tier, session_id)
                 
-    except WebSocketDisconnect:
+    except WebSocketDisconnect as e:
         print("👋 WebSocket client disconnected")
-        pass
+        closed_cleanly = e.code in (1000, 1001)
+    finally:
+        metrics.active_websockets.dec()
+        forwarder.cancel()
+        if closed_cleanly:
+            # The client left on purpose rather than dropping: don't pay for a discussion nobody will see
+            await asyncio.wait({forwarder})
+            followed.abandon()
+
+class RoomMessage(BaseModel):
+    message: str
+    temperature: float = 0.7
+    autonomous_rounds: int = 4
+    stream: bool = False  # forward token-level "delta" events
+    parallel_initial: bool = False  # all agents answer the initial round at once
+    cache: bool = True  # set False to bypass the response cache
+    pacing: str = DEFAULT_PACING  # "natural" or "none" to skip presentation delays
+    tier: Optional[str] = None  # routing tier (see HIVE_ROUTES); unknown or unpermitted tiers get the default
+
+@app.post("/rooms/{room_id}/messages", status_code=202)
+async def post_room_message(room_id: str, req: RoomMessage, request: Request):
+    """
+    Start a discussion in a broadcast room: it is generated once and every
+    viewer of the room receives it. A room runs one discussion at a time.
+    """
+    room = await rooms.get(room_id)
+    if room.events.running:
+        return JSONResponse(status_code=409, content={"error": "A discussion is already running in this room"})
+    client = client_key(request.headers, request.client)
+    try:
+        await admission.admit(client)
+    except Overloaded as e:
+        rooms.discard_if_idle(room)
+        return busy_response(e)
+    if room.events.running:  # started by someone else while this request waited for a slot
+        admission.release(client)
+        return JSONResponse(status_code=409, content={"error": "A discussion is already running in this room"})
+    pacing = req.pacing if req.pacing in PACING_MODES else DEFAULT_PACING
+    task = start_admitted(room.events, partial(
+        run_discussion, session=room.session, user_msg=req.message, temperature=req.temperature,
+        autonomous_rounds=max(2, min(8, req.autonomous_rounds)), stream=req.stream,
+        parallel_initial=req.parallel_initial, use_cache=req.cache, pacing=pacing
+    ), client, router.tier(req.tier, is_admin(request.headers.get("authorization"))), room.session.session_id)
+    task.add_done_callback(lambda _: rooms.discard_if_idle(room))
+    return {**room.info(), "running": True}
+
+@app.get("/rooms/{room_id}")
+async def get_room(room_id: str):
+    room = rooms.rooms.get(room_id)
+    if room is None:
+        return Response(status_code=404)
+    return room.info()
+
+@app.websocket("/rooms/{room_id}/ws")
+async def room_websocket(websocket: WebSocket, room_id: str):
+    """
+    Watch a broadcast room: the retained events as a snapshot (or those
+    after ?last_seq=), then the live tail. Same wire protocols as /ws-chat;
+    anything the viewer sends is ignored.
+    """
+    protocol, subprotocol = wire.negotiate(websocket.scope.get("subprotocols", []),
+                                           websocket.query_params.get("protocol"))
+    await websocket.accept(subprotocol=subprotocol)
+    metrics.active_websockets.inc()
+    if protocol != wire.JSON_PROTOCOL:
+        await websocket.send_text(wire.encode_json(wire.hello_frame()))
+    room = await rooms.get(room_id)
+    viewer = room.join(protocol, parse_seq(websocket.query_params.get("last_seq")))
+    
+    async def send_batches():
+        try:
+            async for frames, event_count in viewer.batches():
+                with span(room.events.trace, "send"):
+                    await send_encoded(websocket, protocol, frames, event_count)
+            if viewer.lagged:
+                await websocket.close(code=1013, reason="Fell behind the room, rejoin with last_seq")
+        except Exception as e:
+            print(f"👋 Stopped sending to a room viewer: {type(e).__name__}")
+    
+    sender = asyncio.create_task(send_batches())
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        rooms.leave(room, viewer)
+        metrics.active_websockets.dec()
+
+@app.get("/rooms/{room_id}/events")
+async def room_events(room_id: str, last_event_id: Optional[str] = Header(None), after: Optional[int] = None):
+    """SSE view of a broadcast room: snapshot (or replay after Last-Event-ID), then the live tail"""
+    room = await rooms.get(room_id)
+    last_seq = parse_seq(last_event_id)
+    viewer = room.join(wire.SSE_PROTOCOL, last_seq if last_seq is not None else after)
+    
+    async def generate_stream():
+        try:
+            async for frames, _ in viewer.batches():
+                for _, payload in frames:
+                    yield payload
+        finally:
+            rooms.leave(room, viewer)
+    
+    return StreamingResponse(generate_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "Connection": "keep-alive"})
+
+HISTORY_PAGE_LIMIT = 200
 
 @app.get("/history")
-def get_history():
-    return {"history": conversation_history}
+async def get_history(response: Response, session_id: Optional[str] = None, limit: int = HISTORY_PAGE_LIMIT,
+                after: Optional[int] = None, before: Optional[int] = None,
+                if_none_match: Optional[str] = Header(None)):
+    """
+    Page through a session's messages by id. `after` returns the oldest
+    messages newer than that id (use `cursor` from the previous response to
+    poll for deltas); otherwise the newest messages before `before` are
+    returned. The ETag changes only when the session gains messages.
+    """
+    session_id = session_id or DEFAULT_SESSION_ID
+    session = await sessions.peek(session_id)
+    etag = f'"{session.total if session else 0}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    limit = max(1, min(HISTORY_PAGE_LIMIT, limit))
+    messages, has_more = await session.page(after, before, limit) if session else ([], False)
+    if messages:
+        cursor = messages[-1]["id"]
+    else:
+        cursor = after if after is not None else (session.total - 1 if session else -1)
+    return {"session_id": session_id, "history": messages, "cursor": cursor, "has_more": has_more}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of LLM call, event-loop and session metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+def get_stats():
+    return {
+        "active_sessions": len(sessions),
+        "first_token_ms": first_token_summary(),
+        "prompt_cache": prompt_cache_summary(),
+        "response_cache": response_cache.stats(),
+        "llm_transport": transport.stats(),
+        "discussions": discussion_summary(),
+        "admission": admission.stats(),
+        "llm_routes": router.stats(),
+        "convergence": convergence_summary(),
+        "rooms": rooms.summary(),
+        "session_state": session_state.stats()
+    }
+
+def is_admin(authorization: Optional[str]) -> bool:
+    """Whether an Authorization header carries the admin token (never, without HIVE_ADMIN_TOKEN)"""
+    if not profiling.ADMIN_TOKEN:
+        return False
+    scheme, _, token = (authorization or "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), profiling.ADMIN_TOKEN.encode())
+
+def admin_denied(authorization: Optional[str]) -> Optional[Response]:
+    """Response refusing an /admin request, or None if it carries the admin token"""
+    if not profiling.ADMIN_TOKEN:
+        return Response(status_code=404)  # admin endpoints are off without HIVE_ADMIN_TOKEN
+    if not is_admin(authorization):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return None
+
+@app.post("/admin/profile")
+async def admin_profile(mode: str = "sample", seconds: float = 10, output: str = "pstats",
+                        authorization: Optional[str] = Header(None)):
+    """
+    Profile the running server for `seconds`, then return the artifact:
+    collapsed stacks for mode=sample, a pstats file for mode=cprofile
+    (output=text for a readable top-60)
+    """
+    denied = admin_denied(authorization)
+    if denied is not None:
+        return denied
+    if mode not in profiling.PROFILE_MODES:
+        return JSONResponse(status_code=400, content={"error": f"mode must be one of {profiling.PROFILE_MODES}"})
+    try:
+        body, media_type, filename = await profiling.run_profile(mode, seconds, output)
+    except profiling.ProfileBusy as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    return Response(body, media_type=media_type,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.post("/admin/trace")
+def admin_trace(seconds: float = 60, authorization: Optional[str] = Header(None)):
+    """Trace the phases of every discussion that starts in the next `seconds` (0 stops)"""
+    denied = admin_denied(authorization)
+    if denied is not None:
+        return denied
+    return {"tracing_seconds": profiling.trace_for(seconds)}
+
+@app.get("/admin/traces")
+def admin_traces(limit: int = 20, format: str = "json", spans: bool = True,
+                 authorization: Optional[str] = Header(None)):
+    """The newest discussion traces, as JSON or (format=chrome) Chrome trace events"""
+    denied = admin_denied(authorization)
+    if denied is not None:
+        return denied
+    traces = list(profiling.recent_traces)[-max(1, limit):]
+    if format == "chrome":
+        return profiling.chrome_trace(traces)
+    return {
+        "tracing_seconds_left": round(profiling.tracing_seconds_left(), 1),
+        "traces": [trace.to_dict(spans) for trace in traces]
+    }
@@ -0,0 +1,197 @@
+import time
+import asyncio
+
+# Bucket upper bounds, in seconds and in tokens
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BUDGET_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+CALLS_BUCKETS = (0, 1, 2, 3, 6, 9, 12, 18, 24)
+
+# How often the event-loop lag probe wakes up, in seconds
+LOOP_LAG_INTERVAL = 0.5
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Base for labelled metrics; children are keyed by their label values in order"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._children[labelvalues] = self._children.get(labelvalues, 0) + amount
+
+    def _render_child(self, values: tuple, total) -> list:
+        return [f"{self.name}_total{format_labels(self.labelnames, values)} {format_value(total)}"]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function  # read at scrape time for unlabelled gauges
+        if function is not None:
+            self._children[()] = 0
+
+    def set(self, value: float, *labelvalues):
+        self._children[labelvalues] = value
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._children[labelvalues] = self._children.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def _render_child(self, values: tuple, value) -> list:
+        if self._function is not None:
+            value = self._function()
+        return [f"{self.name}{format_labels(self.labelnames, values)} {format_value(value)}"]
+
+INF_BUCKET = 'le="+Inf"'
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues):
+        child = self._children.get(labelvalues)
+        if child is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            child = self._children[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                child[0][i] += 1
+                break
+        child[1] += value
+        child[2] += 1
+
+    def _render_child(self, values: tuple, child) -> list:
+        counts, total, count = child
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = format_labels(self.labelnames, values, f'le="{format_value(float(bound))}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        lines.append(f"{self.name}_bucket{format_labels(self.labelnames, values, INF_BUCKET)} {count}")
+        lines.append(f"{self.name}_sum{format_labels(self.labelnames, values)} {format_value(total)}")
+        lines.append(f"{self.name}_count{format_labels(self.labelnames, values)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every registered metric in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# One route of the routing table (app/routing.py) plus the model it sends to
+LLM_LABELS = ("tier", "agent", "phase", "model")
+
+llm_requests = registry.register(Counter(
+    "hive_llm_requests", "LLM calls by outcome (ok, error, cached or cancelled)", LLM_LABELS + ("outcome",)))
+llm_queue_wait = registry.register(Histogram(
+    "hive_llm_queue_wait_seconds", "Time an LLM call waited for a free connection slot", LLM_LABELS))
+llm_latency = registry.register(Histogram(
+    "hive_llm_request_duration_seconds", "LLM call time excluding queue wait, including retries", LLM_LABELS))
+llm_input_tokens = registry.register(Histogram(
+    "hive_llm_input_tokens", "Input tokens per LLM call, cached prompt tokens included", LLM_LABELS, TOKEN_BUCKETS))
+llm_output_tokens = registry.register(Histogram(
+    "hive_llm_output_tokens", "Output tokens per LLM call", LLM_LABELS, TOKEN_BUCKETS))
+llm_output_budget = registry.register(Histogram(
+    "hive_llm_output_budget_used", "Output tokens per LLM call as a share of its max_tokens", LLM_LABELS,
+    BUDGET_BUCKETS))
+llm_stop_reasons = registry.register(Counter(
+    "hive_llm_stop_reasons", "Why LLM replies ended (end_turn, max_tokens, stop_sequence, stopped)",
+    LLM_LABELS + ("reason",)))
+llm_cost = registry.register(Counter(
+    "hive_llm_cost_dollars", "Estimated LLM spend in USD from token usage and model prices", LLM_LABELS))
+llm_retries = registry.register(Counter(
+    "hive_llm_retries", "LLM call attempts retried after a transient failure"))
+llm_failures = registry.register(Counter(
+    "hive_llm_failures", "LLM calls that failed after their last attempt"))
+event_loop_lag = registry.register(Histogram(
+    "hive_event_loop_lag_seconds", "How late the event loop woke a periodic probe", buckets=LOOP_LAG_BUCKETS))
+active_websockets = registry.register(Gauge(
+    "hive_active_websocket_sessions", "Open /ws-chat connections"))
+admission_rejections = registry.register(Counter(
+    "hive_admission_rejections", "Discussions turned away by admission control", ("reason",)))
+discussion_calls_saved = registry.register(Histogram(
+    "hive_discussion_calls_saved", "Autonomous-round LLM calls not made per discussion, by what ended it early",
+    ("reason",), CALLS_BUCKETS))
+room_encodes = registry.register(Counter(
+    "hive_room_encodes", "Events encoded for broadcast room viewers, once per event and protocol", ("protocol",)))
+room_deliveries = registry.register(Counter(
+    "hive_room_deliveries", "Live events handed to broadcast room viewers, one per viewer", ("protocol",)))
+ws_frames = registry.register(Counter(
+    "hive_ws_frames", "Frames sent on /ws-chat by wire protocol", ("protocol",)))
+ws_events = registry.register(Counter(
+    "hive_ws_events", "Events sent on /ws-chat by wire protocol", ("protocol",)))
+ws_bytes = registry.register(Counter(
+    "hive_ws_bytes", "Payload bytes sent on /ws-chat by wire protocol, before compression", ("protocol",)))
+
+def record_llm_call(labels: tuple, elapsed: float, completion=None, cost: float = 0.0, max_tokens: int = None):
+    """
+    Record one finished (or failed) LLM call labelled with LLM_LABELS values;
+    `elapsed` is wall-clock time including queue wait
+    """
+    if completion is None:
+        llm_requests.inc(*labels, "error")
+        llm_latency.observe(elapsed, *labels)
+        return
+    llm_requests.inc(*labels, "ok")
+    llm_queue_wait.observe(completion.queue_wait, *labels)
+    llm_latency.observe(max(0.0, elapsed - completion.queue_wait), *labels)
+    llm_input_tokens.observe(completion.input_tokens + completion.cache_read_input_tokens
+                             + completion.cache_creation_input_tokens, *labels)
+    llm_output_tokens.observe(completion.output_tokens, *labels)
+    if max_tokens:
+        llm_output_budget.observe(completion.output_tokens / max_tokens, *labels)
+    llm_stop_reasons.inc(*labels, completion.stop_reason or "unknown")
+    llm_cost.inc(*labels, amount=cost)
+
+async def monitor_event_loop(interval: float = LOOP_LAG_INTERVAL):
+    """Sleep for `interval` forever and record how much later than asked each wake-up came"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(0.0, time.perf_counter() - started - interval))
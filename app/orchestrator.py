@@ -1,71 +1,212 @@
 import os
+import time
 import random
+import asyncio
 from dotenv import load_dotenv
 
 # Load .env file
 load_dotenv()
 
-from anthropic import Anthropic
-from .prompts import ROLE_PROMPTS, CONVERSATION_PROMPTS
+from .prompts import AGENTS, ROLE_PROMPTS, CONVERSATION_PROMPTS, SYSTEM_MESSAGES, SUMMARY_PROMPT
+from .sessions import SessionStore, Session, DEFAULT_SESSION_ID
+from .state import create_state_backend
+from .cache import ResponseCache
+from .backends import create_backend
+from .pacing import Pacer, DEFAULT_PACING
+from .transport import Transport, phase_timeout
+from .admission import Admission
+from .routing import create_router
+from .length import SentenceLimit, trim_sentences
+from .profiling import current_trace, phase as profile_phase
+from . import metrics
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# Pooled async client so API calls reuse warm connections and never block the event loop
+transport = Transport(api_key=os.getenv("ANTHROPIC_API_KEY"))
+client = transport.client
 
-# In-memory state (one global for now)
-conversation_history = []  # List of dicts: {"role": "user/agent", "agent": "catalyst", "content": "..."}
-AGENTS = ["catalyst", "anchor", "weaver"]
+# Where LLM calls actually go (HIVE_LLM_BACKEND=fake for offline runs)
+backend = create_backend(transport)
 
-def build_context(agent_name: str, conversation_phase: str = "initial_response") -> str:
+# Durable session state shared by every worker, written behind the response path
+# (HIVE_STATE_BACKEND: memory by default, sqlite transcripts at HIVE_TRANSCRIPT_PATH, or redis)
+session_state = create_state_backend()
+
+# Per-session conversation state, bounded and evicted when idle, rehydrated from session_state
+sessions = SessionStore(state=session_state)
+
+# Concurrent-discussion and per-minute LLM call limits, global and per client
+admission = Admission()
+
+# Replies for byte-identical requests, shared by every session
+response_cache = ResponseCache()
+
+# Model, max_tokens and timeout per (tier, phase, agent), with per-route latency and cost (HIVE_ROUTES)
+router = create_router()
+
+# History token budget per conversation phase (override via environment)
+CONTEXT_TOKEN_BUDGETS = {
+    "initial_response": int(os.getenv("HIVE_CONTEXT_TOKENS_INITIAL_RESPONSE", "1500")),
+    "autonomous_discussion": int(os.getenv("HIVE_CONTEXT_TOKENS_AUTONOMOUS_DISCUSSION", "1000")),
+    "final_round": int(os.getenv("HIVE_CONTEXT_TOKENS_FINAL_ROUND", "1200"))
+}
+
+# Summarize once this many messages have left the context window (0 disables summaries)
+SUMMARY_BATCH = int(os.getenv("HIVE_SUMMARY_BATCH", "8"))
+
+# Keep references to fire-and-forget tasks so they aren't garbage collected mid-run
+background_tasks = set()
+
+# Time-to-first-token per agent for streamed replies
+first_token_stats = {agent: {"count": 0, "total_ms": 0.0, "last_ms": None} for agent in AGENTS}
+
+# The history breakpoint moves in steps of this many messages, so the cached
+# prompt prefix stays identical for several turns in a row
+CACHE_CHUNK = 8
+CACHE_BREAKPOINT = {"type": "ephemeral"}
+
+# Prompt-cache usage across all requests (token counts)
+prompt_cache_stats = {"requests": 0, "input_tokens": 0, "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+
+# System message and role prompt never change for an agent, so build them once
+SYSTEM_BLOCKS = {
+    agent: [
+        {"type": "text", "text": SYSTEM_MESSAGES[agent]},
+        {"type": "text", "text": ROLE_PROMPTS[agent], "cache_control": CACHE_BREAKPOINT}
+    ]
+    for agent in AGENTS
+}
+
+def structured_prompt(session: Session, agent_name: str, token_budget: int, header: str, instruction: str) -> dict:
+    """
+    Lay a prompt out as a stable prefix followed by the part that changes every turn:
+    - System message and role prompt (cache breakpoint)
+    - Rolling summary and older conversation history (cache breakpoint)
+    - Newest turns and the phase instruction
     """
-    Build a context string for Claude that includes:
-    - This agent's role prompt
+    # Agents answering the same turn share the history part of their prompts
+    key = (session.total, token_budget, session.summary, header, instruction)
+    cached = session.renderer.content(key)
+    if cached is None:
+        start, split = session.window(token_budget, CACHE_CHUNK)
+        cached = (start, history_content(session, start, split, header, instruction))
+        session.renderer.keep_content(key, cached)
+    start, content = cached
+    
+    # Turns that fell out of the window live on in the rolling summary
+    schedule_summary(session, start)
+    return {"system": SYSTEM_BLOCKS[agent_name], "messages": [{"role": "user", "content": content}]}
+
+def traced_prompt(session: Session, agent_name: str, token_budget: int, header: str, instruction: str) -> dict:
+    """structured_prompt, timed as the context_build phase when the discussion is being traced"""
+    trace = current_trace.get()
+    if trace is None:
+        return structured_prompt(session, agent_name, token_budget, header, instruction)
+    with trace.span("context_build"):
+        return structured_prompt(session, agent_name, token_budget, header, instruction)
+
+def history_content(session: Session, start: int, split: int, header: str, instruction: str) -> list:
+    """Message content blocks for the history window [start, total) plus the instruction"""
+    # History comes pre-rendered WITHOUT agent names to prevent mimicking
+    older_text = session.history_text(start, split)
+    newer_text = session.history_text(split, session.total)
+    if session.summary:
+        header = f"Summary of earlier discussion:\n{session.summary}\n\n{header}"
+        older_text = older_text or "(no older messages)\n"
+    
+    if older_text:
+        content = [
+            {"type": "text", "text": f"{header}\n{older_text}", "cache_control": CACHE_BREAKPOINT},
+            {"type": "text", "text": f"{newer_text}\n{instruction}"}
+        ]
+    elif newer_text:
+        content = [{"type": "text", "text": f"{header}\n{newer_text}\n{instruction}"}]
+    else:
+        content = [{"type": "text", "text": instruction}]
+    return content
+
+def build_context(session: Session, agent_name: str, conversation_phase: str = "initial_response",
+                  extra_instruction: str = "") -> dict:
+    """
+    Build a structured prompt for Claude that includes:
+    - This agent's system message and role prompt
     - Relevant conversation history
     - Phase-specific instructions
     """
-    role_instruction = ROLE_PROMPTS[agent_name]
     phase_instruction = CONVERSATION_PROMPTS.get(conversation_phase, CONVERSATION_PROMPTS["initial_response"])
     
-    # Build conversation history WITHOUT agent names to prevent mimicking
-    history_text = ""
-    recent_messages = conversation_history[-20:]  # Limit context to recent messages
-    for msg in recent_messages:
-        if msg['role'] == "user":
-            history_text += f"User: {msg['content']}\n"
-        else:
-            # Don't include agent names in history to prevent self-labeling
-            history_text += f"Previous response: {msg['content']}\n"
-    
-    if history_text:
-        return f"{role_instruction}\n\nConversation so far:\n{history_text}\n{phase_instruction}"
-    else:
-        return f"{role_instruction}\n\n{phase_instruction}"
+    # Limit context to the phase's token budget
+    token_budget = CONTEXT_TOKEN_BUDGETS.get(conversation_phase, CONTEXT_TOKEN_BUDGETS["initial_response"])
+    return traced_prompt(session, agent_name, token_budget, "Conversation so far:",
+                         f"{phase_instruction}{extra_instruction}")
 
-def build_enhanced_context(agent_name: str, conversation_phase: str = "autonomous_discussion", round_number: int = 1) -> str:
+def build_enhanced_context(session: Session, agent_name: str, conversation_phase: str = "autonomous_discussion", round_number: int = 1,
+                           extra_instruction: str = "") -> dict:
     """
     Enhanced context building for multi-turn autonomous discussions
     """
-    role_instruction = ROLE_PROMPTS[agent_name]
-    
-    # Get recent conversation for context WITHOUT agent names
-    recent_messages = conversation_history[-15:]  # Focus on recent discussion
-    history_text = ""
-    for msg in recent_messages:
-        if msg['role'] == "user":
-            history_text += f"User: {msg['content']}\n"
-        else:
-            # Don't include agent names in history to prevent self-labeling
-            history_text += f"Previous response: {msg['content']}\n"
-    
     # Phase-specific instructions
     if conversation_phase == "final_round":
         phase_instruction = CONVERSATION_PROMPTS["final_round"]
+        token_budget = CONTEXT_TOKEN_BUDGETS["final_round"]
     else:
         phase_instruction = f"{CONVERSATION_PROMPTS['autonomous_discussion']} (Discussion round {round_number})"
+        token_budget = CONTEXT_TOKEN_BUDGETS["autonomous_discussion"]
     
-    return f"{role_instruction}\n\nRecent conversation:\n{history_text}\n{phase_instruction}"
+    # Focus on recent discussion
+    return traced_prompt(session, agent_name, token_budget, "Recent conversation:",
+                         f"{phase_instruction}{extra_instruction}")
 
-def call_claude_with_personality(agent_name: str, prompt: str, temperature: float):
+def schedule_summary(session: Session, window_start: int):
     """
-    Call Claude with agent-specific parameters to ensure distinct personalities
+    Fold messages that have left the context window into the session's rolling
+    summary, in a background task so it never delays the current reply
+    """
+    if SUMMARY_BATCH <= 0 or session.summarizing or window_start - session.summary_upto < SUMMARY_BATCH:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # no event loop (e.g. offline prompt building); try again next turn
+    session.summarizing = True
+    task = loop.create_task(update_summary(session, window_start))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def update_summary(session: Session, upto: int):
+    try:
+        new_text = session.history_text(session.summary_upto, upto)
+        route = router.resolve("summarizer", "summary")
+        request = {
+            "model": route.model,
+            "max_tokens": route.max_tokens,
+            "temperature": 0.2,
+            "timeout": phase_timeout("summary", route.timeout),
+            "system": SUMMARY_PROMPT,
+            "messages": [{
+                "role": "user",
+                "content": f"Current summary:\n{session.summary or '(none yet)'}\n\nNew messages to fold in:\n{new_text}"
+            }]
+        }
+        completion = await timed_call(request, route)
+        session.set_summary(completion.text.strip(), upto)
+        print(f"📝 Summarized history up to message {upto} for session {session.session_id}")
+    except Exception as e:
+        # The window still works without a summary; retry on a later turn
+        print(f"❌ Error summarizing session {session.session_id}: {e}")
+    finally:
+        session.summarizing = False
+
+async def call_claude_with_personality(agent_name: str, prompt, temperature: float, on_delta=None,
+                                       use_cache: bool = True, phase: str = "initial_response"):
+    """
+    Call Claude with agent-specific parameters to ensure distinct personalities.
+    `prompt` is either a structured prompt from build_context/build_enhanced_context
+    or a plain string. When on_delta is given the reply is streamed and each text
+    delta is awaited through it as soon as it arrives. Identical requests are
+    answered from the response cache unless use_cache is False. `phase`
+    and the current tier pick the route: model, timeout and length policy.
+    A streamed reply is stopped once it reaches the route's max_sentences;
+    a non-streamed one is trimmed to it.
     """
     # Different temperature settings for each agent to create variety
     agent_temperatures = {
@@ -74,74 +215,271 @@ def call_claude_with_personality(agent_name: str, prompt: str, temperature: floa
         "weaver": temperature                      # Balanced for synthesis
     }
     
-    # Different max tokens for varied response lengths
-    agent_max_tokens = {
-        "catalyst": 300,  # Shorter, punchier responses
-        "anchor": 350,    # Longer for detailed analysis
-        "weaver": 320     # Balanced for integration
-    }
+    # Model and length policy per agent and phase (varied response lengths by default)
+    route = router.resolve(agent_name, phase)
+    
+    if isinstance(prompt, str):
+        prompt = {"system": SYSTEM_MESSAGES[agent_name], "messages": [{"role": "user", "content": prompt}]}
     
-    # Natural system messages that don't encourage self-labeling
-    system_messages = {
-        "catalyst": "You are bold and visionary. Always think big and push for transformative action. Be direct and inspiring.",
-        "anchor": "You are practical and grounded. Always focus on feasibility and concrete execution. Be thorough and realistic.",
-        "weaver": "You are a strategic synthesizer. Always find connections between ideas and propose balanced integration. Be collaborative."
+    request = {
+        "model": route.model,
+        "max_tokens": route.max_tokens,
+        "temperature": agent_temperatures[agent_name],
+        "timeout": phase_timeout(phase, route.timeout),
+        "system": prompt["system"],
+        "messages": prompt["messages"]
     }
+    if route.stop_sequences:
+        request["stop_sequences"] = route.stop_sequences
     
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20240620",
-        max_tokens=agent_max_tokens[agent_name],
-        temperature=agent_temperatures[agent_name],
-        system=system_messages[agent_name],
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response.content[0].text.strip()
+    cache_key = None
+    if use_cache and response_cache.enabled:
+        cache_key = ResponseCache.key(agent_name, request["model"], request["system"], request["messages"],
+                                      request["temperature"], request["max_tokens"], route.stop_sequences,
+                                      route.max_sentences)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            metrics.llm_requests.inc(*route.labels, "cached")
+            if on_delta is not None:
+                await on_delta(cached)
+            return cached
+    
+    if on_delta is None:
+        completion = await timed_call(request, route)
+        reply = trim_sentences(completion.text.strip(), route.max_sentences)
+    else:
+        started = time.perf_counter()
+        first_token = True
+        limit = SentenceLimit(route.max_sentences) if route.max_sentences > 0 else None
+        
+        async def on_text(text: str):
+            nonlocal first_token
+            if first_token:
+                first_token = False
+                record_first_token(agent_name, (time.perf_counter() - started) * 1000)
+            if limit is None:
+                await on_delta(text)
+                return False
+            # Forward up to the end of the last allowed sentence, then stop the stream
+            text, done = limit.feed(text)
+            if text:
+                await on_delta(text)
+            return done
+        
+        completion = await timed_call(request, route, on_text)
+        reply = (limit.text if limit is not None else completion.text).strip()
+    
+    record_cache_usage(agent_name, completion)
+    if cache_key is not None:
+        await response_cache.put(cache_key, reply)
+    return reply
+
+async def timed_call(request: dict, route, on_text=None):
+    """
+    Send one request to the backend (streamed when on_text is given) and
+    record its metrics and cost against `route`
+    """
+    with profile_phase("throttle"):
+        await admission.throttle_call()
+    started = time.perf_counter()
+    try:
+        with profile_phase("api_wait", route.key):
+            if on_text is None:
+                completion = await backend.create(request)
+            else:
+                completion = await backend.stream(request, on_text)
+    except asyncio.CancelledError:
+        # The discussion was interrupted or abandoned mid-call
+        metrics.llm_requests.inc(*route.labels, "cancelled")
+        raise
+    except Exception:
+        metrics.record_llm_call(route.labels, time.perf_counter() - started)
+        raise
+    elapsed = time.perf_counter() - started
+    cost = router.record(route, max(0.0, elapsed - completion.queue_wait), completion)
+    metrics.record_llm_call(route.labels, elapsed, completion, cost, request["max_tokens"])
+    return completion
 
-def call_claude(prompt: str, temperature: float):
+def record_cache_usage(agent_name: str, completion):
+    uncached = completion.input_tokens
+    cache_read = completion.cache_read_input_tokens
+    cache_write = completion.cache_creation_input_tokens
+    prompt_cache_stats["requests"] += 1
+    prompt_cache_stats["input_tokens"] += uncached
+    prompt_cache_stats["cache_read_input_tokens"] += cache_read
+    prompt_cache_stats["cache_creation_input_tokens"] += cache_write
+    total = uncached + cache_read + cache_write
+    if total:
+        print(f"💾 {agent_name} prompt cache: {cache_read}/{total} input tokens served from cache")
+
+def prompt_cache_summary() -> dict:
+    """Prompt-cache token counters plus the share of input tokens read from cache"""
+    total = (prompt_cache_stats["input_tokens"] + prompt_cache_stats["cache_read_input_tokens"]
+             + prompt_cache_stats["cache_creation_input_tokens"])
+    return {
+        **prompt_cache_stats,
+        "cache_read_ratio": round(prompt_cache_stats["cache_read_input_tokens"] / total, 3) if total else None
+    }
+
+def record_first_token(agent_name: str, elapsed_ms: float):
+    stats = first_token_stats[agent_name]
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["last_ms"] = elapsed_ms
+    print(f"⚡ {agent_name} first token after {elapsed_ms:.0f}ms")
+
+def first_token_summary() -> dict:
+    """Average and latest time-to-first-token per agent, in milliseconds"""
+    return {
+        agent: {
+            "count": stats["count"],
+            "avg_ms": round(stats["total_ms"] / stats["count"], 1) if stats["count"] else None,
+            "last_ms": round(stats["last_ms"], 1) if stats["last_ms"] is not None else None
+        }
+        for agent, stats in first_token_stats.items()
+    }
+
+async def call_claude(prompt: str, temperature: float):
     # For backward compatibility, use default agent
-    return call_claude_with_personality("weaver", prompt, temperature)
+    return await call_claude_with_personality("weaver", prompt, temperature)
 
-def run_orchestration(user_message: str, temperature: float = 0.7):
-    conversation_history.append({"role": "user", "agent": "user", "content": user_message})
+async def run_orchestration(user_message: str, temperature: float = 0.7, session_id: str = DEFAULT_SESSION_ID,
+                            use_cache: bool = True):
+    session = await sessions.get(session_id)
+    session.append("user", "user", user_message)
     results = []
     for agent in AGENTS:
-        prompt = build_context(agent)
-        reply = call_claude_with_personality(agent, prompt, temperature)
-        conversation_history.append({"role": "agent", "agent": agent, "content": reply})
+        prompt = build_context(session, agent)
+        reply = await call_claude_with_personality(agent, prompt, temperature, use_cache=use_cache)
+        session.append("agent", agent, reply)
         results.append({"agent": agent, "reply": reply})
     return results
 
-async def run_streaming_orchestration(user_message: str, temperature: float = 0.7):
+async def iterate_events(produce):
     """
-    Streaming version with personality-aware Claude calls
+    Run produce(emit) as a task and yield every event it emits, in order
     """
-    conversation_history.append({"role": "user", "agent": "user", "content": user_message})
+    events = asyncio.Queue()
+    finished = object()
+    
+    async def run():
+        try:
+            await produce(events.put)
+        finally:
+            events.put_nowait(finished)
     
+    task = asyncio.create_task(run())
+    try:
+        while (event := await events.get()) is not finished:
+            yield event
+        await task  # surface any error raised by the producer
+    finally:
+        task.cancel()
+
+async def run_parallel_initial_round(session: Session, temperature: float, emit, extra_instruction: str = "",
+                                     stream: bool = False, fallback_reply: str = None, use_cache: bool = True):
+    """
+    Ask every agent for its initial response at the same time, all from one
+    snapshot of the history. Replies are appended and emitted in completion
+    order, so the round costs roughly one API call instead of three.
+    """
     agents_order = AGENTS.copy()
     random.shuffle(agents_order)
+    prompts = {agent: build_context(session, agent, "initial_response", extra_instruction) for agent in agents_order}
     
     for agent in agents_order:
-        typing_event = {
-            "role": "agent",
-            "agent": agent,
-            "content": None,
-            "status": "typing"
-        }
-        yield typing_event
-        
-        # Use personality-aware Claude call
-        prompt = build_context(agent, "initial_response")
-        reply = call_claude_with_personality(agent, prompt, temperature)
-        
-        conversation_history.append({"role": "agent", "agent": agent, "content": reply})
-        
-        done_event = {
-            "role": "agent",
-            "agent": agent,
-            "content": reply,
-            "status": "done"
-        }
-        yield done_event
+        await emit({"role": "agent", "agent": agent, "content": None, "status": "typing"})
+    
+    async def answer(agent: str):
+        on_delta = None
+        if stream:
+            async def on_delta(text: str):
+                await emit({"role": "agent", "agent": agent, "content": text, "status": "delta"})
+        try:
+            return agent, await call_claude_with_personality(agent, prompts[agent], temperature, on_delta=on_delta,
+                                                             use_cache=use_cache)
+        except Exception as e:
+            if fallback_reply is None:
+                raise
+            print(f"❌ Error generating response for {agent}: {e}")
+            return agent, fallback_reply
+    
+    tasks = [asyncio.create_task(answer(agent)) for agent in agents_order]
+    try:
+        for next_reply in asyncio.as_completed(tasks):
+            agent, reply = await next_reply
+            session.append("agent", agent, reply)
+            await emit({"role": "agent", "agent": agent, "content": reply, "status": "done"})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def run_streaming_orchestration(user_message: str, temperature: float = 0.7, session_id: str = DEFAULT_SESSION_ID,
+                                      stream: bool = False, parallel_initial: bool = False, use_cache: bool = True,
+                                      pacing: str = DEFAULT_PACING):
+    """
+    Streaming version with personality-aware Claude calls.
+    With stream=True each reply is also forwarded token by token as "delta" events.
+    With parallel_initial=True all agents answer at once (see run_parallel_initial_round).
+    With pacing="natural" events are spaced out for readers while the next
+    reply is already being generated; pacing="none" sends them as they are ready.
+    """
+    session = await sessions.get(session_id)
+    session.append("user", "user", user_message)
+    
+    async def produce(emit):
+        pacer = Pacer(emit, pacing)
+        try:
+            # Small pause before agents start responding
+            pacer.pause(0.5)
+            
+            if parallel_initial:
+                await run_parallel_initial_round(session, temperature, pacer.emit, stream=stream, use_cache=use_cache)
+            else:
+                agents_order = AGENTS.copy()
+                random.shuffle(agents_order)
+                
+                for agent in agents_order:
+                    # Generate at most one turn ahead of what the client has seen
+                    await pacer.wait_ahead()
+                    
+                    typing_event = {
+                        "role": "agent",
+                        "agent": agent,
+                        "content": None,
+                        "status": "typing"
+                    }
+                    await pacer.emit(typing_event)
+                    
+                    on_delta = None
+                    if stream:
+                        async def on_delta(text: str, agent=agent):
+                            await pacer.emit({"role": "agent", "agent": agent, "content": text, "status": "delta"})
+                    
+                    # Use personality-aware Claude call
+                    prompt = build_context(session, agent, "initial_response")
+                    reply = await call_claude_with_personality(agent, prompt, temperature, on_delta=on_delta,
+                                                               use_cache=use_cache)
+                    
+                    session.append("agent", agent, reply)
+                    
+                    done_event = {
+                        "role": "agent",
+                        "agent": agent,
+                        "content": reply,
+                        "status": "done"
+                    }
+                    await pacer.emit(done_event)
+                    
+                    # Natural pause between agent responses
+                    pacer.pause(1.5)
+            
+            await pacer.flush()
+        finally:
+            pacer.close()
+    
+    async for event in iterate_events(produce):
+        yield event
 
 def check_for_user_input_request(content: str) -> bool:
     """
@@ -0,0 +1,75 @@
+import asyncio
+
+from .profiling import phase as profile_phase
+
+PACING_MODES = ("natural", "none")
+DEFAULT_PACING = "natural"
+
+class Pacer:
+    """
+    Presentation queue between generation and the client. Events and pacing
+    pauses are queued in order and a background task releases them, so the
+    pauses delay what the client sees without delaying the next API call.
+    With mode "none" pauses are dropped and events go out immediately.
+    """
+
+    def __init__(self, send, mode: str = DEFAULT_PACING, max_ahead: int = 1):
+        self._send = send
+        self.natural = mode != "none"
+        self.max_ahead = max_ahead  # pauses generation may run ahead of the client
+        self._queue = asyncio.Queue()
+        self._pending_pauses = 0
+        self._released = asyncio.Event()
+        self._task = asyncio.create_task(self._drain())
+
+    async def emit(self, event: dict):
+        self._raise_if_failed()
+        self._queue.put_nowait((False, event))
+
+    def pause(self, seconds: float):
+        """Hold everything emitted after this point for `seconds` of presentation time"""
+        if self.natural:
+            self._pending_pauses += 1
+            self._queue.put_nowait((True, seconds))
+
+    async def wait_ahead(self):
+        """Block the caller while generation is more than `max_ahead` pauses ahead of the client"""
+        while self._pending_pauses > self.max_ahead:
+            self._raise_if_failed()
+            self._released.clear()
+            await self._released.wait()
+        self._raise_if_failed()
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent"""
+        joined = asyncio.ensure_future(self._queue.join())
+        try:
+            # The drain task only finishes early if sending failed
+            await asyncio.wait({self._task, joined}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            joined.cancel()
+        self._raise_if_failed()
+
+    def close(self):
+        self._task.cancel()
+
+    def _raise_if_failed(self):
+        if self._task.done() and not self._task.cancelled() and self._task.exception():
+            raise self._task.exception()
+
+    async def _drain(self):
+        try:
+            while True:
+                is_pause, item = await self._queue.get()
+                try:
+                    if is_pause:
+                        with profile_phase("pacing_sleep"):
+                            await asyncio.sleep(item)
+                        self._pending_pauses -= 1
+                    else:
+                        await self._send(item)
+                finally:
+                    self._queue.task_done()
+                    self._released.set()
+        finally:
+            self._released.set()
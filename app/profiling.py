@@ -0,0 +1,225 @@
+import os
+import io
+import sys
+import time
+import marshal
+import pstats
+import asyncio
+import cProfile
+import threading
+import contextvars
+from contextlib import nullcontext
+from collections import deque
+
+# Bearer token for the /admin endpoints; empty disables them (override via environment)
+ADMIN_TOKEN = os.getenv("HIVE_ADMIN_TOKEN", "")
+
+# Upper bound on a profiling window and on a discussion-tracing window, in seconds
+PROFILE_MAX_SECONDS = float(os.getenv("HIVE_PROFILE_MAX_SECONDS", "60"))
+TRACE_MAX_SECONDS = float(os.getenv("HIVE_TRACE_MAX_SECONDS", "600"))
+
+# How often the sampling profiler looks at the event-loop thread
+SAMPLE_INTERVAL_MS = float(os.getenv("HIVE_PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+# Discussion traces kept for /admin/traces, and spans kept per trace
+TRACE_KEEP = int(os.getenv("HIVE_TRACE_KEEP", "200"))
+TRACE_MAX_SPANS = 5000
+
+PROFILE_MODES = ("sample", "cprofile")
+
+# Trace of the discussion being run; detached tasks (and their pacers) inherit it
+current_trace = contextvars.ContextVar("hive_trace", default=None)
+
+# Shared no-op context manager handed out while tracing is off
+NOT_TRACING = nullcontext()
+
+class ProfileBusy(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+class Span:
+    """Times one phase of a discussion into its trace"""
+    __slots__ = ("trace", "name", "detail", "start")
+
+    def __init__(self, trace, name: str, detail: str = None):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, self.start, time.perf_counter() - self.start, self.detail)
+        return False
+
+class Trace:
+    """
+    Phase timings of one discussion: context_build, throttle, api_wait,
+    pacing_sleep and send spans in the order they ended, plus per-phase totals
+    """
+    __slots__ = ("session_id", "started_at", "started", "ended", "spans", "totals", "dropped")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.ended = None
+        self.spans = []  # (phase, start offset, seconds, detail)
+        self.totals = {}  # phase -> [count, seconds]
+        self.dropped = 0
+
+    def span(self, name: str, detail: str = None) -> Span:
+        return Span(self, name, detail)
+
+    def add(self, name: str, start: float, seconds: float, detail: str = None):
+        total = self.totals.get(name)
+        if total is None:
+            total = self.totals[name] = [0, 0.0]
+        total[0] += 1
+        total[1] += seconds
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append((name, start - self.started, seconds, detail))
+        else:
+            self.dropped += 1
+
+    def finish(self):
+        self.ended = time.perf_counter()
+
+    def to_dict(self, spans: bool = True) -> dict:
+        end = self.ended if self.ended is not None else time.perf_counter()
+        result = {
+            "session_id": self.session_id,
+            "started_at": self.started_at,
+            "running": self.ended is None,
+            "duration_ms": round((end - self.started) * 1000, 1),
+            "phases": {name: {"count": count, "ms": round(seconds * 1000, 1)}
+                       for name, (count, seconds) in self.totals.items()}
+        }
+        if spans:
+            result["spans"] = [
+                {"phase": name, "start_ms": round(offset * 1000, 2), "ms": round(seconds * 1000, 2),
+                 **({"route": detail} if detail else {})}
+                for name, offset, seconds, detail in self.spans
+            ]
+            result["dropped_spans"] = self.dropped
+        return result
+
+# Most recent discussion traces, oldest first
+recent_traces = deque(maxlen=TRACE_KEEP)
+
+# Discussions starting before this time.monotonic() value are traced (0 = off)
+tracing_until = 0.0
+
+def trace_for(seconds: float) -> float:
+    """Trace discussions that start in the next `seconds` (capped; 0 stops); returns the window used"""
+    global tracing_until
+    seconds = max(0.0, min(seconds, TRACE_MAX_SECONDS))
+    tracing_until = time.monotonic() + seconds if seconds else 0.0
+    return seconds
+
+def tracing_seconds_left() -> float:
+    return max(0.0, tracing_until - time.monotonic()) if tracing_until else 0.0
+
+def start_trace(session_id: str):
+    """A new Trace for a discussion starting now, or None while tracing is off"""
+    if not tracing_until or time.monotonic() >= tracing_until:
+        return None
+    trace = Trace(session_id)
+    recent_traces.append(trace)
+    return trace
+
+def span(trace, name: str, detail: str = None):
+    """Context manager timing `name` into `trace`; a no-op when trace is None"""
+    if trace is None:
+        return NOT_TRACING
+    return Span(trace, name, detail)
+
+def phase(name: str, detail: str = None):
+    """Context manager timing `name` into the current discussion's trace, if it is being traced"""
+    return span(current_trace.get(), name, detail)
+
+def chrome_trace(traces: list) -> dict:
+    """
+    Traces in Chrome trace-event format (chrome://tracing, Perfetto): one
+    process per discussion, one thread per phase so concurrent spans stay apart
+    """
+    events = []
+    for pid, trace in enumerate(traces, 1):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": trace.session_id}})
+        tids = {}
+        for name, offset, seconds, detail in trace.spans:
+            tid = tids.get(name)
+            if tid is None:
+                tid = tids[name] = len(tids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+            event = {"name": name, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": round((trace.started_at + offset) * 1e6), "dur": round(seconds * 1e6)}
+            if detail:
+                event["args"] = {"route": detail}
+            events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> dict:
+    """
+    Look at `thread_id`'s Python stack every `interval` seconds for `seconds`;
+    returns {collapsed stack: samples}. Runs on a helper thread.
+    """
+    counts = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        names = []
+        while frame is not None:
+            names.append(frame_name(frame))
+            frame = frame.f_back
+        if names:
+            stack = ";".join(reversed(names))
+            counts[stack] = counts.get(stack, 0) + 1
+        time.sleep(interval)
+    return counts
+
+def collapsed_text(counts: dict) -> str:
+    """Brendan Gregg's folded format, as read by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
+
+_profiling = False
+
+async def run_profile(mode: str, seconds: float, output: str = "pstats") -> tuple:
+    """
+    Profile the event-loop thread for `seconds` (capped at PROFILE_MAX_SECONDS)
+    while it keeps serving. "sample" reads the stack from a helper thread
+    and returns collapsed stacks; "cprofile" traces every call and returns
+    a pstats file (output="text" for the top functions by cumulative time).
+    Returns (body, media type, file name).
+    """
+    global _profiling
+    if _profiling:
+        raise ProfileBusy("A profile is already running")
+    seconds = max(0.1, min(seconds, PROFILE_MAX_SECONDS))
+    _profiling = True
+    try:
+        if mode == "sample":
+            counts = await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds,
+                                             SAMPLE_INTERVAL_MS / 1000)
+            return collapsed_text(counts), "text/plain", "hive.collapsed.txt"
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        if output == "text":
+            buffer = io.StringIO()
+            pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(60)
+            return buffer.getvalue(), "text/plain", "hive.pstats.txt"
+        profiler.create_stats()
+        # Same layout as Profile.dump_stats, so pstats.Stats("hive.prof") and snakeviz read it
+        return marshal.dumps(profiler.stats), "application/octet-stream", "hive.prof"
+    finally:
+        _profiling = False
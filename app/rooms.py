@@ -0,0 +1,185 @@
+import os
+import asyncio
+from collections import OrderedDict, deque
+
+from . import metrics, wire
+
+# Batches a viewer may fall behind by before it is disconnected; it can rejoin with last_seq
+VIEWER_BUFFER = int(os.getenv("HIVE_ROOM_VIEWER_BUFFER", "256"))
+
+# Events per frame when sending a snapshot over a compact protocol
+SNAPSHOT_BATCH = 100
+
+# Rooms keep their discussion in the session "room:<room id>" (see /history)
+ROOM_SESSION_PREFIX = "room:"
+
+class Viewer:
+    """One subscriber of a room: batches of pre-encoded frames waiting to be sent in its protocol"""
+    __slots__ = ("protocol", "pending", "limit", "closed", "lagged", "_wakeup")
+
+    def __init__(self, protocol: str, limit: int = VIEWER_BUFFER):
+        self.protocol = protocol
+        self.pending = deque()  # (frames, event count)
+        self.limit = limit
+        self.closed = False
+        self.lagged = False  # closed because it fell VIEWER_BUFFER batches behind
+        self._wakeup = asyncio.Event()
+
+    def push(self, frames: list, count: int) -> bool:
+        """Queue a batch; False (and the viewer closed) if it has fallen too far behind"""
+        if self.closed:
+            return False
+        if len(self.pending) >= self.limit:
+            self.lagged = True
+            self.close()
+            return False
+        self.pending.append((frames, count))
+        self._wakeup.set()
+        return True
+
+    def close(self):
+        self.closed = True
+        self.pending.clear()
+        self._wakeup.set()
+
+    async def batches(self):
+        """Yield (frames, event count) as they arrive, until the viewer is closed"""
+        while True:
+            while self.pending:
+                yield self.pending.popleft()
+            if self.closed:
+                return
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+class Room:
+    """
+    One shared discussion and everyone watching it. A single pump follows
+    the session's event log while anyone is watching, encodes each event
+    once per protocol in use and hands the same frames to every viewer of
+    that protocol. Late joiners get the retained events as a snapshot, then
+    the live tail. Viewers only watch, so generation cost doesn't grow with
+    their number.
+    """
+    __slots__ = ("room_id", "session", "viewers", "sent_seq", "stats", "_encoded", "_pump")
+
+    def __init__(self, room_id: str, session, stats: dict):
+        self.room_id = room_id
+        self.session = session
+        self.viewers = set()
+        self.sent_seq = session.events.last_seq  # last event handed to the viewers
+        self.stats = stats  # shared counters of the Rooms registry
+        self._encoded = OrderedDict()  # seq -> {protocol: encoded event}, as many as the log retains
+        self._pump = None
+
+    @property
+    def events(self):
+        return self.session.events
+
+    def join(self, protocol: str, last_seq: int = None) -> Viewer:
+        """
+        Subscribe a viewer: everything retained after `last_seq` is queued
+        first (for a new viewer, the whole log, where finished replies are
+        already compacted to their done events), then each live batch as
+        the pump broadcasts it
+        """
+        if self._pump is None:
+            self.sent_seq = self.events.last_seq
+            self._pump = asyncio.create_task(self._run_pump(self.sent_seq))
+        snapshot = [event for event in self.events.since(last_seq or 0) if event["seq"] <= self.sent_seq]
+        step = 1 if protocol == wire.JSON_PROTOCOL else SNAPSHOT_BATCH
+        batches = [snapshot[i:i + step] for i in range(0, len(snapshot), step)]
+        viewer = Viewer(protocol, VIEWER_BUFFER + len(batches))
+        for batch in batches:
+            viewer.push(self._frames(protocol, batch), len(batch))
+        self.viewers.add(viewer)
+        self.stats["joined"] += 1
+        return viewer
+
+    def leave(self, viewer: Viewer):
+        viewer.close()
+        self.viewers.discard(viewer)
+        if not self.viewers and self._pump is not None:
+            # Nobody is watching: stop following, so an unwatched discussion is abandoned as usual
+            self._pump.cancel()
+            self._pump = None
+
+    @property
+    def idle(self) -> bool:
+        return not self.viewers and not self.events.running
+
+    def info(self) -> dict:
+        viewers = {}
+        for viewer in self.viewers:
+            viewers[viewer.protocol] = viewers.get(viewer.protocol, 0) + 1
+        return {"room_id": self.room_id, "session_id": self.session.session_id, "viewers": viewers,
+                "running": self.events.running, "last_seq": self.events.last_seq}
+
+    def _encode(self, protocol: str, event: dict):
+        seq = event["seq"]
+        encoded = self._encoded.get(seq)
+        if encoded is None:
+            encoded = self._encoded[seq] = {}
+            if len(self._encoded) > self.events.events.maxlen:
+                self._encoded.popitem(last=False)
+        payload = encoded.get(protocol)
+        if payload is None:
+            payload = encoded[protocol] = wire.encode_event(protocol, event)
+            metrics.room_encodes.inc(protocol)
+        return payload
+
+    def _frames(self, protocol: str, batch: list) -> list:
+        return wire.join_frames(protocol, [self._encode(protocol, event) for event in batch])
+
+    async def _run_pump(self, after: int):
+        async for batch in self.events.follow_batches(after, wire.COALESCE_MS / 1000):
+            self._broadcast(batch)
+
+    def _broadcast(self, batch: list):
+        self.sent_seq = batch[-1]["seq"]
+        self.stats["events"] += len(batch)
+        frames_by_protocol = {}
+        for viewer in list(self.viewers):
+            frames = frames_by_protocol.get(viewer.protocol)
+            if frames is None:
+                frames = frames_by_protocol[viewer.protocol] = self._frames(viewer.protocol, batch)
+            if viewer.push(frames, len(batch)):
+                metrics.room_deliveries.inc(viewer.protocol, amount=len(batch))
+            else:
+                self.viewers.discard(viewer)
+                self.stats["lagged"] += 1
+                print(f"🐢 Dropped a viewer of room {self.room_id} that fell behind")
+
+class Rooms:
+    """Broadcast rooms by id, created on first use and dropped once nobody watches and nothing runs"""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.rooms = {}
+        self.stats = {"created": 0, "joined": 0, "lagged": 0, "events": 0}
+
+    async def get(self, room_id: str) -> Room:
+        room = self.rooms.get(room_id)
+        if room is None:
+            session = await self.sessions.get(ROOM_SESSION_PREFIX + room_id)
+            room = self.rooms.get(room_id)  # created by someone else meanwhile?
+            if room is None:
+                room = self.rooms[room_id] = Room(room_id, session, self.stats)
+                self.stats["created"] += 1
+        return room
+
+    def leave(self, room: Room, viewer: Viewer):
+        room.leave(viewer)
+        self.discard_if_idle(room)
+
+    def discard_if_idle(self, room: Room):
+        if room.idle and self.rooms.get(room.room_id) is room:
+            del self.rooms[room.room_id]
+
+    def summary(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "viewers": sum(len(room.viewers) for room in self.rooms.values()),
+            "running": sum(room.events.running for room in self.rooms.values()),
+            **self.stats
+        }
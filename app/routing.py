@@ -0,0 +1,211 @@
+import os
+import json
+import contextvars
+
+# Model for every call no routing rule overrides
+DEFAULT_MODEL = os.getenv("HIVE_MODEL", "claude-3-5-sonnet-20240620")
+
+# Tier used when a request names none (or one the routing table doesn't know)
+DEFAULT_TIER = os.getenv("HIVE_DEFAULT_TIER", "standard")
+
+# Tiers any client may pick (comma-separated); others only for requests carrying HIVE_ADMIN_TOKEN
+CLIENT_TIERS = [tier.strip() for tier in os.getenv("HIVE_CLIENT_TIERS", "").split(",") if tier.strip()]
+
+# Routing rules: a JSON list, or the path of a JSON file holding {"routes": [...], "prices": {...}}
+ROUTES = os.getenv("HIVE_ROUTES", "")
+
+# Per-agent reply caps when no rule sets max_tokens
+DEFAULT_MAX_TOKENS = {
+    "catalyst": 300,    # Shorter, punchier responses
+    "anchor": 350,      # Longer for detailed analysis
+    "weaver": 320,      # Balanced for integration
+    "summarizer": 300
+}
+
+# Length policy per phase of the autonomous discussion. Its turns are asked
+# for 1-2 sentences, so max_tokens caps the agent's default, a blank line
+# ends the reply, and max_sentences (0 = no limit) stops a streamed reply at
+# that sentence boundary and trims a non-streamed one. Phases not listed
+# (initial replies, /chat) keep the agent's default and no stop or cap.
+# Rules can override each setting.
+PHASE_LENGTH_POLICIES = {
+    "autonomous_discussion": {"max_tokens": 120, "stop_sequences": ["\n\n"], "max_sentences": 2},
+    "final_round": {"max_tokens": 160, "stop_sequences": ["\n\n"], "max_sentences": 3},
+    "summary": {"max_tokens": 300, "stop_sequences": [], "max_sentences": 0}
+}
+
+# USD per million input and output tokens, matched by model-name prefix
+MODEL_PRICES = {
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "claude-3-7-sonnet": (3.00, 15.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    "claude-opus-4": (15.00, 75.00)
+}
+CACHE_READ_PRICE = 0.1    # share of the input price for prompt-cache reads
+CACHE_WRITE_PRICE = 1.25  # and for prompt-cache writes
+
+RULE_MATCH_KEYS = ("tier", "phase", "agent")
+RULE_ROUTE_KEYS = ("model", "max_tokens", "timeout", "stop_sequences", "max_sentences")
+
+# Tier of the discussion being run; detached tasks inherit it from the code that started them
+current_tier = contextvars.ContextVar("hive_tier", default=DEFAULT_TIER)
+
+class Route:
+    """
+    Where one (tier, phase, agent) combination sends its calls, its length
+    policy, and what its calls have cost
+    """
+    __slots__ = ("tier", "phase", "agent", "model", "max_tokens", "timeout", "stop_sequences", "max_sentences",
+                 "calls", "total_seconds", "input_tokens", "output_tokens", "cost", "stop_reasons")
+
+    def __init__(self, tier: str, phase: str, agent: str, model: str, max_tokens: int, timeout: float = None,
+                 stop_sequences: list = (), max_sentences: int = 0):
+        self.tier = tier
+        self.phase = phase
+        self.agent = agent
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout  # read timeout in seconds; None uses the phase default
+        self.stop_sequences = list(stop_sequences)
+        self.max_sentences = max_sentences
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.stop_reasons = {}  # why replies ended: end_turn, max_tokens, stop_sequence, stopped
+
+    @property
+    def key(self) -> str:
+        return f"{self.tier}/{self.phase}/{self.agent}"
+
+    @property
+    def labels(self) -> tuple:
+        """Label values for the LLM call metrics (see metrics.LLM_LABELS)"""
+        return (self.tier, self.agent, self.phase, self.model)
+
+def load_config(spec: str = ROUTES):
+    """(rules, prices) from HIVE_ROUTES: inline JSON list or a JSON file path; empty means no rules"""
+    spec = spec.strip()
+    if not spec:
+        return [], {}
+    if spec.startswith("["):
+        config = {"routes": json.loads(spec)}
+    else:
+        with open(spec, encoding="utf-8") as f:
+            config = json.load(f)
+        if isinstance(config, list):
+            config = {"routes": config}
+    rules = config.get("routes", [])
+    for rule in rules:
+        unknown = set(rule) - set(RULE_MATCH_KEYS) - set(RULE_ROUTE_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown routing rule keys {sorted(unknown)} in {rule}")
+    prices = {model: tuple(price) for model, price in config.get("prices", {}).items()}
+    return rules, prices
+
+class Router:
+    """
+    Routing table from (tier, phase, agent) to model, read timeout and
+    length policy. Each rule matches on any of tier/phase/agent (omitted
+    means any) and sets any of model/max_tokens/timeout/stop_sequences/
+    max_sentences, on top of the phase's PHASE_LENGTH_POLICIES entry;
+    matching rules apply from least to most specific, so a tier-wide model
+    choice can be refined per agent. Resolved routes are cached and double
+    as per-route latency, cost and output-budget totals.
+    """
+
+    def __init__(self, rules: list = None, prices: dict = None, default_model: str = DEFAULT_MODEL,
+                 default_tier: str = DEFAULT_TIER, client_tiers: list = CLIENT_TIERS):
+        # Stable sort: equally specific rules keep their configured order
+        self.rules = sorted(rules or [], key=lambda rule: sum(key in rule for key in RULE_MATCH_KEYS))
+        self.prices = {**MODEL_PRICES, **(prices or {})}
+        self.default_model = default_model
+        self.default_tier = default_tier
+        self.tiers = {default_tier} | {rule["tier"] for rule in self.rules if "tier" in rule}
+        self.client_tiers = frozenset(client_tiers)
+        self.routes = {}
+
+    def tier(self, requested: str = None, trusted: bool = False) -> str:
+        """
+        The tier to run a discussion in: `requested` if the table knows it
+        and the caller may pick it (`trusted`, or one of the client tiers),
+        else the default
+        """
+        if requested in self.tiers and (trusted or requested in self.client_tiers):
+            return requested
+        return self.default_tier
+
+    def resolve(self, agent: str, phase: str, tier: str = None) -> Route:
+        tier = tier or current_tier.get()
+        route = self.routes.get((tier, phase, agent))
+        if route is None:
+            policy = PHASE_LENGTH_POLICIES.get(phase, {})
+            max_tokens = DEFAULT_MAX_TOKENS.get(agent, 300)
+            settings = {"model": self.default_model,
+                        "max_tokens": min(max_tokens, policy.get("max_tokens", max_tokens)),
+                        "timeout": None,
+                        "stop_sequences": policy.get("stop_sequences", []),
+                        "max_sentences": policy.get("max_sentences", 0)}
+            wanted = {"tier": tier, "phase": phase, "agent": agent}
+            for rule in self.rules:
+                if all(rule[key] == wanted[key] for key in RULE_MATCH_KEYS if key in rule):
+                    settings.update((key, rule[key]) for key in RULE_ROUTE_KEYS if key in rule)
+            route = self.routes[(tier, phase, agent)] = Route(tier, phase, agent, **settings)
+        return route
+
+    def price(self, model: str):
+        """(input, output) USD per million tokens, or None for an unknown model"""
+        if model in self.prices:
+            return self.prices[model]
+        matches = [prefix for prefix in self.prices if model.startswith(prefix)]
+        return self.prices[max(matches, key=len)] if matches else None
+
+    def record(self, route: Route, seconds: float, completion) -> float:
+        """Add one finished call to the route's totals; returns its cost in USD (0 if unpriced)"""
+        cost = 0.0
+        price = self.price(route.model)
+        if price is not None:
+            input_price, output_price = price
+            cost = (completion.input_tokens * input_price
+                    + completion.cache_read_input_tokens * input_price * CACHE_READ_PRICE
+                    + completion.cache_creation_input_tokens * input_price * CACHE_WRITE_PRICE
+                    + completion.output_tokens * output_price) / 1_000_000
+        route.calls += 1
+        route.total_seconds += seconds
+        route.input_tokens += (completion.input_tokens + completion.cache_read_input_tokens
+                               + completion.cache_creation_input_tokens)
+        route.output_tokens += completion.output_tokens
+        route.cost += cost
+        reason = completion.stop_reason or "unknown"
+        route.stop_reasons[reason] = route.stop_reasons.get(reason, 0) + 1
+        return cost
+
+    def stats(self) -> dict:
+        return {
+            route.key: {
+                "model": route.model,
+                "max_tokens": route.max_tokens,
+                "max_sentences": route.max_sentences,
+                "calls": route.calls,
+                "avg_latency_ms": round(route.total_seconds / route.calls * 1000, 1) if route.calls else None,
+                "input_tokens": route.input_tokens,
+                "output_tokens": route.output_tokens,
+                # Actual against budgeted output: mean reply length as a share of max_tokens
+                "avg_output_tokens": round(route.output_tokens / route.calls, 1) if route.calls else None,
+                "output_budget_used": (round(route.output_tokens / (route.calls * route.max_tokens), 3)
+                                       if route.calls else None),
+                "stop_reasons": dict(route.stop_reasons),
+                "cost_usd": round(route.cost, 6)
+            }
+            for route in self.routes.values()
+        }
+
+def create_router() -> Router:
+    rules, prices = load_config()
+    if rules:
+        print(f"🧭 Loaded {len(rules)} LLM routing rules")
+    return Router(rules, prices)
@@ -0,0 +1,223 @@
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict, deque
+from itertools import islice
+
+from .context import ContextRenderer
+from .events import EventLog
+
+# Session limits (override via environment)
+MAX_SESSIONS = int(os.getenv("HIVE_MAX_SESSIONS", "1000"))
+MAX_MESSAGES_PER_SESSION = int(os.getenv("HIVE_SESSION_MAX_MESSAGES", "200"))
+SESSION_TTL_SECONDS = float(os.getenv("HIVE_SESSION_TTL_SECONDS", "3600"))
+
+DEFAULT_SESSION_ID = "default"
+
+class Message:
+    """
+    Compact conversation record. Role and agent names come from a tiny fixed
+    vocabulary, so they are interned and shared across every session.
+    """
+    __slots__ = ("role", "agent", "content")
+
+    def __init__(self, role: str, agent: str, content: str):
+        self.role = sys.intern(role)
+        self.agent = sys.intern(agent)
+        self.content = content
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "agent": self.agent, "content": self.content}
+
+class Session:
+    """
+    One conversation: a bounded ring buffer of messages, their pre-rendered
+    prompt lines, a rolling summary of turns that left the context window and
+    the last access time. `total` counts every message ever appended,
+    including ones the buffer dropped. Appends are also passed to `state`
+    (a session state backend, see app/state.py) when one is attached.
+    `events` is the log clients follow for this session's discussions.
+    """
+    __slots__ = ("session_id", "messages", "renderer", "total", "last_access",
+                 "summary", "summary_upto", "summarizing", "state", "events")
+
+    def __init__(self, session_id: str, max_messages: int = MAX_MESSAGES_PER_SESSION, state=None):
+        self.session_id = session_id
+        self.messages = deque(maxlen=max_messages)
+        self.renderer = ContextRenderer(max_messages)
+        self.total = 0
+        self.last_access = time.monotonic()
+        self.summary = ""  # covers messages before absolute index summary_upto
+        self.summary_upto = 0
+        self.summarizing = False
+        self.state = state
+        self.events = EventLog()
+
+    def append(self, role: str, agent: str, content: str) -> Message:
+        message = Message(role, agent, content)
+        self.messages.append(message)
+        self.renderer.append(message.role, content)
+        if self.state is not None:
+            self.state.record(self.session_id, self.total, message)
+        self.total += 1
+        return message
+
+    def restore(self, messages: list, total: int, summary: str, summary_upto: int):
+        """
+        Replace the buffer with the newest stored messages; `total` is the
+        stored session's full message count. Done in place, so discussions
+        holding this session keep working on the refreshed history.
+        """
+        self.messages.clear()
+        self.renderer = ContextRenderer(self.messages.maxlen)
+        for role, agent, content in messages:
+            message = Message(role, agent, content)
+            self.messages.append(message)
+            self.renderer.append(message.role, content)
+        self.total = self.renderer.total = total
+        self.summary = summary
+        self.summary_upto = summary_upto
+
+    def set_summary(self, summary: str, summary_upto: int):
+        self.summary = summary
+        self.summary_upto = summary_upto
+        if self.state is not None:
+            self.state.record_summary(self.session_id, summary, summary_upto)
+
+    def recent(self, count: int) -> list:
+        """Return the newest `count` messages, oldest first"""
+        start = max(0, len(self.messages) - count)
+        return list(islice(self.messages, start, None))
+
+    async def page(self, after: int = None, before: int = None, limit: int = None) -> tuple:
+        """
+        Messages whose id (absolute index) lies strictly between `after` and
+        `before`, as dicts with an "id". When more than `limit` match, the
+        oldest ones are kept when paging forward from `after`, otherwise the
+        newest. Returns (messages, has_more). Ids older than the in-memory
+        buffer are read from the state backend; without one they are gone,
+        and paging stops at the oldest buffered message.
+        """
+        first = self.total - len(self.messages)
+        lo = 0 if after is None else max(0, after + 1)
+        if self.state is None:
+            lo = max(lo, first)
+        hi = self.total if before is None else min(self.total, before)
+        if hi <= lo:
+            return [], False
+        has_more = limit is not None and hi - lo > limit
+        if has_more:
+            if after is not None:
+                hi = lo + limit
+            else:
+                lo = hi - limit
+        
+        page = []
+        if lo < first:
+            stored = await self.state.read(self.session_id, lo, min(hi, first))
+            page = [{"id": seq, "role": role, "agent": agent, "content": content}
+                    for seq, role, agent, content in stored]
+        start = max(lo, first)
+        if hi > start:
+            page.extend({"id": seq, **message.to_dict()}
+                        for seq, message in zip(range(start, hi), islice(self.messages, start - first, hi - first)))
+        return page, has_more
+
+    def window(self, token_budget: int, chunk: int) -> tuple:
+        """
+        Absolute (start, split) indexes that divide the context window into
+        older [start, split) and newer [split, total) messages. The newer part
+        (1 to `chunk` messages) is always included; the older part is as
+        much history as fits in `token_budget`. Both boundaries only move in
+        steps of `chunk` messages, so the older part stays byte-identical for
+        several turns in a row and can be prompt-cached.
+        """
+        return self.renderer.window(token_budget, chunk)
+
+    def history_text(self, start: int, end: int) -> str:
+        """Prompt-ready history for absolute message indexes [start, end)"""
+        return self.renderer.block(start, end)
+
+    def to_dicts(self) -> list:
+        return [message.to_dict() for message in self.messages]
+
+class SessionStore:
+    """
+    Sessions keyed by id, evicted when idle longer than the TTL or when the
+    store is over capacity (least recently used first). With a `state`
+    backend every append is persisted, a session that is not in memory is
+    rehydrated from it on first access, and when the backend is shared by
+    several workers a cached session is reloaded if another worker added to it.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl_seconds: float = SESSION_TTL_SECONDS,
+                 max_messages: int = MAX_MESSAGES_PER_SESSION, state=None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.state = state if state is not None and state.enabled else None
+        self._sessions = OrderedDict()  # session_id -> Session, least recently used first
+
+    async def get(self, session_id: str) -> Session:
+        """Return the up-to-date session for `session_id`, rehydrating or creating it if needed"""
+        session = await self.peek(session_id)
+        if session is None:
+            session = Session(session_id, self.max_messages, self.state)
+            self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        now = time.monotonic()
+        session.last_access = now
+        self._evict(now)
+        return session
+
+    async def peek(self, session_id: str):
+        """Return the up-to-date session if it exists in memory or storage, without creating it"""
+        session = self._sessions.get(session_id)
+        if self.state is None:
+            return session
+        if session is not None:
+            if self.state.shared:
+                stored_total = await self.state.version(session_id)
+                if stored_total is not None and stored_total > session.total:
+                    # Another worker appended to this session; reload it in place
+                    await self._rehydrate(session_id, session)
+            return session
+        
+        session = await self._rehydrate(session_id)
+        if session is not None:
+            # Another request may have loaded it while we were waiting on storage
+            session = self._sessions.setdefault(session_id, session)
+            self._evict(time.monotonic())
+        return session
+
+    async def _rehydrate(self, session_id: str, session: Session = None):
+        stored = await self.state.load(session_id, self.max_messages)
+        if stored is None:
+            return None
+        messages, total, (summary, summary_upto) = stored
+        if session is None:
+            session = Session(session_id, self.max_messages, self.state)
+        session.restore(messages, total, summary, summary_upto)
+        return session
+
+    def _evict(self, now: float):
+        skipped = 0
+        while len(self._sessions) > skipped:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            expired = now - oldest.last_access > self.ttl_seconds
+            if not expired and len(self._sessions) <= self.max_sessions:
+                break
+            if oldest.events.running or oldest.events.followers:
+                # Clients may still reattach to a running discussion, and connected ones
+                # follow this session's log, so keep it
+                self._sessions.move_to_end(oldest_id)
+                skipped += 1
+                continue
+            del self._sessions[oldest_id]
+
+    def __len__(self):
+        return len(self._sessions)
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
@@ -0,0 +1,375 @@
+"""
+Session state backends. Every backend offers the same interface:
+
+- record(session_id, seq, message) / record_summary(session_id, summary, upto):
+  queue a write; never blocks the caller
+- await load(session_id, limit): newest `limit` messages as (role, agent, content),
+  the session's total message count and (summary, summary_upto), or None
+- await read(session_id, start, end): messages with seq in [start, end)
+- await version(session_id): total message count in storage, or None when
+  the backend keeps no state outside this process
+- await flush() / await aclose() / stats()
+
+`shared` backends can be written by several worker processes at once, so
+SessionStore checks their version before trusting a cached session.
+"""
+
+import os
+import json
+import time
+import asyncio
+from itertools import chain
+from urllib.parse import urlparse
+
+# Where session state lives: "memory" (one process, nothing written), "sqlite" (one host, in the
+# HIVE_TRANSCRIPT_PATH file; the default once that is set) or "redis" (any number of hosts)
+STATE_BACKEND = os.getenv("HIVE_STATE_BACKEND") or ("sqlite" if os.getenv("HIVE_TRANSCRIPT_PATH") else "memory")
+REDIS_URL = os.getenv("HIVE_REDIS_URL", "redis://127.0.0.1:6379/0")
+REDIS_TTL_SECONDS = int(os.getenv("HIVE_REDIS_TTL_SECONDS", "604800"))  # idle sessions expire after a week
+
+# Write-behind batching shared by the out-of-process backends
+STATE_BATCH_SIZE = int(os.getenv("HIVE_TRANSCRIPT_BATCH_SIZE", "256"))
+STATE_FLUSH_SECONDS = float(os.getenv("HIVE_TRANSCRIPT_FLUSH_SECONDS", "0.2"))
+
+class MemoryState:
+    """
+    In-process state: sessions live only in the SessionStore, so nothing is
+    written anywhere. Only correct with a single worker process.
+    """
+    name = "memory"
+    enabled = False
+    shared = False
+
+    def record(self, session_id: str, seq: int, message):
+        pass
+
+    def record_summary(self, session_id: str, summary: str, summary_upto: int):
+        pass
+
+    async def load(self, session_id: str, limit: int):
+        return None
+
+    async def read(self, session_id: str, start: int, end: int) -> list:
+        return []
+
+    async def version(self, session_id: str):
+        return None
+
+    async def flush(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "enabled": False}
+
+class WriteBehindState:
+    """
+    Base for out-of-process backends. Appends are queued in memory and a
+    write-behind task stores them in batches, so I/O never sits on the
+    response path. Reads merge in whatever is still queued, so a process
+    always sees its own writes. Subclasses implement _store, _fetch_newest,
+    _fetch_range and _stored_total.
+    """
+    name = "base"
+    enabled = True
+    shared = True
+
+    def __init__(self, batch_size: int = STATE_BATCH_SIZE, flush_seconds: float = STATE_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = []  # (session_id, seq, role, agent, content, created_at) not yet stored
+        self._pending_summaries = {}  # session_id -> (summary, summary_upto)
+        self._writing = ([], {})  # the batch currently being stored
+        self._wakeup = None
+        self._task = None
+        self._write_lock = asyncio.Lock()  # one batch at a time
+        self.written = 0
+        self.batches = 0
+        self.rehydrated = 0
+        self.write_errors = 0
+
+    def record(self, session_id: str, seq: int, message):
+        """Queue one appended message for the next batch"""
+        self._pending.append((session_id, seq, message.role, message.agent, message.content, time.time()))
+        self._schedule()
+
+    def record_summary(self, session_id: str, summary: str, summary_upto: int):
+        self._pending_summaries[session_id] = (summary, summary_upto)
+        self._schedule()
+
+    async def load(self, session_id: str, limit: int):
+        if not self.enabled:
+            return None
+        rows, summary = await self._fetch_newest(session_id, limit)
+        last_seq = rows[-1][0] if rows else -1
+        rows.extend(self._queued(session_id, last_seq + 1, None))
+        summary = self._pending_summaries.get(session_id) or self._writing[1].get(session_id) or summary
+        if not rows and summary is None:
+            return None
+        self.rehydrated += 1
+        total = rows[-1][0] + 1 if rows else 0
+        messages = [row[1:] for row in rows[-limit:]]
+        return messages, total, summary or ("", 0)
+
+    async def read(self, session_id: str, start: int, end: int) -> list:
+        """Stored messages with seq in [start, end) as (seq, role, agent, content), oldest first"""
+        if not self.enabled:
+            return []
+        rows = await self._fetch_range(session_id, start, end)
+        if len(rows) < end - start:
+            stored = {row[0] for row in rows}
+            rows.extend(row for row in self._queued(session_id, start, end) if row[0] not in stored)
+            rows.sort()
+        return rows
+
+    async def version(self, session_id: str):
+        if not self.enabled:
+            return None
+        queued = [row[0] for row in self._queued(session_id, 0, None)]
+        return max([await self._stored_total(session_id)] + [seq + 1 for seq in queued])
+
+    def _queued(self, session_id: str, start: int, end) -> list:
+        return [(seq, role, agent, content)
+                for sid, seq, role, agent, content, _ in chain(self._writing[0], self._pending)
+                if sid == session_id and seq >= start and (end is None or seq < end)]
+
+    def _schedule(self):
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # no event loop yet; the next append or flush() writes it
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._write_behind())
+        self._wakeup.set()
+
+    async def _write_behind(self):
+        while True:
+            await self._wakeup.wait()
+            if len(self._pending) < self.batch_size:
+                await asyncio.sleep(self.flush_seconds)  # let a batch build up
+            self._wakeup.clear()
+            await self._flush_pending()
+
+    async def _flush_pending(self):
+        async with self._write_lock:
+            await self._write_batch()
+
+    async def _write_batch(self):
+        messages, self._pending = self._pending, []
+        summaries, self._pending_summaries = self._pending_summaries, {}
+        if not messages and not summaries:
+            return
+        self._writing = (messages, summaries)
+        try:
+            await self._store(messages, summaries)
+            self.written += len(messages)
+            self.batches += 1
+        except Exception as e:
+            # Put the batch back so the next flush retries it
+            self.write_errors += 1
+            self._pending[:0] = messages
+            for session_id, summary in summaries.items():
+                self._pending_summaries.setdefault(session_id, summary)
+            print(f"❌ Error writing session state ({self.name}): {e}")
+        finally:
+            self._writing = ([], {})
+
+    async def flush(self):
+        """Store everything queued so far"""
+        if self.enabled:
+            await self._flush_pending()
+
+    async def aclose(self):
+        if not self.enabled:
+            return
+        await self._flush_pending()  # also waits for a batch already being stored
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        async with self._write_lock:
+            await self._write_batch()
+            await self._close()
+
+    async def _close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "enabled": self.enabled,
+            "written": self.written,
+            "batches": self.batches,
+            "pending": len(self._pending),
+            "rehydrated_sessions": self.rehydrated,
+            "write_errors": self.write_errors
+        }
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+class RespClient:
+    """
+    Minimal asyncio client for the Redis serialization protocol (RESP2).
+    One connection; each call sends a pipeline of commands and reads all
+    replies, and calls take turns on the connection.
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            await self._round_trip(setup)
+
+    async def execute(self, *commands) -> list:
+        """Send `commands` (tuples of arguments) as one pipeline; returns their replies in order"""
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                await self._connect()
+            try:
+                replies = await self._round_trip(commands)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self._writer = None
+                raise
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def _round_trip(self, commands) -> list:
+        self._writer.write(b"".join(self._encode(command) for command in commands))
+        await self._writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    @staticmethod
+    def _encode(command) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readuntil(b"\r\n")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            return RespError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    async def aclose(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+class RedisState(WriteBehindState):
+    """
+    Session state in Redis (or anything speaking its protocol), shared by
+    every worker on every host. Each session is a list of JSON messages, so
+    a message's seq is its list index, plus a hash for the rolling summary.
+    """
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL, ttl_seconds: int = REDIS_TTL_SECONDS, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.client = RespClient(url)
+
+    @staticmethod
+    def _messages_key(session_id: str) -> str:
+        return f"hive:session:{session_id}:messages"
+
+    @staticmethod
+    def _summary_key(session_id: str) -> str:
+        return f"hive:session:{session_id}:summary"
+
+    async def _store(self, messages: list, summaries: dict):
+        commands = []
+        touched = set()
+        for session_id, seq, role, agent, content, created_at in messages:
+            commands.append(("RPUSH", self._messages_key(session_id),
+                             json.dumps([role, agent, content, created_at], ensure_ascii=False)))
+            touched.add(session_id)
+        for session_id, (summary, summary_upto) in summaries.items():
+            commands.append(("HSET", self._summary_key(session_id), "summary", summary, "upto", summary_upto))
+            touched.add(session_id)
+        if self.ttl_seconds > 0:
+            for session_id in touched:
+                commands.append(("EXPIRE", self._messages_key(session_id), self.ttl_seconds))
+                commands.append(("EXPIRE", self._summary_key(session_id), self.ttl_seconds))
+        # MULTI/EXEC so a failed batch is not half applied when it is retried.
+        # RPUSH appends atomically, so if another worker appended concurrently
+        # the stored order wins and version() tells every worker to reload
+        await self.client.execute(("MULTI",), *commands, ("EXEC",))
+
+    async def _fetch_newest(self, session_id: str, limit: int) -> tuple:
+        length, items, summary = await self.client.execute(
+            ("LLEN", self._messages_key(session_id)),
+            ("LRANGE", self._messages_key(session_id), -limit, -1),
+            ("HMGET", self._summary_key(session_id), "summary", "upto")
+        )
+        first = length - len(items)
+        rows = [(first + i, *json.loads(item)[:3]) for i, item in enumerate(items)]
+        return rows, (summary[0], int(summary[1])) if summary[0] is not None else None
+
+    async def _fetch_range(self, session_id: str, start: int, end: int) -> list:
+        if end <= start:
+            return []
+        (items,) = await self.client.execute(("LRANGE", self._messages_key(session_id), start, end - 1))
+        return [(start + i, *json.loads(item)[:3]) for i, item in enumerate(items)]
+
+    async def _stored_total(self, session_id: str) -> int:
+        (length,) = await self.client.execute(("LLEN", self._messages_key(session_id)))
+        return length
+
+    async def _close(self):
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "url": f"redis://{self.client.host}:{self.client.port}/{self.client.db}"}
+
+def create_state_backend(name: str = STATE_BACKEND):
+    if name == "memory":
+        return MemoryState()
+    if name == "redis":
+        print(f"🗄️ Using Redis session state at {REDIS_URL}")
+        return RedisState()
+    if name != "sqlite":
+        raise ValueError(f"Unknown state backend: {name}")
+    from .transcripts import TranscriptStore, TRANSCRIPT_PATH  # imported here because it builds on this module
+    if not TRANSCRIPT_PATH:
+        raise ValueError("The sqlite state backend needs a file: set HIVE_TRANSCRIPT_PATH")
+    print(f"🗄️ Using SQLite session state at {TRANSCRIPT_PATH}")
+    return TranscriptStore(TRANSCRIPT_PATH)
@@ -0,0 +1,89 @@
+import os
+import asyncio
+import sqlite3
+
+from .state import WriteBehindState
+
+# SQLite file for transcripts; no default, so nothing is written unless a path is given
+TRANSCRIPT_PATH = os.getenv("HIVE_TRANSCRIPT_PATH", "")
+
+class TranscriptStore(WriteBehindState):
+    """
+    Append-only transcript log in SQLite (WAL mode), usable as shared session
+    state by every worker on one host. Batches are committed on a worker
+    thread; sessions are read back one at a time, only when a session id is
+    missing from memory or another worker has added to it.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str = TRANSCRIPT_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._db = None
+        self._reader = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages (session_id TEXT, seq INTEGER, role TEXT, agent TEXT, "
+                "content TEXT, created_at REAL, PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS summaries (session_id TEXT PRIMARY KEY, summary TEXT, "
+                             "summary_upto INTEGER)")
+            self._db.commit()
+            # Separate connection for lookups; WAL lets it read while a batch is being written.
+            # They are indexed point reads, fast enough to run inline on the event loop.
+            self._reader = sqlite3.connect(path, check_same_thread=False)
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    async def _store(self, messages: list, summaries: dict):
+        await asyncio.to_thread(self._write, messages, summaries)
+
+    def _write(self, messages: list, summaries: dict):
+        with self._db:
+            # The next free seq is taken at commit time, so if another worker
+            # appended to the same session concurrently nothing is lost; the
+            # stored order wins and version() tells every worker to reload
+            self._db.executemany(
+                "INSERT INTO messages SELECT ?1, COALESCE(MAX(seq) + 1, 0), ?2, ?3, ?4, ?5 "
+                "FROM messages WHERE session_id = ?1",
+                [(session_id, role, agent, content, created_at)
+                 for session_id, seq, role, agent, content, created_at in messages]
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)",
+                [(session_id, summary, upto) for session_id, (summary, upto) in summaries.items()]
+            )
+
+    async def _fetch_newest(self, session_id: str, limit: int) -> tuple:
+        rows = self._reader.execute(
+            "SELECT seq, role, agent, content FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+            (session_id, limit)
+        ).fetchall()
+        rows.reverse()
+        summary = self._reader.execute("SELECT summary, summary_upto FROM summaries WHERE session_id = ?",
+                                       (session_id,)).fetchone()
+        return rows, summary
+
+    async def _fetch_range(self, session_id: str, start: int, end: int) -> list:
+        return self._reader.execute(
+            "SELECT seq, role, agent, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_id, start, end)
+        ).fetchall()
+
+    async def _stored_total(self, session_id: str) -> int:
+        (last_seq,) = self._reader.execute("SELECT MAX(seq) FROM messages WHERE session_id = ?",
+                                           (session_id,)).fetchone()
+        return last_seq + 1 if last_seq is not None else 0
+
+    async def _close(self):
+        self._reader.close()
+        self._db.close()
+        self._db = None
+
+    def stats(self) -> dict:
+        return {**super().stats(), "path": self.path or None}
@@ -0,0 +1,170 @@
+import os
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient, APIStatusError, APIConnectionError
+
+from . import metrics
+
+# Connection pool shared by every LLM call (override via environment)
+MAX_CONNECTIONS = int(os.getenv("HIVE_LLM_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HIVE_LLM_MAX_KEEPALIVE", "50"))
+KEEPALIVE_EXPIRY = float(os.getenv("HIVE_LLM_KEEPALIVE_EXPIRY", "60"))
+CONNECT_TIMEOUT = float(os.getenv("HIVE_LLM_CONNECT_TIMEOUT", "5"))
+
+# Read timeout per conversation phase, in seconds
+PHASE_TIMEOUTS = {
+    "initial_response": float(os.getenv("HIVE_LLM_TIMEOUT_INITIAL_RESPONSE", "30")),
+    "autonomous_discussion": float(os.getenv("HIVE_LLM_TIMEOUT_AUTONOMOUS_DISCUSSION", "20")),
+    "final_round": float(os.getenv("HIVE_LLM_TIMEOUT_FINAL_ROUND", "30")),
+    "summary": float(os.getenv("HIVE_LLM_TIMEOUT_SUMMARY", "60"))
+}
+
+# Retry policy: jittered exponential backoff, or the server's retry-after when it sends one
+MAX_RETRIES = int(os.getenv("HIVE_LLM_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("HIVE_LLM_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("HIVE_LLM_RETRY_MAX_DELAY", "8"))
+RETRY_AFTER_LIMIT = float(os.getenv("HIVE_LLM_RETRY_AFTER_LIMIT", "30"))  # give up rather than wait longer
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Connections to open at startup so the first burst skips TLS setup (0 disables)
+WARM_CONNECTIONS = int(os.getenv("HIVE_LLM_WARM_CONNECTIONS", "0"))
+
+def phase_timeout(phase: str, read: float = None) -> httpx.Timeout:
+    """Request timeout for `phase`; `read` overrides the phase's read timeout (e.g. from a route)"""
+    if read is None:
+        read = PHASE_TIMEOUTS.get(phase, PHASE_TIMEOUTS["initial_response"])
+    return httpx.Timeout(read, connect=CONNECT_TIMEOUT)
+
+def retry_after(error: Exception):
+    """Seconds the server asked us to wait, or None if it didn't say"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def should_retry(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError):  # includes timeouts
+        return True
+    if not isinstance(error, APIStatusError):
+        return False
+    should = error.response.headers.get("x-should-retry")
+    if should in ("true", "false"):
+        return should == "true"
+    return error.status_code in RETRYABLE_STATUS
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+class Transport:
+    """
+    One pooled HTTP client for all LLM calls. Keep-alive connections are
+    reused across sessions, calls beyond the pool size wait for a free slot
+    instead of opening new handshakes, and retries are handled here (the
+    SDK's own retries are off) so they can honour retry-after.
+    """
+
+    def __init__(self, api_key: str = None, max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS, keepalive_expiry: float = KEEPALIVE_EXPIRY,
+                 max_retries: int = MAX_RETRIES):
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections,
+                                keepalive_expiry=keepalive_expiry),
+            timeout=phase_timeout("initial_response")
+        )
+        self.client = AsyncAnthropic(api_key=api_key, http_client=self.http_client, max_retries=0)
+        self.slots = asyncio.Semaphore(max_connections)
+        self.in_flight = 0
+        self.retries = 0
+        self.failures = 0
+        self.cancelled = 0  # calls abandoned mid-request because nobody wanted the answer
+
+    async def call(self, attempt_call, can_retry=None, timing: dict = None):
+        """
+        Await attempt_call() while holding a connection slot, retrying
+        transient failures. can_retry() is checked before each retry so a
+        stream that already delivered text to the client is not replayed.
+        Time spent waiting for a slot is added to timing["queue_wait"].
+        """
+        attempt = 0
+        while True:
+            try:
+                waiting_since = time.perf_counter()
+                async with self.slots:
+                    if timing is not None:
+                        timing["queue_wait"] += time.perf_counter() - waiting_since
+                    self.in_flight += 1
+                    try:
+                        return await attempt_call()
+                    except asyncio.CancelledError:
+                        self.cancelled += 1
+                        raise
+                    finally:
+                        self.in_flight -= 1
+            except Exception as e:
+                if attempt >= self.max_retries or not should_retry(e) or (can_retry is not None and not can_retry()):
+                    self.failures += 1
+                    metrics.llm_failures.inc()
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                elif delay > RETRY_AFTER_LIMIT:
+                    self.failures += 1
+                    metrics.llm_failures.inc()
+                    raise
+                attempt += 1
+                self.retries += 1
+                metrics.llm_retries.inc()
+                print(f"🔁 LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def warm_up(self, connections: int = WARM_CONNECTIONS):
+        """Open `connections` keep-alive connections to the API ahead of the first request"""
+        connections = min(connections, self.max_connections)
+        if connections <= 0:
+            return
+        url = str(self.client.base_url)
+
+        async def touch():
+            try:
+                await self.http_client.head(url, timeout=httpx.Timeout(CONNECT_TIMEOUT))
+                return True
+            except httpx.HTTPError as e:
+                print(f"❌ Connection warm-up failed: {e}")
+                return False
+
+        started = time.perf_counter()
+        warmed = sum(await asyncio.gather(*[touch() for _ in range(connections)]))
+        print(f"🔥 Warmed {warmed}/{connections} LLM connections in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "retries": self.retries,
+            "failures": self.failures,
+            "cancelled": self.cancelled
+        }
+
+    async def aclose(self):
+        await self.client.close()
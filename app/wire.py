@@ -0,0 +1,104 @@
+import os
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: faster encoding for the compact protocol
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: binary frames
+    msgpack = None
+
+from .prompts import AGENTS
+
+# Events published within this window go out as one frame (compact protocols only)
+COALESCE_MS = float(os.getenv("HIVE_WS_COALESCE_MS", "15"))
+
+# Protocol names, offered by the client as a WebSocket subprotocol or ?protocol=
+JSON_PROTOCOL = "json"  # default: one verbose JSON object per frame, as always
+COMPACT_PROTOCOL = "hive.compact.v1"  # short keys, integer codes, coalesced JSON arrays
+MSGPACK_PROTOCOL = "hive.msgpack.v1"  # same as compact, as MessagePack binary frames
+SSE_PROTOCOL = "sse"  # text/event-stream records, for room viewers on SSE
+
+# Short field codes and small integer ids for the values that repeat in every event
+FIELD_CODES = {"agent": "a", "content": "c", "status": "s", "seq": "q", "session_id": "i",
+               "message": "m", "event": "e"}
+AGENT_IDS = {name: i for i, name in enumerate(["user"] + AGENTS)}
+STATUS_IDS = {"typing": 1, "delta": 2, "done": 3, "awaiting_user": 4}
+
+def available_protocols() -> list:
+    protocols = [COMPACT_PROTOCOL]
+    if msgpack is not None:
+        protocols.append(MSGPACK_PROTOCOL)
+    return protocols
+
+def negotiate(offered_subprotocols: list, requested: str = None):
+    """
+    Pick the wire protocol for a connection: the first compact protocol the
+    client offered as a subprotocol, else ?protocol=, else plain JSON.
+    Returns (protocol, subprotocol to accept or None).
+    """
+    supported = available_protocols()
+    for offered in offered_subprotocols:
+        if offered in supported:
+            return offered, offered
+    if requested in supported:
+        return requested, None
+    return JSON_PROTOCOL, None
+
+def hello_frame() -> dict:
+    """First frame on a compact connection: the code tables needed to decode everything after it"""
+    return {"t": "hello", "fields": FIELD_CODES, "agents": AGENT_IDS, "statuses": STATUS_IDS}
+
+def compact_event(event: dict) -> dict:
+    """
+    Short-key form of an event. "role" is dropped (it follows from the
+    agent id), agent and status become integers, absent content is omitted
+    and unknown keys pass through unchanged.
+    """
+    compact = {}
+    for key, value in event.items():
+        if key == "role" or (key == "content" and value is None):
+            continue
+        if key == "agent":
+            value = AGENT_IDS.get(value, value)
+        elif key == "status":
+            value = STATUS_IDS.get(value, value)
+        compact[FIELD_CODES.get(key, key)] = value
+    return compact
+
+def encode_json(payload) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+def encode_event(protocol: str, event: dict):
+    """One event's part of a frame; rooms encode it once and reuse it for every viewer"""
+    if protocol == JSON_PROTOCOL:
+        return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+    if protocol == SSE_PROTOCOL:
+        return f"id: {event['seq']}\ndata: {json.dumps(event)}\n\n"
+    if protocol == MSGPACK_PROTOCOL:
+        return msgpack.packb(compact_event(event), use_bin_type=True)
+    return encode_json(compact_event(event))
+
+def join_frames(protocol: str, encoded: list) -> list:
+    """
+    Frames for a batch of encode_event() results as (is_binary, payload)
+    pairs. Plain JSON keeps one event per frame, byte-for-byte what
+    send_json produced; compact protocols send the whole batch as one array
+    of compact events, and SSE as one chunk of records.
+    """
+    if protocol == JSON_PROTOCOL:
+        return [(False, payload) for payload in encoded]
+    if protocol == SSE_PROTOCOL:
+        return [(False, "".join(encoded))]
+    if protocol == MSGPACK_PROTOCOL:
+        return [(True, msgpack.Packer().pack_array_header(len(encoded)) + b"".join(encoded))]
+    return [(False, "[" + ",".join(encoded) + "]")]
+
+def encode_frames(protocol: str, events: list) -> list:
+    """Frames for a batch of events as (is_binary, payload) pairs (see join_frames)"""
+    return join_frames(protocol, [encode_event(protocol, event) for event in events])
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: incremental context renderer vs. re-concatenating history.
+
+"legacy" reproduces the original build_context/build_enhanced_context, which
+rebuilt history_text with += over conversation_history[-20:] / [-15:] for
+every agent on every turn. "renderer" is the current session-based builder
+that joins pre-rendered lines within a token budget. Each turn builds both prompts for all three
+agents and then appends one message, at 1k and 100k messages of history.
+Each measurement is the best of REPEATS runs with the garbage collector
+off (as timeit does), since a single run is short enough for scheduler
+noise or a collection pass over the large history to swing it either way.
+"""
+
+import os
+import gc
+import time
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+
+from app import orchestrator
+from app.orchestrator import AGENTS, build_context, build_enhanced_context
+from app.prompts import ROLE_PROMPTS, CONVERSATION_PROMPTS
+from app.sessions import Session
+
+HISTORY_SIZES = [1_000, 100_000]
+TURNS = 2_000
+REPEATS = 5
+# Typical agent reply length (2-4 sentences)
+MESSAGE = ("Speed drives breakthroughs that save lives, but excessive caution kills innovation potential. "
+           "We should ship a minimum viable safeguard layer first, then iterate in public with clear metrics. "
+           "What would it take to run a six-week pilot with real users and a hard rollback plan?")
+
+def legacy_build_context(history: list, agent_name: str) -> str:
+    role_instruction = ROLE_PROMPTS[agent_name]
+    phase_instruction = CONVERSATION_PROMPTS["initial_response"]
+    history_text = ""
+    for msg in history[-20:]:
+        if msg['role'] == "user":
+            history_text += f"User: {msg['content']}\n"
+        else:
+            history_text += f"Previous response: {msg['content']}\n"
+    return f"{role_instruction}\n\nConversation so far:\n{history_text}\n{phase_instruction}"
+
+def legacy_build_enhanced_context(history: list, agent_name: str, round_number: int) -> str:
+    role_instruction = ROLE_PROMPTS[agent_name]
+    history_text = ""
+    for msg in history[-15:]:
+        if msg['role'] == "user":
+            history_text += f"User: {msg['content']}\n"
+        else:
+            history_text += f"Previous response: {msg['content']}\n"
+    phase_instruction = f"{CONVERSATION_PROMPTS['autonomous_discussion']} (Discussion round {round_number})"
+    return f"{role_instruction}\n\nRecent conversation:\n{history_text}\n{phase_instruction}"
+
+def message_fields(i: int) -> tuple:
+    role = "user" if i % 4 == 0 else "agent"
+    agent = "user" if role == "user" else AGENTS[i % 3]
+    return role, agent, f"{MESSAGE} ({i})"
+
+def bench_legacy(size: int) -> float:
+    history = []
+    for i in range(size):
+        role, agent, content = message_fields(i)
+        history.append({"role": role, "agent": agent, "content": content})
+
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    for turn in range(TURNS):
+        for agent in AGENTS:
+            legacy_build_context(history, agent)
+            legacy_build_enhanced_context(history, agent, turn)
+        role, agent, content = message_fields(size + turn)
+        history.append({"role": role, "agent": agent, "content": content})
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+def bench_renderer(size: int) -> float:
+    session = Session("bench", max_messages=size)
+    for i in range(size):
+        session.append(*message_fields(i))
+
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    for turn in range(TURNS):
+        for agent in AGENTS:
+            build_context(session, agent)
+            build_enhanced_context(session, agent, "autonomous_discussion", turn)
+        session.append(*message_fields(size + turn))
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+if __name__ == "__main__":
+    # Rolling summaries are LLM calls, not prompt building; keep them out of the timing
+    orchestrator.SUMMARY_BATCH = 0
+    print("📏 CONTEXT BUILD MICROBENCHMARK")
+    print(f"   {TURNS} turns × {len(AGENTS)} agents × 2 prompt builders per history size, best of {REPEATS}")
+    print("=" * 70)
+    for size in HISTORY_SIZES:
+        legacy = min(bench_legacy(size) for _ in range(REPEATS))
+        renderer = min(bench_renderer(size) for _ in range(REPEATS))
+        prompts = TURNS * len(AGENTS) * 2
+        print(f"🔸 {size:>7,} messages of history")
+        print(f"   legacy:   {legacy * 1e6 / prompts:7.2f} µs/prompt ({legacy:.3f}s total)")
+        print(f"   renderer: {renderer * 1e6 / prompts:7.2f} µs/prompt ({renderer:.3f}s total)")
+        print(f"   speedup:  {legacy / renderer:.2f}x")
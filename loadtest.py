@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Concurrent load generator for /ws-chat and /chat-stream.
+
+Start the server against the in-process fake backend so runs are offline,
+deterministic and free:
+
+    HIVE_LLM_BACKEND=fake HIVE_MAX_DISCUSSIONS_PER_CLIENT=1000 HIVE_LLM_CALLS_PER_MINUTE_PER_CLIENT=0 \
+        uvicorn app.main:app --host 127.0.0.1 --port 8000
+
+then open hundreds of sessions at once:
+
+    python loadtest.py --ws-sessions 200 --sse-sessions 200 --rounds 2
+
+Reported per transport: time-to-first-event (message sent -> first event
+back), turn latency (an agent's typing event -> its done event), failures and
+completed sessions per second. --protocol hive.compact.v1 (or
+hive.msgpack.v1, if msgpack is installed) exercises the compact WebSocket
+wire protocol instead of plain JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import websockets
+
+try:
+    import msgpack
+except ImportError:  # only needed for --protocol hive.msgpack.v1
+    msgpack = None
+
+def percentile(samples: list, pct: float):
+    """Nearest-rank percentile; None when there are no samples"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+class SessionResult:
+    __slots__ = ("first_event", "turn_latencies", "ok", "error")
+
+    def __init__(self):
+        self.first_event = None
+        self.turn_latencies = []
+        self.ok = False
+        self.error = None
+
+def track_event(result: SessionResult, event: dict, sent_at: float, typing_started: dict):
+    now = time.perf_counter()
+    if result.first_event is None:
+        result.first_event = now - sent_at
+    status = event.get("status")
+    if status == "typing":
+        typing_started[event["agent"]] = now
+    elif status == "done" and event.get("agent") in typing_started:
+        result.turn_latencies.append(now - typing_started.pop(event["agent"]))
+
+class CompactDecoder:
+    """Turns compact wire frames back into verbose event dicts using the server's hello frame"""
+
+    def __init__(self):
+        self.fields = self.agents = self.statuses = None
+
+    def decode(self, message) -> list:
+        payload = msgpack.unpackb(message, raw=False) if isinstance(message, bytes) else json.loads(message)
+        if isinstance(payload, dict) and payload.get("t") == "hello":
+            self.fields = {code: name for name, code in payload["fields"].items()}
+            self.agents = {code: name for name, code in payload["agents"].items()}
+            self.statuses = {code: name for name, code in payload["statuses"].items()}
+            return []
+        events = []
+        for compact in payload:
+            event = {self.fields.get(key, key): value for key, value in compact.items()}
+            if "agent" in event:
+                event["agent"] = self.agents.get(event["agent"], event["agent"])
+            if "status" in event:
+                event["status"] = self.statuses.get(event["status"], event["status"])
+            events.append(event)
+        return events
+
+async def run_ws_session(base_url: str, args) -> SessionResult:
+    result = SessionResult()
+    uri = base_url.replace("http", "ws", 1) + f"/ws-chat?session_id=load-{uuid.uuid4().hex}"
+    try:
+        compact = args.protocol != "json"
+        subprotocols = [args.protocol] if compact else None
+        async with websockets.connect(uri, max_size=None, subprotocols=subprotocols) as websocket:
+            if compact and websocket.subprotocol != args.protocol:
+                raise RuntimeError(f"server did not accept {args.protocol}")
+            decoder = CompactDecoder()
+            sent_at = time.perf_counter()
+            await websocket.send(json.dumps({
+                "message": args.message,
+                "temperature": 0.7,
+                "autonomous_rounds": args.rounds,
+                "stream": args.stream,
+                "cache": False,
+                "pacing": args.pacing
+            }))
+            typing_started = {}
+            async for message in websocket:
+                events = decoder.decode(message) if compact else [json.loads(message)]
+                for event in events:
+                    track_event(result, event, sent_at, typing_started)
+                    if event.get("status") == "awaiting_user":
+                        result.ok = True
+                if result.ok:
+                    break
+    except Exception as e:
+        result.error = repr(e)
+    return result
+
+async def run_sse_session(client: httpx.AsyncClient, base_url: str, args) -> SessionResult:
+    result = SessionResult()
+    body = {
+        "message": args.message,
+        "temperature": 0.7,
+        "session_id": f"load-{uuid.uuid4().hex}",
+        "stream": args.stream,
+        "cache": False,
+        "pacing": args.pacing
+    }
+    try:
+        sent_at = time.perf_counter()
+        typing_started = {}
+        async with client.stream("POST", f"{base_url}/chat-stream", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                if event.get("event") == "complete":
+                    result.ok = True
+                    break
+                track_event(result, event, sent_at, typing_started)
+    except Exception as e:
+        result.error = repr(e)
+    return result
+
+def report(name: str, results: list, duration: float):
+    completed = [r for r in results if r.ok]
+    failures = [r for r in results if not r.ok]
+    first_events = [r.first_event for r in results if r.first_event is not None]
+    turns = [latency for r in results for latency in r.turn_latencies]
+
+    def ms(value):
+        return f"{value * 1000:8.1f}ms" if value is not None else "       n/a"
+
+    print(f"🔸 {name}: {len(completed)}/{len(results)} sessions completed in {duration:.1f}s")
+    print(f"   sessions/sec:        {len(completed) / duration:.2f}")
+    print(f"   time-to-first-event: p50 {ms(percentile(first_events, 50))}  p95 {ms(percentile(first_events, 95))}  "
+          f"p99 {ms(percentile(first_events, 99))}")
+    print(f"   turn latency:        p50 {ms(percentile(turns, 50))}  p95 {ms(percentile(turns, 95))}  "
+          f"p99 {ms(percentile(turns, 99))}  ({len(turns)} turns)")
+    if failures:
+        print(f"   ❌ failures: {len(failures)} (first: {failures[0].error})")
+
+async def main(args):
+    base_url = args.url.rstrip("/")
+    print("🚀 HIVE LOAD TEST")
+    print(f"📍 Target: {base_url}")
+    print(f"⚙️  {args.ws_sessions} WebSocket + {args.sse_sessions} SSE sessions, {args.rounds} autonomous rounds")
+    print("=" * 70)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        ws_tasks = [asyncio.create_task(run_ws_session(base_url, args)) for _ in range(args.ws_sessions)]
+        sse_tasks = [asyncio.create_task(run_sse_session(client, base_url, args)) for _ in range(args.sse_sessions)]
+        ws_results = await asyncio.gather(*ws_tasks)
+        ws_duration = time.perf_counter() - start
+        sse_results = await asyncio.gather(*sse_tasks)
+        duration = time.perf_counter() - start
+
+    if ws_results:
+        report("/ws-chat", ws_results, ws_duration)
+    if sse_results:
+        report("/chat-stream", sse_results, duration)
+    if ws_results and sse_results:
+        report("all sessions", ws_results + sse_results, duration)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load test for the Hive chat server")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--ws-sessions", type=int, default=100)
+    parser.add_argument("--sse-sessions", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2, help="autonomous_rounds per WebSocket session (2-8)")
+    parser.add_argument("--stream", action="store_true", help="request token-level delta events")
+    parser.add_argument("--pacing", choices=["natural", "none"], default="natural",
+                        help="presentation pacing requested by each session")
+    parser.add_argument("--protocol", choices=["json", "hive.compact.v1", "hive.msgpack.v1"], default="json",
+                        help="WebSocket wire protocol to negotiate")
+    parser.add_argument("--message", default="Should we prioritize AI safety or innovation speed?")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    asyncio.run(main(parser.parse_args()))
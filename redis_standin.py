@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Local in-memory stand-in for a Redis server, for trying the redis session
+state backend without installing Redis. Speaks enough of the protocol
+(RESP2) for app/state.py: PING, AUTH, SELECT, MULTI/EXEC, RPUSH, LLEN,
+LRANGE, HSET, HMGET, EXPIRE, DEL and FLUSHDB. Data is lost when it exits.
+
+    python redis_standin.py --port 6380
+    HIVE_STATE_BACKEND=redis HIVE_REDIS_URL=redis://127.0.0.1:6380/0 \\
+        uvicorn app.main:app --workers 4
+"""
+
+import argparse
+import asyncio
+import time
+
+class StandinStore:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    def _live(self, key: str):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def execute(self, command: list):
+        name = command[0].upper()
+        args = command[1:]
+        if name == "PING":
+            return "PONG"
+        if name in ("AUTH", "SELECT", "FLUSHDB"):
+            if name == "FLUSHDB":
+                self.data.clear()
+                self.expires.clear()
+            return "OK"
+        if name == "RPUSH":
+            values = self._live(args[0])
+            if values is None:
+                values = self.data[args[0]] = []
+            values.extend(args[1:])
+            return len(values)
+        if name == "LLEN":
+            return len(self._live(args[0]) or [])
+        if name == "LRANGE":
+            values = self._live(args[0]) or []
+            start, stop = int(args[1]), int(args[2])
+            if start < 0:
+                start = max(0, len(values) + start)
+            stop = len(values) + stop if stop < 0 else min(stop, len(values) - 1)
+            return values[start:stop + 1]
+        if name == "HSET":
+            fields = self._live(args[0])
+            if fields is None:
+                fields = self.data[args[0]] = {}
+            added = 0
+            for field, value in zip(args[1::2], args[2::2]):
+                added += field not in fields
+                fields[field] = value
+            return added
+        if name == "HMGET":
+            fields = self._live(args[0]) or {}
+            return [fields.get(field) for field in args[1:]]
+        if name == "EXPIRE":
+            if self._live(args[0]) is None:
+                return 0
+            self.expires[args[0]] = time.monotonic() + int(args[1])
+            return 1
+        if name == "DEL":
+            removed = 0
+            for key in args:
+                removed += self._live(key) is not None
+                self.data.pop(key, None)
+                self.expires.pop(key, None)
+            return removed
+        return RuntimeError(f"ERR unknown command '{command[0]}'")
+
+def encode(reply) -> bytes:
+    if isinstance(reply, RuntimeError):
+        return f"-{reply}\r\n".encode("utf-8")
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode(item) for item in reply)
+    if reply in ("OK", "PONG", "QUEUED"):
+        return f"+{reply}\r\n".encode("utf-8")
+    data = reply.encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+async def read_command(reader: asyncio.StreamReader) -> list:
+    header = await reader.readuntil(b"\r\n")
+    if not header.startswith(b"*"):
+        raise ConnectionError("only RESP arrays are supported")
+    command = []
+    for _ in range(int(header[1:-2])):
+        length = int((await reader.readuntil(b"\r\n"))[1:-2])
+        command.append((await reader.readexactly(length + 2))[:-2].decode("utf-8"))
+    return command
+
+async def start_standin(host: str = "127.0.0.1", port: int = 6380):
+    """Start serving and return the asyncio server (close() it to stop)"""
+    store = StandinStore()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        transaction = None  # commands queued since MULTI
+        try:
+            while True:
+                command = await read_command(reader)
+                name = command[0].upper()
+                if name == "MULTI":
+                    transaction = []
+                    reply = "OK"
+                elif name == "EXEC":
+                    # Nothing else runs in between, so the queued commands apply atomically
+                    reply = [store.execute(queued) for queued in transaction or []]
+                    transaction = None
+                elif transaction is not None:
+                    transaction.append(command)
+                    reply = "QUEUED"
+                else:
+                    reply = store.execute(command)
+                writer.write(encode(reply))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+async def main(args):
+    server = await start_standin(args.host, args.port)
+    print(f"🗄️ Redis stand-in listening on {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory Redis stand-in for the Hive session state backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for admission control in front of discussions.
+
+Runs offline. Discussions queue for a free slot up to the queue timeout and
+are then rejected with Overloaded and a retry-after hint, clients over their
+per-minute call budget are rejected at once, and a slot comes back whether
+a discussion finishes, fails or is cancelled. The HTTP endpoints turn a
+rejection into 429 with a Retry-After header.
+"""
+
+import asyncio
+import os
+import time
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+os.environ["HIVE_LLM_BACKEND"] = "fake"
+os.environ.setdefault("ANTHROPIC_API_KEY", "offline")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import Admission, Overloaded, current_client
+from app.events import EventLog
+
+async def expect_overloaded(admit) -> Overloaded:
+    try:
+        await admit
+    except Overloaded as e:
+        return e
+    raise AssertionError("should have been rejected")
+
+async def check_queueing():
+    """Past the limit a discussion waits for a slot, and is rejected once the queue time runs out"""
+    admission = Admission(max_discussions=10, max_per_client=2, queue_seconds=0.3)
+    await admission.admit("alice")
+    await admission.admit("alice")
+    await admission.admit("bob")  # other clients are not held up by alice's limit
+
+    waiting = asyncio.create_task(admission.admit("alice"))
+    await asyncio.sleep(0.05)
+    assert not waiting.done() and admission.waiting == 1, "the third discussion should queue"
+    admission.release("alice")
+    await asyncio.wait_for(waiting, 0.1)
+    assert admission.per_client["alice"] == 2 and admission.queued == 1
+
+    started = time.monotonic()
+    error = await expect_overloaded(admission.admit("alice"))
+    waited = time.monotonic() - started
+    assert error.reason == "concurrency" and error.retry_after == 1, (error.reason, error.retry_after)
+    assert 0.25 <= waited < 0.5, f"gave up after {waited:.2f}s instead of the 0.3s queue time"
+    assert admission.waiting == 0 and admission.rejected["concurrency"] == 1
+
+    full = Admission(max_discussions=1, max_per_client=4, queue_seconds=0)
+    await full.admit("alice")
+    error = await expect_overloaded(full.admit("bob"))
+    assert error.reason == "concurrency" and error.retry_after == 1 and full.running == 1
+    print("✅ Queues up to the limit, then rejects with Overloaded and Retry-After")
+
+async def check_rate():
+    """A client over its per-minute LLM call budget is turned away until the window frees up"""
+    admission = Admission(client_calls_per_minute=2)
+    current_client.set("alice")
+    await admission.throttle_call()
+    await admission.throttle_call()
+    error = await expect_overloaded(admission.admit("alice"))
+    assert error.reason == "rate" and 59 <= error.retry_after <= 60, (error.reason, error.retry_after)
+    await admission.admit("bob")
+    assert admission.running == 1
+    print(f"✅ Rate-limited client rejected with Retry-After {error.retry_after}s; others admitted")
+
+async def check_cancelled_wait():
+    """A discussion cancelled while queued doesn't take or leak a slot"""
+    admission = Admission(max_discussions=1, queue_seconds=5)
+    await admission.admit("alice")
+    waiting = asyncio.create_task(admission.admit("bob"))
+    await asyncio.sleep(0.05)
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+    assert (admission.waiting, admission.running, admission.per_client) == (0, 1, {"alice": 1})
+    print("✅ Cancelling a queued discussion leaves the counts as they were")
+
+async def check_release():
+    """start_admitted gives the slot back when the discussion completes, fails or is cancelled"""
+    admission = Admission(max_discussions=3, max_per_client=3)
+    original, main.admission = main.admission, admission
+
+    async def finishes(emit):
+        await emit({"role": "agent", "agent": "anchor", "content": "Done.", "status": "done"})
+
+    async def fails(emit):
+        raise RuntimeError("backend exploded")
+
+    async def runs_forever(emit):
+        await asyncio.sleep(60)
+
+    try:
+        logs = [EventLog(), EventLog(), EventLog()]
+        tasks = []
+        for log, produce in zip(logs, (finishes, fails, runs_forever)):
+            await admission.admit("alice")
+            tasks.append(main.start_admitted(log, produce, "alice", "standard", "admission-test"))
+        await asyncio.sleep(0.01)
+        assert admission.running == 1, "finished and failed discussions should have released their slots"
+        await logs[2].interrupt()
+        assert tasks[2].cancelled()
+        await asyncio.sleep(0)
+        assert (admission.running, admission.per_client) == (0, {}), admission.stats()
+    finally:
+        main.admission = original
+    print("✅ Slots are released on completion, failure and cancellation")
+
+def check_http():
+    """Rejected HTTP requests answer 429 with the Retry-After header"""
+    client = TestClient(main.app)
+    original, main.admission = main.admission, Admission(max_discussions=0, queue_seconds=0)
+    try:
+        for path in ("/chat", "/chat-stream"):
+            response = client.post(path, json={"message": "Hello", "session_id": "admission-http"})
+            assert response.status_code == 429, (path, response.status_code)
+            assert response.headers["Retry-After"] == "1" and response.json()["reason"] == "concurrency"
+    finally:
+        main.admission = original
+    print("✅ /chat and /chat-stream answer 429 with Retry-After when full")
+
+async def run_admission_checks():
+    await check_queueing()
+    await check_rate()
+    await check_cancelled_wait()
+    await check_release()
+
+def test_admission():
+    print("🚀 Testing admission control")
+    print("=" * 70)
+    asyncio.run(run_admission_checks())
+    check_http()
+
+if __name__ == "__main__":
+    print("🧪 RUNNING ADMISSION TEST...\n")
+    test_admission()
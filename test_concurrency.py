@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that simultaneous sessions don't block each other.
+
+Runs offline: the LLM backend is swapped for the in-process fake with a fixed
+API latency, so N concurrent sessions should finish in roughly the time of
+one session instead of N times as long.
+"""
+
+import os
+import asyncio
+import time
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+
+from app import orchestrator
+from app.backends import FakeBackend
+
+FAKE_API_LATENCY_MS = 500  # per LLM call
+CONCURRENT_SESSIONS = 10
+
+async def time_sessions(session_count: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        orchestrator.run_orchestration(f"Question {i}", 0.7, f"session-{i}", use_cache=False)
+        for i in range(session_count)
+    ])
+    return time.perf_counter() - start
+
+async def test_concurrent_sessions():
+    """N simultaneous sessions should take about as long as one"""
+    print("🚀 Testing concurrent sessions against a slow fake API")
+    print("=" * 70)
+
+    original_backend = orchestrator.backend
+    orchestrator.backend = FakeBackend(latency_ms=FAKE_API_LATENCY_MS, jitter_ms=0, tokens_per_second=0, error_rate=0)
+    try:
+        single = await time_sessions(1)
+        print(f"⏱️  1 session: {single:.2f}s")
+
+        concurrent = await time_sessions(CONCURRENT_SESSIONS)
+        print(f"⏱️  {CONCURRENT_SESSIONS} concurrent sessions: {concurrent:.2f}s")
+    finally:
+        orchestrator.backend = original_backend
+        await orchestrator.session_state.aclose()  # store writes still queued behind the sessions
+        await orchestrator.transport.aclose()
+
+    # A blocking client would take CONCURRENT_SESSIONS times as long
+    assert concurrent < single * 2, (
+        f"Sessions blocked each other: {concurrent:.2f}s vs {single:.2f}s for one"
+    )
+    print("✅ Sessions ran concurrently without stalling the event loop")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING CONCURRENCY TEST...\n")
+    asyncio.run(test_concurrent_sessions())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-budgeted context window.
+
+Runs offline: sessions are built in memory and only the window boundaries
+and the prompts built from them are checked. The newest messages must
+always be in the prompt, chunk boundaries included, and the older part must
+stay within budget and only move in whole chunks.
+"""
+
+import os
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+
+from app import orchestrator
+from app.orchestrator import CACHE_CHUNK, CONTEXT_TOKEN_BUDGETS, build_enhanced_context
+from app.sessions import Session
+
+def prompt_text(prompt: dict) -> str:
+    return "".join(block["text"] for block in prompt["messages"][0]["content"])
+
+def test_full_chunk_over_budget():
+    """A chunk-aligned total whose newest chunk is over budget still keeps that chunk"""
+    budget = CONTEXT_TOKEN_BUDGETS["autonomous_discussion"]
+    session = Session("window")
+    question = "Q" * 1880  # ~474 tokens
+    session.append("user", "user", question)
+    for i in range(CACHE_CHUNK - 1):
+        session.append("agent", "catalyst", f"{i}" + "r" * 480)  # ~122 tokens each
+
+    start, split = session.window(budget, CACHE_CHUNK)
+    assert session.total == CACHE_CHUNK
+    assert start <= split < session.total, (start, split)
+    text = prompt_text(build_enhanced_context(session, "anchor"))
+    assert question in text, "the user's question fell out of the prompt"
+    assert f"{CACHE_CHUNK - 2}r" in text, "the newest reply fell out of the prompt"
+    print(f"✅ {CACHE_CHUNK} messages over a {budget}-token budget: window ({start}, {split}) keeps them")
+
+def test_window_invariants():
+    """For every history length the newest message is included and the older part fits the budget"""
+    budget = 300
+    session = Session("window")
+    previous = None
+    for i in range(1, 200):
+        session.append("agent" if i % 4 else "user", "weaver", f"message {i} " + "x" * (37 * (i % 9)))
+        start, split = session.window(budget, CACHE_CHUNK)
+        assert start % CACHE_CHUNK == 0 and split % CACHE_CHUNK == 0, (start, split)
+        assert 0 < session.total - split <= CACHE_CHUNK, (session.total, split)
+        older = session.history_text(start, split)
+        assert len(older) // 4 <= budget + CACHE_CHUNK, f"older part over budget at {session.total}"
+        if previous is not None and previous[1] == split:
+            assert previous[0] == start, "older part moved within a chunk"
+        previous = (start, split)
+        assert f"message {i} " in session.history_text(split, session.total)
+    print("✅ Newest chunk always included, older part within budget and chunk-aligned for 199 lengths")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING CONTEXT WINDOW TESTS...\n")
+    orchestrator.SUMMARY_BATCH = 0  # no background summaries outside an event loop
+    test_full_chunk_over_budget()
+    test_window_invariants()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for ending autonomous discussions early once they converge.
+
+Runs offline. The ConvergenceDetector is checked on hand-written replies
+(threshold, patience, window and the 0 = off setting), then a whole
+autonomous discussion is run with the agent call replaced by a reply that
+never changes, to check that it is wrapped up with one final-round turn,
+but never before MIN_ROUNDS full rounds have run.
+"""
+
+import os
+import asyncio
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+
+from app import main
+from app.convergence import ConvergenceDetector
+from app.pacing import Pacer
+from app.sessions import Session
+
+FRESH = [
+    "Launch a community pilot in three cities next spring.",
+    "Budget constraints mean hiring two engineers before anything else.",
+    "Partnerships with local libraries could distribute hardware cheaply.",
+    "Measure retention weekly and publish dashboards openly.",
+]
+ECHO = "Launch the community pilot in three cities, with partnerships from local libraries."
+
+def test_detector_threshold():
+    """Replies score by shared shingles; only `patience` repeats in a row at the threshold converge"""
+    detector = ConvergenceDetector(threshold=0.5, patience=2, window=6)
+    for reply in FRESH:
+        assert detector.add(reply) < 0.5, reply
+    assert detector.streak == 0 and not detector.converged
+
+    assert detector.add(FRESH[0]) == 1.0, "a verbatim repeat scores 1"
+    assert detector.streak == 1 and not detector.converged, "one repeat is not enough"
+    detector.add(FRESH[1])
+    assert detector.converged, "two repeats in a row converge"
+
+    detector.add("Quantum ferrets negotiate tariffs underwater.")
+    assert detector.streak == 0 and not detector.converged, "a fresh reply resets the streak"
+
+    # Stopwords and case don't make a reply look new
+    assert detector.add(ECHO.upper().replace(" THE ", " A ")) >= 0.5
+    print("✅ Scores, threshold and patience behave as configured")
+
+def test_detector_window_and_off():
+    """Only the last `window` replies count, seen() remembers without scoring, and 0 disables"""
+    detector = ConvergenceDetector(threshold=0.5, patience=1, window=2)
+    detector.seen(FRESH[0])
+    assert detector.streak == 0 and detector.last_score == 0.0
+    detector.add(FRESH[1])
+    detector.add(FRESH[2])
+    assert detector.add(FRESH[0]) == 0.0, "a reply older than the window is forgotten"
+    assert detector.add(FRESH[2]) == 1.0 and detector.converged
+
+    off = ConvergenceDetector(threshold=0, patience=1)
+    for _ in range(5):
+        off.add(FRESH[0])
+    assert off.streak == 0 and not off.converged, "threshold 0 never ends a discussion"
+    print("✅ Window, seen() and the disabled setting behave as configured")
+
+async def run_echo_discussion(min_rounds: int, max_rounds: int = 4) -> list:
+    """Phases of every agent call in a discussion whose replies never change"""
+    phases = []
+
+    async def echo(agent, prompt, temperature, on_delta=None, use_cache=True, phase="initial_response"):
+        phases.append(phase)
+        return ECHO
+
+    async def discard(event: dict):
+        pass
+
+    session = Session("converging")
+    session.append("user", "user", "How should we roll out the program?")
+    for agent in main.AGENTS:
+        session.append("agent", agent, ECHO)  # the initial round
+
+    original = main.call_claude_with_personality, main.MIN_ROUNDS
+    main.call_claude_with_personality, main.MIN_ROUNDS = echo, min_rounds
+    pacer = Pacer(discard, mode="none")
+    try:
+        await main.conduct_concise_discussion(pacer, session, 0.7, max_rounds=max_rounds)
+    finally:
+        pacer.close()
+        main.call_claude_with_personality, main.MIN_ROUNDS = original
+    return phases
+
+async def test_min_rounds_floor():
+    """A converged discussion gets one closing turn, but only after MIN_ROUNDS full rounds"""
+    agents = len(main.AGENTS)
+    for min_rounds in (1, 2, 3):
+        phases = await run_echo_discussion(min_rounds)
+        assert len(phases) == min_rounds * agents + 1, (min_rounds, phases)
+        assert phases[-1] == "final_round" and "final_round" not in phases[:-1], phases
+        print(f"✅ MIN_ROUNDS={min_rounds}: {len(phases)} of {4 * agents} calls, ending with one final-round turn")
+
+    phases = await run_echo_discussion(min_rounds=4)
+    assert len(phases) == 4 * agents and phases[-1] == "final_round", phases
+    print(f"✅ MIN_ROUNDS at the round limit: all {len(phases)} calls run")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING CONVERGENCE TESTS...\n")
+    test_detector_threshold()
+    test_detector_window_and_off()
+    asyncio.run(test_min_rounds_floor())
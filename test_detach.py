@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for cancelling discussions nobody is watching.
+
+Runs offline against the fake LLM backend. A discussion whose last follower
+drops is cancelled after the grace period unless a client comes back, one
+whose WebSocket client closes cleanly is cancelled at once, and a finished
+discussion leaves no timer behind that could cancel the next one.
+"""
+
+import asyncio
+import faulthandler
+import os
+import time
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+os.environ["HIVE_LLM_BACKEND"] = "fake"
+os.environ["HIVE_FAKE_LATENCY_MS"] = "200"
+os.environ["HIVE_FAKE_JITTER_MS"] = "0"
+os.environ.setdefault("ANTHROPIC_API_KEY", "offline")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.events import EventLog, discussion_stats
+
+GRACE = 0.2
+
+async def endless(emit):
+    await emit({"event": "started"})
+    await asyncio.sleep(60)
+
+async def follow_briefly(log: EventLog, seconds: float):
+    async def tail():
+        async for _ in log.follow(0):
+            pass
+    follower = asyncio.create_task(tail())
+    await asyncio.sleep(seconds)
+    follower.cancel()
+    await asyncio.gather(follower, return_exceptions=True)
+
+async def check_grace():
+    """Dropped followers get GRACE seconds to come back; a reattach keeps the discussion"""
+    log = EventLog(grace=GRACE)
+    task = log.start(endless)
+    await follow_briefly(log, 0.05)
+    await asyncio.sleep(GRACE / 2)
+    await follow_briefly(log, 0.05)  # back within the grace period
+    await asyncio.sleep(GRACE / 2)
+    assert not task.done(), "cancelled although a client came back in time"
+    await asyncio.sleep(GRACE)
+    assert task.cancelled(), "an unwatched discussion kept running past the grace period"
+    print(f"✅ Cancelled {GRACE}s after the last follower dropped, not while one came back")
+
+async def check_abandon():
+    """abandon() cancels at once without followers, and leaves watched discussions alone"""
+    log = EventLog(grace=60)
+    task = log.start(endless)
+    await asyncio.sleep(0)
+    log.abandon()
+    await asyncio.gather(task, return_exceptions=True)
+    assert task.cancelled()
+
+    kept = EventLog(grace=-1)
+    task = kept.start(endless)
+    await asyncio.sleep(0)
+    kept.abandon()
+    await asyncio.sleep(0.01)
+    assert not task.done(), "a negative grace should never cancel"
+    task.cancel()
+    print("✅ abandon() cancels unwatched discussions right away (unless the grace is negative)")
+
+async def check_timer_cleared():
+    """A discussion that finishes inside the grace period doesn't leave a timer for the next one"""
+    log = EventLog(grace=GRACE)
+
+    async def short(emit):
+        await asyncio.sleep(0.1)
+
+    first = log.start(short)
+    await follow_briefly(log, 0.01)  # the timer starts here
+    await first
+    second = log.start(endless)
+    await asyncio.sleep(GRACE * 1.5)
+    assert not second.done(), "the finished discussion's timer cancelled the next one"
+    second.cancel()
+    print("✅ Finishing a discussion clears its abandon timer")
+
+def check_clean_close():
+    """Closing /ws-chat with 1000 cancels the discussion well before the grace period ends"""
+    client = TestClient(main.app)
+    abandoned = discussion_stats["abandoned"]
+    with client.websocket_connect("/ws-chat?session_id=leaving") as websocket:
+        websocket.send_json({"message": "Plan our launch", "autonomous_rounds": 8, "pacing": "none"})
+        while websocket.receive_json().get("status") != "typing":
+            pass
+        started = time.perf_counter()
+        websocket.close(code=1000)
+    while discussion_stats["abandoned"] == abandoned:
+        assert time.perf_counter() - started < 2, "a clean close did not cancel the discussion"
+        time.sleep(0.01)
+    print(f"✅ Clean close cancelled the discussion in {time.perf_counter() - started:.2f}s")
+
+async def run_event_log_checks():
+    await check_grace()
+    await check_abandon()
+    await check_timer_cleared()
+
+def test_detach():
+    print("🚀 Testing cancellation of unwatched discussions")
+    print("=" * 70)
+    asyncio.run(run_event_log_checks())
+    check_clean_close()
+
+if __name__ == "__main__":
+    print("🧪 RUNNING DETACH TEST...\n")
+    faulthandler.dump_traceback_later(60, exit=True)
+    test_detach()
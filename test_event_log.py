@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for what a session's event log retains for replay.
+
+Runs offline. Token deltas are only kept while their reply is streaming:
+once the reply's done event is logged they are dropped, including when
+several agents stream at once (parallel initial round), and a discussion
+that ends mid-reply drops whatever deltas are left. Reattaching clients
+still get the deltas of a reply that is streaming.
+"""
+
+import asyncio
+
+from app.events import EventLog
+
+def typing(agent: str) -> dict:
+    return {"role": "agent", "agent": agent, "content": None, "status": "typing"}
+
+def delta(agent: str, text: str) -> dict:
+    return {"role": "agent", "agent": agent, "content": text, "status": "delta"}
+
+def done(agent: str, text: str) -> dict:
+    return {"role": "agent", "agent": agent, "content": text, "status": "done"}
+
+def statuses(log: EventLog) -> list:
+    return [(event.get("agent"), event.get("status") or event.get("event")) for event in log.since(0)]
+
+def test_finished_replies_compacted():
+    """Each done event drops its own reply's deltas, also when replies interleave"""
+    log = EventLog()
+    log.publish({"role": "user", "content": "Go?"})
+    log.publish(typing("catalyst"))
+    log.publish(typing("anchor"))
+    for word in ("Ship", "it"):
+        log.publish(delta("catalyst", word))
+        log.publish(delta("anchor", word.lower()))
+    log.publish(done("anchor", "ship it"))
+    assert statuses(log) == [(None, None), ("catalyst", "typing"), ("anchor", "typing"),
+                             ("catalyst", "delta"), ("catalyst", "delta"), ("anchor", "done")], statuses(log)
+
+    reattached = log.since(3)  # a client that saw up to anchor's typing event
+    assert [event.get("content") for event in reattached if event["agent"] == "catalyst"] == ["Ship", "it"]
+    log.publish(done("catalyst", "Ship it"))
+    assert not any(status == "delta" for _, status in statuses(log)), statuses(log)
+    print("✅ Done events drop their reply's deltas; a streaming reply keeps them for replay")
+
+def test_bounded_by_replies():
+    """Retained events grow with replies, not with streamed tokens"""
+    log = EventLog(max_events=2000)
+    for reply in range(50):
+        agent = ("catalyst", "anchor", "weaver")[reply % 3]
+        log.publish(typing(agent))
+        for token in range(100):
+            log.publish(delta(agent, f"t{token} "))
+        log.publish(done(agent, "reply"))
+    assert len(log.events) == 100, len(log.events)
+    assert log.last_seq == 50 * 102 and log.since(0)[-1]["seq"] == log.last_seq
+    print(f"✅ 50 streamed replies of 100 tokens leave {len(log.events)} events, not {log.last_seq}")
+
+async def test_interrupted_reply():
+    """A discussion cancelled mid-reply drops the unfinished reply's deltas"""
+    log = EventLog()
+
+    async def discussion(emit):
+        await emit(typing("weaver"))
+        await emit(delta("weaver", "Half a"))
+        await asyncio.sleep(10)
+
+    task = log.start(discussion)
+    await asyncio.sleep(0.01)
+    await log.interrupt()
+    assert task.cancelled()
+    assert statuses(log) == [("weaver", "typing"), (None, "cancelled")], statuses(log)
+    print("✅ An interrupted discussion leaves no orphaned deltas")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING EVENT LOG TESTS...\n")
+    test_finished_replies_compacted()
+    test_bounded_by_replies()
+    asyncio.run(test_interrupted_reply())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for paging a session's history by message id.
+
+Sessions here hold more messages than their in-memory buffer. With a SQLite
+transcript, pages reaching below the buffer are read back from disk; with the
+in-process memory backend those messages are gone, so paging must stop at the
+oldest buffered message instead of claiming there is more. Runs offline.
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.sessions import SessionStore
+from app.state import MemoryState
+from app.transcripts import TranscriptStore
+
+BUFFER = 20
+MESSAGES = 50
+
+async def fill(store: SessionStore):
+    session = await store.get("paging")
+    for i in range(MESSAGES):
+        session.append("user" if i % 3 == 0 else "agent", "anchor", f"message {i}")
+    return session
+
+def ids(page: list) -> list:
+    return [message["id"] for message in page]
+
+async def check_stored(path: str):
+    print("🔸 sqlite transcript")
+    state = TranscriptStore(path, flush_seconds=0)
+    try:
+        session = await fill(SessionStore(max_messages=BUFFER, state=state))
+        await state.flush()
+        first = session.total - len(session.messages)
+
+        # Page back from the newest message to the very first one
+        seen, before, has_more = [], None, True
+        while has_more:
+            page, has_more = await session.page(before=before, limit=7)
+            assert page, f"empty page before {before} while has_more was true"
+            seen[:0] = ids(page)
+            before = page[0]["id"]
+        assert seen == list(range(MESSAGES)), seen
+
+        # Entirely below the buffer, from the start and ending inside it
+        page, has_more = await session.page(after=-1, limit=5)
+        assert ids(page) == [0, 1, 2, 3, 4] and has_more, (ids(page), has_more)
+        page, has_more = await session.page(before=first - 10, limit=5)
+        assert ids(page) == list(range(first - 15, first - 10)) and has_more, (ids(page), has_more)
+        page, _ = await session.page(after=first - 3, limit=5)
+        assert ids(page) == list(range(first - 2, first + 3)), ids(page)
+        assert page[0]["content"] == f"message {first - 2}"
+        print(f"   ✅ {MESSAGES} messages paged back across a {BUFFER}-message buffer")
+    finally:
+        await state.aclose()
+
+async def check_memory():
+    print("🔸 memory")
+    session = await fill(SessionStore(max_messages=BUFFER, state=MemoryState()))
+    first = session.total - len(session.messages)
+
+    seen, before, has_more = [], None, True
+    while has_more:
+        page, has_more = await session.page(before=before, limit=7)
+        assert page, f"empty page before {before} while has_more was true"
+        seen[:0] = ids(page)
+        before = page[0]["id"]
+    assert seen == list(range(first, MESSAGES)), seen
+
+    page, has_more = await session.page(after=-1, limit=5)
+    assert ids(page) == list(range(first, first + 5)) and has_more, (ids(page), has_more)
+    page, has_more = await session.page(before=first - 5, limit=5)
+    assert page == [] and not has_more, (page, has_more)
+    print(f"   ✅ paging stops at the oldest of the {BUFFER} buffered messages")
+
+async def test_history_paging():
+    print("🚀 Testing history paging beyond the in-memory buffer")
+    print("=" * 70)
+    await check_memory()
+    with tempfile.TemporaryDirectory() as directory:
+        await check_stored(os.path.join(directory, "paging.db"))
+    print("✅ History pages are complete and has_more is honest")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING HISTORY PAGING TEST...\n")
+    asyncio.run(test_history_paging())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for reply length policies.
+
+Runs offline. Checks sentence trimming of finished replies, the streaming
+SentenceLimit that stops a reply at a sentence boundary however the deltas
+are split, and that only the autonomous discussion phases are length-limited
+while initial replies (and /chat) keep the baseline.
+"""
+
+from app.length import SentenceLimit, trim_sentences
+from app.routing import DEFAULT_MAX_TOKENS, Router
+
+REPLY = 'Ship it now. Then measure what breaks (and why?) "Iterate!" And repeat.'
+
+def test_trim_sentences():
+    """Finished replies are cut after the allowed sentences, and left alone otherwise"""
+    assert trim_sentences(REPLY, 1) == "Ship it now."
+    assert trim_sentences(REPLY, 2) == "Ship it now. Then measure what breaks (and why?)"
+    assert trim_sentences(REPLY, 3) == 'Ship it now. Then measure what breaks (and why?) "Iterate!"'
+    assert trim_sentences(REPLY, 4) == REPLY, "the last sentence has no trailing space, so it isn't cut"
+    assert trim_sentences(REPLY, 0) == REPLY, "0 means no limit"
+    assert trim_sentences("Version 3.5 is out. Next.", 1) == "Version 3.5 is out."
+    assert trim_sentences("no punctuation at all", 1) == "no punctuation at all"
+    print("✅ trim_sentences cuts at sentence ends, including closing quotes and brackets")
+
+def stream(deltas: list, max_sentences: int) -> tuple:
+    limit = SentenceLimit(max_sentences)
+    forwarded, fed = "", 0
+    for delta in deltas:
+        fed += 1
+        part, stop = limit.feed(delta)
+        forwarded += part
+        if stop:
+            break
+    return forwarded, fed, limit
+
+def test_sentence_limit():
+    """A stream is stopped at the same text as trim_sentences, whatever the delta boundaries"""
+    for max_sentences in (1, 2, 3):
+        expected = trim_sentences(REPLY, max_sentences)
+        for size in (1, 3, 7, len(REPLY)):
+            deltas = [REPLY[i:i + size] for i in range(0, len(REPLY), size)] + [" more tokens."]
+            forwarded, fed, limit = stream(deltas, max_sentences)
+            assert forwarded == expected == limit.text, (max_sentences, size, forwarded)
+            assert limit.done and fed < len(deltas), "the stream should stop before running out"
+            assert limit.feed("late delta") == ("", True)
+    forwarded, fed, limit = stream(["One sentence", " without an end"], 2)
+    assert forwarded == "One sentence without an end" and not limit.done
+    print("✅ SentenceLimit forwards up to the boundary and stops the stream there")
+
+def test_phase_policies():
+    """Only the autonomous discussion phases carry a length policy"""
+    router = Router()
+    for agent, default in DEFAULT_MAX_TOKENS.items():
+        if agent == "summarizer":
+            continue
+        route = router.resolve(agent, "initial_response")
+        assert (route.max_tokens, route.stop_sequences, route.max_sentences) == (default, [], 0), route.key
+        autonomous = router.resolve(agent, "autonomous_discussion")
+        assert autonomous.max_sentences == 2 and autonomous.max_tokens <= default
+        assert router.resolve(agent, "final_round").max_sentences == 3
+    print("✅ Initial replies keep the baseline length; discussion turns are limited")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING LENGTH POLICY TESTS...\n")
+    test_trim_sentences()
+    test_sentence_limit()
+    test_phase_policies()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the response cache.
+
+Runs offline. Checks LRU eviction, TTL expiry in memory and on disk, that a
+SQLite-backed cache is read back by a new instance (standing in for a
+restart), and that the key tells length policies apart.
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.cache import ResponseCache
+
+def key(n: int) -> str:
+    return ResponseCache.key("anchor", "model", "system", [{"role": "user", "content": f"q{n}"}], 0.7, 300)
+
+async def test_lru_eviction():
+    """The least recently used entry goes first once the cache is full"""
+    cache = ResponseCache(max_entries=2, path=None)
+    await cache.put(key(1), "one")
+    await cache.put(key(2), "two")
+    assert await cache.get(key(1)) == "one"  # now key 2 is the least recently used
+    await cache.put(key(3), "three")
+    assert await cache.get(key(2)) is None, "the least recently used entry should be evicted"
+    assert await cache.get(key(1)) == "one" and await cache.get(key(3)) == "three"
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1), stats
+    print("✅ LRU eviction keeps the most recently used replies")
+
+async def test_ttl_expiry():
+    """Expired entries are misses and are dropped from memory"""
+    cache = ResponseCache(max_entries=8, ttl_seconds=0.05, path=None)
+    await cache.put(key(1), "one")
+    assert await cache.get(key(1)) == "one"
+    await asyncio.sleep(0.1)
+    assert await cache.get(key(1)) is None, "an expired entry was served"
+    assert cache.stats()["entries"] == 0
+    print("✅ Entries expire after the TTL")
+
+async def test_persistence(path: str):
+    """A new instance on the same file serves replies written by the previous one"""
+    first = ResponseCache(max_entries=8, path=path)
+    await first.put(key(1), "one")
+    await first.put(key(2), "two")
+
+    restarted = ResponseCache(max_entries=8, path=path)
+    assert restarted.stats()["entries"] == 0
+    assert await restarted.get(key(1)) == "one" and await restarted.get(key(2)) == "two"
+    assert restarted.disk_hits == 2
+    assert await restarted.get(key(1)) == "one" and restarted.disk_hits == 2, "second lookup should hit memory"
+    assert await restarted.get(key(3)) is None
+
+    expired = ResponseCache(max_entries=8, ttl_seconds=0, path=path)
+    assert await expired.get(key(1)) is None, "an expired row on disk was served"
+    print("✅ Replies survive a restart through SQLite, within the TTL")
+
+def test_key():
+    """Anything that changes the reply changes the key"""
+    base = ("weaver", "model", "system", [{"role": "user", "content": "q"}], 0.7, 160)
+    keys = {
+        ResponseCache.key(*base),
+        ResponseCache.key(*base, stop_sequences=["\n\n"]),
+        ResponseCache.key(*base, stop_sequences=["\n\n"], max_sentences=2),
+        ResponseCache.key(*base[:4], 0.8, 160),
+        ResponseCache.key(*base[:5], 120),
+    }
+    assert len(keys) == 5, "different requests share a key"
+    assert ResponseCache.key(*base) == ResponseCache.key(*base)
+    print("✅ Keys differ by temperature, max_tokens and length policy")
+
+async def test_response_cache():
+    print("🚀 Testing the response cache")
+    print("=" * 70)
+    await test_lru_eviction()
+    await test_ttl_expiry()
+    with tempfile.TemporaryDirectory() as directory:
+        await test_persistence(os.path.join(directory, "responses.db"))
+    test_key()
+
+if __name__ == "__main__":
+    print("🧪 RUNNING RESPONSE CACHE TEST...\n")
+    asyncio.run(test_response_cache())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for broadcast rooms: one discussion, many viewers.
+
+Runs offline against an in-memory session store. Viewers on several wire
+protocols watch one room while events are published; every viewer should
+see every event, each event should be encoded once per protocol however
+many viewers there are, and a late joiner should get a snapshot (without the
+deltas of finished replies) followed by the live tail.
+"""
+
+import asyncio
+import json
+
+from app import metrics, wire
+from app.rooms import Rooms
+from app.sessions import SessionStore
+
+VIEWERS_PER_PROTOCOL = 50
+PROTOCOLS = (wire.JSON_PROTOCOL, wire.COMPACT_PROTOCOL, wire.SSE_PROTOCOL)
+
+def decode(protocol: str, frames: list) -> list:
+    """Sequence numbers carried by a batch of frames"""
+    seqs = []
+    for _, payload in frames:
+        if protocol == wire.JSON_PROTOCOL:
+            seqs.append(json.loads(payload)["seq"])
+        elif protocol == wire.SSE_PROTOCOL:
+            seqs.extend(int(line[4:]) for line in payload.splitlines() if line.startswith("id: "))
+        else:
+            seqs.extend(event["q"] for event in json.loads(payload))
+    return seqs
+
+async def watch(viewer, seen: list):
+    async for frames, _ in viewer.batches():
+        seen.extend(decode(viewer.protocol, frames))
+
+def encodes() -> float:
+    return sum(metrics.room_encodes._children.values())
+
+async def publish_reply(events, agent: str, words: list) -> tuple:
+    """Stream one reply into the log; returns the seqs of all its events and of its deltas"""
+    seqs = [events.publish({"role": "agent", "agent": agent, "content": None, "status": "typing"})]
+    deltas = []
+    for word in words:
+        deltas.append(events.publish({"role": "agent", "agent": agent, "content": word, "status": "delta"}))
+        await asyncio.sleep(0.02)
+    seqs += deltas
+    seqs.append(events.publish({"role": "agent", "agent": agent, "content": " ".join(words), "status": "done"}))
+    return seqs, deltas
+
+async def test_broadcast_room():
+    """Many viewers, one encoding per event and protocol, snapshot then live tail for late joiners"""
+    print("🚀 Testing a broadcast room with many viewers")
+    print("=" * 70)
+
+    rooms = Rooms(SessionStore())
+    room = await rooms.get("demo")
+    events = room.events
+
+    viewers = {}
+    for protocol in PROTOCOLS:
+        for _ in range(VIEWERS_PER_PROTOCOL):
+            seen = []
+            viewer = room.join(protocol)
+            viewers[viewer] = (seen, asyncio.create_task(watch(viewer, seen)))
+
+    encoded_before = encodes()
+    published, finished_deltas = await publish_reply(events, "catalyst", ["Ship", "it", "now."])
+    await asyncio.sleep(0.1)
+
+    # A viewer joining between replies gets the finished reply without its deltas
+    late_seen = []
+    late = room.join(wire.COMPACT_PROTOCOL)
+    viewers[late] = (late_seen, asyncio.create_task(watch(late, late_seen)))
+    published += (await publish_reply(events, "anchor", ["Measure", "first."]))[0]
+    await asyncio.sleep(0.1)
+
+    for viewer, (seen, _) in viewers.items():
+        if viewer is not late:
+            assert seen == published, f"{viewer.protocol} viewer saw {seen}, expected {published}"
+    assert not any(event.get("status") == "delta" for event in events.since(0)), "the log kept finished deltas"
+    assert not set(finished_deltas) & set(late_seen), "late joiner got deltas of a finished reply"
+    assert late_seen == [seq for seq in published if seq not in finished_deltas], late_seen
+    print(f"✅ {len(viewers)} viewers saw all {len(published)} events; late joiner got snapshot + tail")
+
+    encoded = encodes() - encoded_before
+    assert encoded == len(published) * len(PROTOCOLS), (
+        f"{encoded} encodes for {len(published)} events on {len(PROTOCOLS)} protocols"
+    )
+    print(f"✅ {int(encoded)} encodes for {len(published)} events x {len(PROTOCOLS)} protocols "
+          f"(not x {len(viewers)} viewers)")
+
+    for viewer, (_, task) in viewers.items():
+        rooms.leave(room, viewer)
+        await task
+    assert "demo" not in rooms.rooms, "idle room was not dropped"
+    print("✅ Room dropped once the last viewer left")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING BROADCAST ROOM TEST...\n")
+    asyncio.run(test_broadcast_room())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for session eviction while a WebSocket client is connected.
+
+Runs offline against the fake LLM backend. The session store keeps sessions
+whose event log a client is following, however full it gets, and a
+connection whose session was dropped anyway (rebuilt on the next message)
+must follow the new session's log, so the client still sees its discussion.
+"""
+
+import asyncio
+import faulthandler
+import os
+
+os.environ["HIVE_STATE_BACKEND"] = "memory"  # keep sessions in memory; write no transcript file
+os.environ["HIVE_LLM_BACKEND"] = "fake"
+os.environ["HIVE_FAKE_LATENCY_MS"] = "20"
+os.environ["HIVE_FAKE_JITTER_MS"] = "0"
+os.environ["HIVE_FAKE_TOKENS_PER_SECOND"] = "0"
+os.environ.setdefault("ANTHROPIC_API_KEY", "offline")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.sessions import SessionStore
+
+QUESTION = {"message": "Should we rewrite the billing service?", "autonomous_rounds": 2, "pacing": "none"}
+
+async def check_store_keeps_followed():
+    """A full store evicts the least recently used session, unless someone follows its log"""
+    store = SessionStore(max_sessions=1)
+    watched = await store.get("watched")
+
+    async def tail():
+        async for _ in watched.events.follow(0):
+            pass
+
+    follower = asyncio.create_task(tail())
+    await asyncio.sleep(0)
+    await store.get("other")
+    assert await store.peek("watched") is watched, "a followed session was evicted"
+
+    follower.cancel()
+    await asyncio.gather(follower, return_exceptions=True)
+    await store.get("third")
+    assert await store.peek("watched") is None, "an unfollowed session should be evicted"
+    print("✅ The store keeps followed sessions and evicts them once nobody follows")
+
+def discussion_events(websocket) -> list:
+    """Events the client receives for one discussion, up to the hand-back"""
+    received = []
+    while True:
+        event = websocket.receive_json()
+        received.append(event)
+        if event.get("status") == "awaiting_user" or event.get("event") in ("error", "cancelled"):
+            return received
+
+def check_connected_client(client: TestClient, evict):
+    with client.websocket_connect("/ws-chat?session_id=watched") as websocket:
+        evict()
+        websocket.send_json(QUESTION)
+        received = discussion_events(websocket)
+    replies = [event for event in received if event.get("status") == "done"]
+    assert received[-1].get("status") == "awaiting_user", received[-1]
+    assert len(replies) >= len(main.AGENTS), f"only {len(replies)} replies reached the client"
+    return len(replies)
+
+def test_session_eviction():
+    print("🚀 Testing session eviction while a client is connected")
+    print("=" * 70)
+    asyncio.run(check_store_keeps_followed())
+
+    client = TestClient(main.app)
+    original = main.sessions.max_sessions
+    main.sessions.max_sessions = 1
+    try:
+        # Another session pushes the store over capacity between connect and message
+        def use_other_session():
+            response = client.post("/chat", json={"message": "Hello", "session_id": "other"})
+            assert response.status_code == 200, response.text
+
+        replies = check_connected_client(client, use_other_session)
+        print(f"✅ Store over capacity: the connected client got all {replies} replies")
+
+        # Dropped anyway (e.g. expired before the forwarder attached): the next message rebuilds the
+        # session, and the connection must follow the new session's log
+        replies = check_connected_client(client, lambda: main.sessions._sessions.pop("watched", None))
+        print(f"✅ Session rebuilt under the connection: the client got all {replies} replies")
+    finally:
+        main.sessions.max_sessions = original
+
+if __name__ == "__main__":
+    print("🧪 RUNNING SESSION EVICTION TEST...\n")
+    faulthandler.dump_traceback_later(60, exit=True)  # a client that never gets its events would hang
+    test_session_eviction()
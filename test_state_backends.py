@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that a session works no matter which worker serves it.
+
+Each shared backend gets two SessionStores with their own backend instance,
+standing in for two worker processes pointed at the same storage: SQLite in
+a temporary file and the Redis protocol against redis_standin.py. Runs
+offline, no API key or Redis install needed.
+"""
+
+import asyncio
+import os
+import tempfile
+
+from app.sessions import SessionStore
+from app.state import MemoryState, RedisState
+from app.transcripts import TranscriptStore
+from redis_standin import start_standin
+
+STANDIN_PORT = 6391
+
+async def check_shared(name: str, make_backend):
+    print(f"🔸 {name}")
+    worker_a, worker_b = make_backend(), make_backend()
+    store_a, store_b = SessionStore(state=worker_a), SessionStore(state=worker_b)
+    try:
+        # Worker A handles the first turn
+        session = await store_a.get("shared")
+        session.append("user", "user", "First question")
+        session.append("agent", "catalyst", "First answer")
+        await worker_a.flush()
+
+        # Worker B serves the next request and must see that turn
+        session = await store_b.get("shared")
+        assert [m.content for m in session.messages] == ["First question", "First answer"], session.to_dicts()
+        session.append("user", "user", "Follow-up")
+        session.set_summary("They asked twice", 1)
+        await worker_b.flush()
+
+        # Back on worker A, whose cached copy is now stale
+        session = await store_a.get("shared")
+        assert session.total == 3, session.total
+        assert session.messages[-1].content == "Follow-up"
+        assert session.summary == "They asked twice"
+        assert "Follow-up" in session.history_text(0, session.total)
+
+        # Both workers append at once; nothing may be lost
+        (await store_a.get("shared")).append("agent", "anchor", "From A")
+        (await store_b.get("shared")).append("agent", "weaver", "From B")
+        await asyncio.gather(worker_a.flush(), worker_b.flush())
+        contents = [m.content for m in (await store_a.get("shared")).messages]
+        assert sorted(contents[3:]) == ["From A", "From B"], contents
+        page, _ = await (await store_b.get("shared")).page(after=2)
+        assert [m["id"] for m in page] == [3, 4], page
+        print(f"   ✅ {len(contents)} messages consistent across workers")
+    finally:
+        await worker_a.aclose()
+        await worker_b.aclose()
+
+async def check_memory():
+    print("🔸 memory")
+    store = SessionStore(state=MemoryState())
+    session = await store.get("local")
+    session.append("user", "user", "Hello")
+    assert (await store.get("local")).total == 1
+    assert await SessionStore(state=MemoryState()).peek("local") is None  # other workers can't see it
+    print("   ✅ in-process only, as expected")
+
+async def test_state_backends():
+    print("🚀 Testing session state backends across simulated workers")
+    print("=" * 70)
+    await check_memory()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.db")
+        await check_shared("sqlite", lambda: TranscriptStore(path, flush_seconds=0))
+
+    server = await start_standin(port=STANDIN_PORT)
+    try:
+        await check_shared("redis (stand-in)",
+                           lambda: RedisState(f"redis://127.0.0.1:{STANDIN_PORT}/0", flush_seconds=0))
+    finally:
+        server.close()
+        await server.wait_closed()
+    print("✅ Sessions stay consistent whichever worker serves them")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING STATE BACKEND TEST...\n")
+    asyncio.run(test_state_backends())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for retries in the pooled LLM transport.
+
+Runs offline: Transport.call() is given stub calls that raise retryable and
+non-retryable API errors, so no request leaves the process. Checks how many
+attempts are made, that retry-after delays are honoured, that the last error
+is raised once retries run out, and the retry/failure counters behind /stats
+and /metrics.
+"""
+
+import asyncio
+import time
+
+import httpx
+from anthropic import APIStatusError
+
+from app import metrics
+from app.transport import RETRY_AFTER_LIMIT, Transport
+
+def status_error(status: int, headers: dict = None) -> APIStatusError:
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    return APIStatusError(f"HTTP {status}", response=httpx.Response(status, headers=headers, request=request),
+                          body=None)
+
+def failing(errors: list, result: str = "ok"):
+    """A stub call that raises `errors` in turn, then returns `result`; attempt times go in .attempts"""
+    async def attempt_call():
+        attempt_call.attempts.append(time.perf_counter())
+        if len(attempt_call.attempts) <= len(errors):
+            raise errors[len(attempt_call.attempts) - 1]
+        return result
+    attempt_call.attempts = []
+    return attempt_call
+
+def counted() -> tuple:
+    return metrics.llm_retries._children.get((), 0), metrics.llm_failures._children.get((), 0)
+
+async def expect_error(transport: Transport, call, can_retry=None) -> APIStatusError:
+    try:
+        await transport.call(call, can_retry)
+    except APIStatusError as e:
+        return e
+    raise AssertionError("the call should have failed")
+
+async def test_retry_after_honoured(transport: Transport):
+    """Retryable errors are retried after the server's retry-after, then the call succeeds"""
+    call = failing([status_error(429, {"retry-after": "0.2"}), status_error(529, {"retry-after-ms": "150"})])
+    assert await transport.call(call) == "ok"
+    assert len(call.attempts) == 3, call.attempts
+    gaps = [later - earlier for earlier, later in zip(call.attempts, call.attempts[1:])]
+    assert 0.19 <= gaps[0] < 0.4 and 0.14 <= gaps[1] < 0.35, gaps
+    print(f"✅ 2 retries after {gaps[0]:.2f}s and {gaps[1]:.2f}s (retry-after 0.2s, retry-after-ms 150)")
+
+async def test_gives_up(transport: Transport):
+    """After max_retries the last error is raised; non-retryable errors are not retried at all"""
+    errors = [status_error(503, {"retry-after": "0"}) for _ in range(transport.max_retries + 1)]
+    call = failing(errors)
+    assert await expect_error(transport, call) is errors[-1]
+    assert len(call.attempts) == transport.max_retries + 1, call.attempts
+
+    call = failing([status_error(400)])
+    assert (await expect_error(transport, call)).status_code == 400 and len(call.attempts) == 1
+
+    call = failing([status_error(500, {"x-should-retry": "false"})])
+    await expect_error(transport, call)
+    assert len(call.attempts) == 1, "x-should-retry: false was ignored"
+
+    call = failing([status_error(429, {"retry-after": str(RETRY_AFTER_LIMIT + 1)})])
+    await expect_error(transport, call)
+    assert len(call.attempts) == 1, "waited past HIVE_LLM_RETRY_AFTER_LIMIT"
+
+    call = failing([status_error(529, {"retry-after": "0"})])
+    await expect_error(transport, call, can_retry=lambda: False)
+    assert len(call.attempts) == 1, "retried a call that can't be replayed"
+    print(f"✅ Gives up after {transport.max_retries} retries, and never retries what it shouldn't")
+
+async def test_transport_retries():
+    print("🚀 Testing LLM transport retries")
+    print("=" * 70)
+    transport = Transport(api_key="test", max_retries=2)
+    retries_before, failures_before = counted()
+    try:
+        await test_retry_after_honoured(transport)
+        await test_gives_up(transport)
+    finally:
+        await transport.aclose()
+
+    stats = transport.stats()
+    assert (stats["retries"], stats["failures"], stats["in_flight"]) == (4, 5, 0), stats
+    retries, failures = counted()
+    assert (retries - retries_before, failures - failures_before) == (4, 5), (retries, failures)
+    rendered = metrics.registry.render()
+    assert "hive_llm_retries_total 4" in rendered and "hive_llm_failures_total 5" in rendered
+    print("✅ 4 retries and 5 failures counted in /stats and /metrics")
+
+if __name__ == "__main__":
+    print("🧪 RUNNING TRANSPORT RETRY TEST...\n")
+    asyncio.run(test_transport_retries())